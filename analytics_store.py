@@ -0,0 +1,354 @@
+"""
+Local columnar copy of submitted complaints for analytics.
+
+Rows are stored as Parquet files partitioned by submission month
+(DATA_DIR/analytics/month=YYYY-MM/part-*.parquet) and kept in sync two ways:
+- append_records(): called after every sheet write with the new rows
+- sync_from_sheet(): pulls only rows past the last synced sheet row
+  (backfill, or rows written by other processes)
+
+Precomputed rollups (counts per month by Component, Make/Model, State, plus
+crash/fire/injury/death totals) are updated on each write and stored as a
+small JSON file, so the Home page never scans Parquet or touches Sheets.
+Writes hold an exclusive lock on DATA_DIR/analytics/.lock (flock), so the
+Streamlit server, bulk_ingest and sync runs can share one store without
+losing each other's rollup or sync-state updates.
+Component is stored as its component_taxonomy code, so free-text variants
+("brakes", "ABS module") count as one component.
+Ad-hoc questions use vectorized Arrow group-bys via group_counts().
+
+Usage:
+    python analytics_store.py sync
+    python analytics_store.py top Component --by Make --month 2024-05
+"""
+import argparse
+import contextlib
+import fcntl
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import streamlit as st
+
+import component_taxonomy
+import report_ids
+import shared_utils as utils
+
+STORE_DIR = "analytics"
+ROLLUP_FILE = "rollups.json"
+SYNC_FILE = "sync_state.json"
+LOCK_FILE = ".lock"
+MAX_PARTS_PER_MONTH = 32
+
+ROLLUP_DIMENSIONS = {
+    "by_component": ("Component",),
+    "by_make_model": ("Make", "Model"),
+    "by_state": ("State",),
+    "by_make_component": ("Make", "Component"),
+}
+
+SCHEMA = pa.schema(
+    [(f, pa.string()) for f in utils.COMPLAINT_FIELDS]
+    + [
+        ("Sheet_Row", pa.int64()),
+        ("Crash_Flag", pa.bool_()),
+        ("Fire_Flag", pa.bool_()),
+        ("Injured_N", pa.int32()),
+        ("Deaths_N", pa.int32()),
+        ("Speed_N", pa.float32()),
+    ]
+)
+
+_lock = threading.Lock()
+
+def _store_dir():
+    return os.path.join(utils.DATA_DIR, STORE_DIR)
+
+@contextlib.contextmanager
+def _locked():
+    """Exclusive access to the store across threads and processes."""
+    os.makedirs(_store_dir(), exist_ok=True)
+    with _lock, open(os.path.join(_store_dir(), LOCK_FILE), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+def _read_json(name, default):
+    path = os.path.join(_store_dir(), name)
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+def _write_json(name, data):
+    os.makedirs(_store_dir(), exist_ok=True)
+    path = os.path.join(_store_dir(), name)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+# --- NORMALIZATION ---
+def _clean(value):
+    value = "" if value is None else str(value).strip()
+    return "" if value == "None" else value
+
+def _int(value):
+    match = re.search(r"\d+", _clean(value))
+    return int(match.group()) if match else 0
+
+def _month(record):
+    stamp = _clean(record.get("Timestamp"))
+    return stamp[:7] if re.match(r"\d{4}-\d{2}", stamp) else datetime.now().strftime("%Y-%m")
+
+def _with_component_code(record):
+    """Copy of record with Component as a taxonomy code (older rows hold free text)."""
+    code = component_taxonomy.canonical(_clean(record.get("Component")), fallback=_clean(record.get("Description")))
+    return {**record, "Component": code or component_taxonomy.OTHER}
+
+def _group_key(record, fields):
+    return "|".join(_clean(record.get(f)).title() or "Unknown" for f in fields)
+
+def to_table(records, rows=None):
+    """Typed Arrow table for a list of record dicts."""
+    rows = rows or [None] * len(records)
+    columns = {f: [_clean(r.get(f)) for r in records] for f in utils.COMPLAINT_FIELDS}
+    columns["Sheet_Row"] = rows
+    columns["Crash_Flag"] = pc.equal(pc.utf8_upper(pa.array(columns["Crash"])), "YES")
+    columns["Fire_Flag"] = pc.equal(pc.utf8_upper(pa.array(columns["Fire"])), "YES")
+    columns["Injured_N"] = [_int(v) for v in columns["Injured"]]
+    columns["Deaths_N"] = [_int(v) for v in columns["Deaths"]]
+    columns["Speed_N"] = [float(_int(v)) for v in columns["Speed"]]
+    return pa.Table.from_pydict(columns, schema=SCHEMA)
+
+# --- WRITES ---
+def append_records(records, first_row=None, rows=None):
+    """
+    Append newly written complaints and update rollups. Returns rows stored.
+    Sheet row numbers come from first_row (consecutive append) or rows.
+    """
+    if rows is None and first_row:
+        rows = [first_row + i for i in range(len(records))]
+    keep = [i for i, r in enumerate(records) if _clean(r.get("Make")) or _clean(r.get("Description"))]
+    if rows:
+        # Non-complaint rows (feedback) still count as synced
+        with _locked():
+            _mark_synced(rows)
+        rows = [rows[i] for i in keep]
+    records = [_with_component_code(records[i]) for i in keep]
+    if not records:
+        return 0
+
+    with _locked():
+        by_month = {}
+        for i, record in enumerate(records):
+            by_month.setdefault(_month(record), []).append(i)
+
+        for month, idx in by_month.items():
+            part_dir = os.path.join(_store_dir(), f"month={month}")
+            os.makedirs(part_dir, exist_ok=True)
+            table = to_table([records[i] for i in idx], [rows[i] for i in idx] if rows else None)
+            pq.write_table(table, os.path.join(part_dir, _part_name()))
+            if len(glob.glob(os.path.join(part_dir, "part-*.parquet"))) > MAX_PARTS_PER_MONTH:
+                _compact(part_dir)
+
+        _update_rollups(records)
+    cached_summary.clear()
+    return len(records)
+
+def _update_rollups(records):
+    rollups = _read_json(ROLLUP_FILE, {"months": {}})
+    for record in records:
+        month_key = _month(record)
+        if month_key not in rollups["months"]:
+            rollups["months"][month_key] = {
+                "reports": 0, "crashes": 0, "fires": 0, "injured": 0, "deaths": 0,
+                **{name: {} for name in ROLLUP_DIMENSIONS},
+            }
+        month = rollups["months"][month_key]
+        month["reports"] += 1
+        month["crashes"] += _clean(record.get("Crash")).upper() == "YES"
+        month["fires"] += _clean(record.get("Fire")).upper() == "YES"
+        month["injured"] += _int(record.get("Injured"))
+        month["deaths"] += _int(record.get("Deaths"))
+        for name, fields in ROLLUP_DIMENSIONS.items():
+            key = _group_key(record, fields)
+            month[name][key] = month[name].get(key, 0) + 1
+        rollups["updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rollups["last_month"] = max(rollups.get("last_month", ""), month_key)
+    _write_json(ROLLUP_FILE, rollups)
+
+def _read_part(path):
+    """A part file as SCHEMA; columns added since it was written come back as nulls."""
+    table = pq.read_table(path)
+    columns = [table[f.name] if f.name in table.column_names else pa.nulls(len(table), f.type)
+               for f in SCHEMA]
+    return pa.Table.from_arrays(columns, schema=SCHEMA)
+
+def _part_name():
+    # The pid keeps names unique across processes writing in the same nanosecond
+    return f"part-{time.time_ns()}-{os.getpid()}.parquet"
+
+def _compact(part_dir):
+    """Merge a month's small part files into one."""
+    parts = sorted(glob.glob(os.path.join(part_dir, "part-*.parquet")))
+    merged = pa.concat_tables([_read_part(p) for p in parts])
+    pq.write_table(merged, os.path.join(part_dir, _part_name()))
+    for p in parts:
+        os.remove(p)
+
+# --- SHEET SYNC ---
+def _mark_synced(rows, cursor=0):
+    """Record sheet rows as stored; advance the contiguous cursor where possible."""
+    state = _read_json(SYNC_FILE, {"cursor": 0, "ahead": []})
+    cursor = max(state["cursor"], cursor)
+    ahead = {r for r in state["ahead"] if r > cursor} | {r for r in rows if r > cursor}
+    while cursor + 1 in ahead:
+        cursor += 1
+        ahead.discard(cursor)
+    _write_json(SYNC_FILE, {"cursor": cursor, "ahead": sorted(ahead)})
+
+def sheet_columns(sheet):
+    """
+    {field: column index} for the complaint fields, read from the header row,
+    so a sheet that predates a column (Report_ID) isn't read shifted.
+    Falls back to COMPLAINT_FIELDS order when there is no header.
+    """
+    header = [h.strip() for h in sheet.row_values(1)]
+    if not header or header[0] != "Timestamp":
+        header = utils.COMPLAINT_FIELDS
+    return {f: header.index(f) for f in utils.COMPLAINT_FIELDS if f in header}
+
+def sync_from_sheet(sheet=None, chunk=5000):
+    """Pull complaint rows added to the sheet since the last sync. Returns rows stored."""
+    sheet = sheet or utils.get_worksheet()
+    state = _read_json(SYNC_FILE, {"cursor": 0, "ahead": []})
+    start = state["cursor"] + 1
+    columns = sheet_columns(sheet)
+    width = max(columns.values()) + 1
+    stored = 0
+    while True:
+        values = sheet.get_values(f"A{start}:{_column_letter(width)}{start + chunk - 1}")
+        if not values:
+            break
+        # Rows this process already stored via append_records are skipped
+        ahead = set(_read_json(SYNC_FILE, {"cursor": 0, "ahead": []})["ahead"])
+        pulled = [
+            (start + offset, {f: row[i] if i < len(row) else "" for f, i in columns.items()})
+            for offset, row in enumerate(values)
+            if start + offset not in ahead and not (row and row[0] == "Timestamp")
+        ]
+        if pulled:
+            rows, records = [p[0] for p in pulled], [p[1] for p in pulled]
+            # Reports written by other processes become trackable by ID too
+            report_ids.get_index().add(records, rows)
+            stored += append_records(records)
+        start += len(values)
+        with _locked():
+            _mark_synced([], cursor=start - 1)
+        if len(values) < chunk:
+            break
+    return stored
+
+def _column_letter(n):
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+# --- READS ---
+def load_table(months=None, columns=None):
+    """Arrow table of stored complaints, optionally limited to months/columns."""
+    root = _store_dir()
+    files = glob.glob(os.path.join(root, "month=*", "*.parquet"))
+    if not files:
+        return SCHEMA.empty_table() if columns is None else SCHEMA.empty_table().select(columns)
+    # Explicit schema: parts written before a column was added read it as null
+    dataset = ds.dataset(
+        files, schema=SCHEMA.append(pa.field("month", pa.string())), format="parquet", partition_base_dir=root,
+        partitioning=ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive"),
+    )
+    flt = ds.field("month").isin(months) if months else None
+    return dataset.to_table(columns=columns, filter=flt)
+
+def group_counts(by, months=None, top=None):
+    """
+    Vectorized group-by over the stored rows.
+    Returns a table with the `by` columns plus report, crash, fire, injured and death totals.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    table = load_table(months, columns=by + ["Crash_Flag", "Fire_Flag", "Injured_N", "Deaths_N"])
+    result = table.group_by(by).aggregate([
+        ([], "count_all"),
+        ("Crash_Flag", "sum"),
+        ("Fire_Flag", "sum"),
+        ("Injured_N", "sum"),
+        ("Deaths_N", "sum"),
+    ]).rename_columns(by + ["reports", "crashes", "fires", "injured", "deaths"])
+    result = result.sort_by([("reports", "descending")])
+    return result.slice(0, top) if top else result
+
+def load_rollups():
+    return _read_json(ROLLUP_FILE, {"months": {}})
+
+def summary(rollups=None):
+    """Headline numbers for the Home page, computed from the rollups only."""
+    rollups = rollups or load_rollups()
+    months = rollups.get("months", {})
+    if not months:
+        return None
+    this_month = datetime.now().strftime("%Y-%m")
+    current = months.get(this_month, {})
+    components = Counter()
+    for month in months.values():
+        components.update(month["by_component"])
+    components.pop("Unknown", None)
+    components.pop(component_taxonomy.OTHER.title(), None)
+    return {
+        "total_reports": sum(m["reports"] for m in months.values()),
+        "reports_this_month": current.get("reports", 0),
+        "crashes": sum(m["crashes"] for m in months.values()),
+        "fires": sum(m["fires"] for m in months.values()),
+        "injured": sum(m["injured"] for m in months.values()),
+        "deaths": sum(m["deaths"] for m in months.values()),
+        "top_component": components.most_common(1)[0] if components else None,
+        "updated": rollups.get("updated"),
+    }
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_summary():
+    """summary() memoized across sessions; cleared whenever rows are appended."""
+    return summary()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local complaint analytics store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("sync", help="pull new rows from the report sheet")
+    top = sub.add_parser("top", help="top groups by report count")
+    top.add_argument("column", help="column to group by, e.g. Component")
+    top.add_argument("--by", action="append", default=[], help="extra grouping column (repeatable)")
+    top.add_argument("--month", action="append", help="YYYY-MM (repeatable, default: all)")
+    top.add_argument("-n", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    if args.command == "sync":
+        print(f"Synced {sync_from_sheet()} rows")
+    else:
+        print(group_counts(args.by + [args.column], args.month, args.n).to_pandas().to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,12 @@ st.set_page_config(page_title="Safety & Feedback Portal", page_icon="🚗", layo
 # Import after page config
 import complaint_bot
 import feedback_bot
+import analytics_store
+import dedup_index
+import report_ids
+
+# Load the duplicate index in the background now, not on the first REVIEW page
+dedup_index.warm()
 
 # --- SIDEBAR NAVIGATION ---
 st.sidebar.title("🧭 Navigation")
@@ -76,18 +82,50 @@ if app_mode == "Home":
     
     st.markdown("---")
     
-    # Quick stats
-    st.markdown("### 📊 Why Report?")
-    col_a, col_b, col_c = st.columns(3)
-    
-    with col_a:
-        st.metric("Response Time", "2-3 Days", "Fast")
-    
-    with col_b:
-        st.metric("Privacy", "100%", "Secure")
-    
-    with col_c:
-        st.metric("AI Assisted", "Smart", "Easy")
+    # Quick stats (precomputed rollups from the local analytics store)
+    stats = analytics_store.cached_summary()
+    if stats:
+        st.markdown("### 📊 Reports at a Glance")
+        col_a, col_b, col_c, col_d = st.columns(4)
+
+        with col_a:
+            st.metric("Reports Filed", f"{stats['total_reports']:,}", f"{stats['reports_this_month']:,} this month")
+
+        with col_b:
+            st.metric("Crashes Reported", f"{stats['crashes']:,}")
+
+        with col_c:
+            st.metric("People Injured", f"{stats['injured']:,}")
+
+        with col_d:
+            if stats["top_component"]:
+                component, count = stats["top_component"]
+                st.metric("Most Reported Component", component, f"{count:,} reports", delta_color="off")
+
+        st.caption(f"Updated {stats['updated']}")
+    else:
+        st.markdown("### 📊 Why Report?")
+        col_a, col_b, col_c = st.columns(3)
+
+        with col_a:
+            st.metric("Response Time", "2-3 Days", "Fast")
+
+        with col_b:
+            st.metric("Privacy", "100%", "Secure")
+
+        with col_c:
+            st.metric("AI Assisted", "Smart", "Easy")
+
+    # Report status: one indexed lookup by ID, no sheet scan
+    st.markdown("---")
+    st.markdown("### 🔎 Track Your Report")
+    tracked = st.text_input("Report Reference ID", placeholder="e.g. 01HXF3Q9V6Y5J0K8M2N4P6R8T0", key="track_report_id")
+    if tracked:
+        entry = report_ids.lookup(tracked)
+        if entry:
+            st.success(f"**Status:** {entry['status'].title()}  \n**Submitted:** {entry['submitted']}")
+        else:
+            st.warning("We couldn't find a report with that ID. Please check it and try again.")
     
     st.markdown("---")
     st.markdown("""
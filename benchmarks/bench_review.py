@@ -0,0 +1,75 @@
+"""
+Review-page render time (review_editor.render), as recorded in
+st.session_state.review_render_ms.
+
+Runs a small page under Streamlit's AppTest that renders the complaint
+review editors for a full mock record (mock_llm.complaint_record) and
+reports, per record:
+- cold: the first render, which builds the grouped Field/Value frames
+- warm: reruns of the unchanged record (frames reused from session state)
+- edited: reruns after a cell edit, which also run dirty_fields and
+  revalidate (with the real validator, mock LLM)
+
+    python benchmarks/bench_review.py --records 50 --reruns 20
+"""
+import argparse
+import statistics
+import sys
+
+import mock_llm  # first: puts the repo root on sys.path
+
+def review_page():
+    """The review section of complaint_bot, without the chat around it."""
+    import streamlit as st
+
+    import review_editor
+    import shared_utils as utils
+
+    record = st.session_state.bench_record
+    review_editor.render(record, review_editor.COMPLAINT_GROUPS)
+    edits = review_editor.dirty_fields(record, review_editor.COMPLAINT_GROUPS)
+    if edits:
+        review_editor.revalidate(edits, utils.validate_field, record)
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[int(p * (len(values) - 1))]
+
+def run(records, reruns, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    cold, warm, edited = [], [], []
+    for seed in range(records):
+        at = AppTest.from_function(review_page, default_timeout=timeout)
+        at.session_state.bench_record = mock_llm.complaint_record(seed)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        cold.append(at.session_state.review_render_ms)
+        for _ in range(reruns):
+            warm.append(at.run().session_state.review_render_ms)
+        # Edit the Mileage cell of the vehicle editor
+        for n in range(reruns):
+            at.session_state.vehicle_editor = {"edited_rows": {4: {"Value": str(10000 + n)}},
+                                               "added_rows": [], "deleted_rows": []}
+            edited.append(at.run().session_state.review_render_ms)
+    return {"cold": cold, "warm": warm, "edited": edited}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark review-page render time.")
+    parser.add_argument("--records", type=int, default=50)
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns per record, unchanged and edited")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-run timeout (s)")
+    args = parser.parse_args(argv)
+
+    mock_llm.install(latency=0, cpu_ms=0)
+    results = run(args.records, args.reruns, args.timeout)
+
+    print(f"{'render':>8} {'runs':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, times in results.items():
+        print(f"{name:>8} {len(times):>6} {statistics.median(times):>8.2f} "
+              f"{_percentile(times, 0.95):>8.2f} {max(times):>8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Multi-worker throughput benchmark for turn_api.py with a mock LLM.
+
+Starts 1, 2, 4, 8 single-threaded workers on one SO_REUSEPORT port (all
+sharing one SQLite session store), drives simulated users that each file a
+complete scripted complaint, and reports turns/s and scaling efficiency
+against the single-worker run, plus the workers' measured CPU per turn:
+
+    python benchmarks/bench_turn_api.py --workers 1 2 4 8 --users 32
+
+By default the mock LLM answers instantly (--latency 0) and only burns
+--cpu-ms, so every turn is CPU work and turns/s can only scale up to the
+number of cores; "cpu ms/turn" x turns/s shows how close the run is to that
+ceiling. With --latency > 0 workers mostly wait on the mock model and extra
+workers overlap that wait; speedups in that mode measure I/O concurrency,
+not serving capacity.
+"""
+import argparse
+import os
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock_llm
+import turn_api
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _simulate_user(base_url, script):
+    """One user filing one report. Returns (turns, workers_seen)."""
+    session_id = turn_api.create_session(base_url, "COMPLAINT")["session_id"]
+    workers = set()
+    turns = 0
+    for message in script:
+        result = turn_api.send_turn(base_url, session_id, message)
+        workers.add(result["worker"])
+        turns += 1
+        if result["complete"]:
+            break
+    return turns, workers
+
+def _cpu_s(procs):
+    """User + system CPU seconds used so far by the worker processes (Linux /proc), or None."""
+    try:
+        total = 0
+        for proc in procs:
+            with open(f"/proc/{proc.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])   # utime, stime
+        return total / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def run(workers, users, latency, cpu_ms):
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        procs = turn_api.serve_workers(
+            port=port, workers=workers, store_path=os.path.join(tmp, "sessions.sqlite3"),
+            initializer=mock_llm.install, initargs=(latency, cpu_ms),
+        )
+        try:
+            cpu_before = _cpu_s(procs)
+            started = time.perf_counter()
+            # Enough client threads to keep every worker busy
+            with ThreadPoolExecutor(max_workers=max(4, workers * 4)) as pool:
+                results = list(pool.map(lambda _: _simulate_user(base_url, mock_llm.COMPLAINT_SCRIPT),
+                                        range(users)))
+            elapsed = time.perf_counter() - started
+            cpu_after = _cpu_s(procs)
+        finally:
+            for proc in procs:
+                proc.terminate()
+            for proc in procs:
+                proc.join()
+
+    turns = sum(t for t, _ in results)
+    seen = set().union(*(w for _, w in results))
+    cpu_ms_per_turn = None
+    if cpu_before is not None and cpu_after is not None:
+        cpu_ms_per_turn = (cpu_after - cpu_before) * 1000 / max(1, turns)
+    return {"workers": workers, "turns": turns, "seconds": elapsed,
+            "turns_per_s": turns / elapsed, "workers_used": len(seen), "cpu_ms_per_turn": cpu_ms_per_turn}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark turn_api scaling across workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--users", type=int, default=32, help="Simulated reports per run")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock LLM latency per call (s)")
+    parser.add_argument("--cpu-ms", type=float, default=2.0, help="Mock LLM CPU per call (ms)")
+    args = parser.parse_args(argv)
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    mode = "CPU-bound" if not args.latency else f"I/O-bound ({args.latency * 1000:.0f} ms mock latency)"
+    print(f"{cores} usable core(s), {mode}")
+    print(f"{'workers':>7} {'turns':>6} {'secs':>7} {'turns/s':>8} {'speedup':>8} {'efficiency':>10} "
+          f"{'used':>5} {'cpu ms/turn':>11}")
+    base = None
+    for n in args.workers:
+        r = run(n, args.users, args.latency, args.cpu_ms)
+        base = base or r["turns_per_s"] / r["workers"]
+        speedup = r["turns_per_s"] / base
+        print(f"{n:>7} {r['turns']:>6} {r['seconds']:>7.2f} {r['turns_per_s']:>8.1f} "
+              f"{speedup:>7.2f}x {speedup / n:>9.0%} {r['workers_used']:>5} {r['cpu_ms_per_turn'] or float('nan'):>11.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
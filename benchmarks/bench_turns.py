@@ -0,0 +1,106 @@
+"""
+Turns per completed complaint: question planner vs. the fixed field order.
+
+Drives turn_engine.complaint_turn (real extraction / validation / planning
+code, mock LLM) with simulated users who each hold a complete ground-truth
+record (mock_llm.complaint_record). A simulated user:
+- opens with the description and, with probability --opening, each of a few
+  headline facts (make, model, crash, ...)
+- answers every field the bot's reply asks for
+- while on a topic, volunteers each other field of that topic (as grouped in
+  mock_llm.SCRIPT_GROUPS) with probability --volunteer
+
+The baseline disables the planner (COMPLAINT_FIELDS order, no derivation).
+Reports turns and LLM calls per completed report:
+
+    python benchmarks/bench_turns.py --users 300
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+
+import mock_llm
+import question_planner
+import shared_utils as utils
+import turn_engine
+
+OPENING_FACTS = ["Make", "Model", "Model_Year", "Crash", "Component", "City"]
+MAX_TURNS = 40
+
+def _topic(field):
+    return next((g for g in mock_llm.SCRIPT_GROUPS if field in g), [field])
+
+def simulate(seed, opening_p, volunteer_p):
+    """File one report. Returns (turns, llm_calls) or None if it never completed."""
+    rng = random.Random(seed)
+    truth = mock_llm.complaint_record(seed)
+    state = turn_engine.new_state("COMPLAINT")
+    calls_before = _calls[0]
+
+    fields = ["Description"] + [f for f in OPENING_FACTS if rng.random() < opening_p]
+    for turn in range(1, MAX_TURNS + 1):
+        result = turn_engine.complaint_turn(state, mock_llm.say(truth, fields))
+        if result["complete"]:
+            return turn, _calls[0] - calls_before
+
+        missing = [f for f in turn_engine.complaint_remaining(state["record"]) if f in truth]
+        named = set(re.findall(r"\w+", result["reply"] or ""))
+        asked = [f for f in missing if f in named] or missing[:1]
+        extra = {f for a in asked for f in _topic(a)
+                 if f in missing and f not in asked and rng.random() < volunteer_p}
+        fields = asked + sorted(extra)
+    return None
+
+# Count LLM calls made by the mock
+_calls = [0]
+
+def _counting(query_llm):
+    def wrapper(*args, **kwargs):
+        _calls[0] += 1
+        return query_llm(*args, **kwargs)
+    return wrapper
+
+def run(users, opening_p, volunteer_p):
+    results = [simulate(seed, opening_p, volunteer_p) for seed in range(users)]
+    done = [r for r in results if r]
+    return {
+        "completed": len(done),
+        "turns": [t for t, _ in done],
+        "calls": [c for _, c in done],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark turns per completed report.")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--opening", type=float, default=0.5,
+                        help="Chance each headline fact is in the opening message")
+    parser.add_argument("--volunteer", type=float, default=0.3,
+                        help="Chance a user volunteers another field of the topic being asked about")
+    args = parser.parse_args(argv)
+
+    mock_llm.install(latency=0, cpu_ms=0)
+    utils.query_llm = _counting(utils.query_llm)
+    # Fixed fill-rate priors, so results don't depend on the local analytics store
+    question_planner.fill_rates = lambda: question_planner.DEFAULT_FILL_RATES
+
+    planned = run(args.users, args.opening, args.volunteer)
+
+    plan, derive = question_planner.plan, question_planner.derive
+    question_planner.plan = lambda record, remaining: remaining
+    question_planner.derive = lambda record: {}
+    try:
+        baseline = run(args.users, args.opening, args.volunteer)
+    finally:
+        question_planner.plan, question_planner.derive = plan, derive
+
+    print(f"{'strategy':>10} {'done':>5} {'turns/report':>13} {'p90 turns':>10} {'LLM calls/report':>17}")
+    for name, r in (("fixed", baseline), ("planner", planned)):
+        turns = sorted(r["turns"]) or [0]
+        print(f"{name:>10} {r['completed']:>5} {statistics.mean(turns):>13.2f} "
+              f"{turns[int(0.9 * (len(turns) - 1))]:>10} {statistics.mean(r['calls'] or [0]):>17.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+In-memory stand-in for the gspread worksheet, shared by the benchmarks.
+
+Implements the two calls shared_utils makes (append_row / append_rows) and
+returns the same "updates.updatedRange" shape as the Sheets API, so
+first_row_of and the local indexes behave as in production.
+"""
+import threading
+import time
+
+import mock_llm  # noqa: F401  (puts the repo root on sys.path)
+import shared_utils as utils
+
+class FakeWorksheet:
+    def __init__(self, latency=0.0):
+        self.rows = [list(utils.COMPLAINT_FIELDS + utils.FEEDBACK_FIELDS)]  # header
+        self.latency = latency
+        self._lock = threading.Lock()
+
+    def append_rows(self, rows, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            first = len(self.rows) + 1
+            self.rows.extend(rows)
+            last = len(self.rows)
+        return {"updates": {"updatedRange": f"Sheet1!A{first}:AA{last}", "updatedRows": len(rows)}}
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row], **kwargs)
+
+_SHEET = None
+
+def install(latency=0.0):
+    """Route shared_utils.get_worksheet to one process-wide fake sheet."""
+    global _SHEET
+    if _SHEET is None:
+        _SHEET = FakeWorksheet(latency)
+    utils.get_worksheet = lambda: _SHEET
+    return _SHEET
@@ -0,0 +1,33 @@
+"""
+Entry script for load_server.py, run with `streamlit run`: installs the mock
+LLM and fake sheet (settings from the environment), then runs the real app.py.
+
+With LOAD_STATS_FILE set, each session appends one JSON line when it reaches
+a success page: its session state size and this process's llm_json stats.
+"""
+import json
+import os
+import runpy
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_sheet
+import mock_llm
+
+import streamlit as st
+
+mock_llm.install(float(os.environ.get("LOAD_LLM_LATENCY", 0.02)),
+                 float(os.environ.get("LOAD_LLM_CPU_MS", 1.0)))
+fake_sheet.install()
+runpy.run_path(os.path.join(mock_llm.ROOT, "app.py"), run_name="__main__")
+
+_stats_file = os.environ.get("LOAD_STATS_FILE")
+if _stats_file and "SUCCESS" in (st.session_state.get("page"), st.session_state.get("fb_page")) \
+        and not st.session_state.get("load_stats_written"):
+    import llm_json
+    from conversation_memory import session_state_bytes
+
+    st.session_state.load_stats_written = True
+    line = {"state_bytes": session_state_bytes(st.session_state.to_dict())[0], "llm_json": llm_json.stats()}
+    with open(_stats_file, "a") as f:
+        f.write(json.dumps(line) + "\n")
@@ -0,0 +1,266 @@
+"""
+Concurrent-session load harness for app.py, against one real server.
+
+Starts a single `streamlit run` process on load_app.py (the real app.py with
+the mock LLM from mock_llm.py and the in-memory sheet from fake_sheet.py)
+and drives every simulated user as its own browser-like websocket session
+against it, so all sessions share one process: one GIL, one set of local
+stores (sessions, dedup index, analytics) and one Streamlit runtime, as in
+production. The client speaks Streamlit's own protocol (BackMsg /
+ForwardMsg protobufs over /_stcore/stream): each user picks a mode in the
+sidebar, sends a scripted conversation through complaint_bot.run /
+feedback_bot.run and submits, resending the widget states a browser would.
+
+For each concurrency level (number of sessions connected at once) it reports:
+- per-interaction latency (p50 / p95 / max): from sending the widget change
+  until the last script run it triggered finished, the time a user waits
+- session state size per user (pickled, reported by load_app.py) and server
+  RSS growth and CPU time per completed user
+- throughput in completed reports per minute (server start-up and the
+  app's first import excluded)
+
+    python benchmarks/load_server.py --users 200 --concurrency 1 8 32 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+import mock_llm  # first: puts the repo root on sys.path
+import llm_json
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_app.py")
+START_TIMEOUT_S = 60
+
+MODES = {
+    "COMPLAINT": ("Report Safety Issue", "Submit Safety Report"),
+    "FEEDBACK": ("Provide Feedback", "Submit Feedback"),
+}
+
+# --- SERVER ---
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(port, data_dir, stats_file, latency, cpu_ms):
+    """Launch `streamlit run load_app.py` and wait until it answers its health check."""
+    env = {**os.environ, "COMPLAINT_BOT_DATA_DIR": data_dir, "LOAD_STATS_FILE": stats_file,
+           "LOAD_LLM_LATENCY": str(latency), "LOAD_LLM_CPU_MS": str(cpu_ms)}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_SCRIPT, "--server.headless=true",
+         f"--server.port={port}", "--server.address=127.0.0.1", "--server.fileWatcherType=none",
+         "--browser.gatherUsageStats=false"],
+        env=env, cwd=mock_llm.ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + START_TIMEOUT_S
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited: {proc.stderr.read().decode()[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as r:
+                if r.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+def server_usage(pid):
+    """(RSS bytes, CPU seconds) of the server process."""
+    with open(f"/proc/{pid}/statm") as f:
+        rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return rss, cpu
+
+# --- ONE USER ---
+class BrowserSession:
+    """One websocket session, sending what the Streamlit frontend would."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.query_string = ""
+        self.widgets = {}     # widget id -> WidgetState the frontend keeps resending
+        self.elements = {}    # delta path -> Element, for the last script run
+
+    async def rerun(self, trigger=None):
+        """Rerun with the current widget states (plus a one-shot trigger); returns seconds waited."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = self.query_string
+        msg.rerun_script.widget_states.widgets.extend(self.widgets.values())
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.append(trigger)
+        started = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        await self._until_finished()
+        return time.perf_counter() - started
+
+    async def _until_finished(self):
+        """Read ForwardMsgs until a script run ends without an st.rerun() chained to it."""
+        while True:
+            fwd = ForwardMsg()
+            fwd.ParseFromString(await self.ws.recv())
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.elements = {}
+            elif kind == "page_info_changed":
+                self.query_string = fwd.page_info_changed.query_string
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                if element.WhichOneof("type") == "exception":
+                    raise RuntimeError(element.exception.message)
+                self.elements[tuple(fwd.metadata.delta_path)] = element
+            elif kind == "script_finished":
+                if fwd.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    return
+
+    def find(self, kind, label=None):
+        """Proto of the first element of this type (whose label contains `label`), or None."""
+        for path in sorted(self.elements):
+            element = self.elements[path]
+            if element.WhichOneof("type") == kind:
+                proto = getattr(element, kind)
+                if label is None or label in getattr(proto, "label", ""):
+                    return proto
+        return None
+
+    def set_value(self, widget, **value):
+        self.widgets[widget.id] = WidgetState(id=widget.id, **value)
+
+async def simulate_user(url, user_id, flow):
+    """Run one scripted session. Returns {"timings", "completed"}."""
+    label, submit_label = MODES[flow]
+    script = mock_llm.complaint_script(user_id) if flow == "COMPLAINT" else mock_llm.FEEDBACK_SCRIPT
+    timings = []
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        session = BrowserSession(ws)
+        # The first run is the page load, not a rerun the user waits on
+        await session.rerun()
+        mode = session.find("radio")
+        session.set_value(mode, string_value=label)
+        timings.append(await session.rerun())
+
+        for message in script:
+            chat = session.find("chat_input")
+            if chat is None:  # flow already moved on to review
+                break
+            trigger = WidgetState(id=chat.id)
+            trigger.chat_input_value.data = message
+            timings.append(await session.rerun(trigger))
+
+        submit = session.find("button", submit_label)
+        if submit is not None:
+            timings.append(await session.rerun(WidgetState(id=submit.id, trigger_value=True)))
+        return {"timings": timings, "completed": session.find("balloons") is not None}
+
+async def warm_up(url):
+    """Load the page once, so the app's first imports aren't charged to the first level."""
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        await BrowserSession(ws).rerun()
+
+async def _job(url, user_id, flow, slots):
+    async with slots:
+        try:
+            return await simulate_user(url, user_id, flow)
+        except Exception as e:
+            print(f"user {user_id} ({flow}) failed: {e}", file=sys.stderr)
+            return None
+
+# --- ONE LEVEL ---
+async def run_level(url, pid, concurrency, users, feedback_every, offset=0):
+    flows = ["FEEDBACK" if feedback_every and n % feedback_every == 0 else "COMPLAINT"
+             for n in range(users)]
+    slots = asyncio.Semaphore(concurrency)
+    rss_before, cpu_before = server_usage(pid)
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*[_job(url, offset + n, flow, slots) for n, flow in enumerate(flows)])
+    elapsed = time.perf_counter() - started
+    rss_after, cpu_after = server_usage(pid)
+
+    results = [r for r in outcomes if r is not None]
+    reruns = sorted(t for r in results for t in r["timings"]) or [0.0]
+    completed = sum(r["completed"] for r in results)
+    return {
+        "concurrency": concurrency,
+        "users": users,
+        "completed": completed,
+        "failed": len(outcomes) - len(results),
+        "reports_per_min": completed / elapsed * 60,
+        "rerun_p50_ms": statistics.median(reruns) * 1000,
+        "rerun_p95_ms": reruns[int(0.95 * (len(reruns) - 1))] * 1000,
+        "rerun_max_ms": reruns[-1] * 1000,
+        "rss_kb": max(0, rss_after - rss_before) / max(1, completed) / 1024,
+        "cpu_ms": (cpu_after - cpu_before) / max(1, completed) * 1000,
+    }
+
+def read_stats(stats_file):
+    """Per-session state sizes and the server's latest llm_json stats, from load_app.py."""
+    sizes, parse_stats = [], {}
+    if os.path.exists(stats_file):
+        with open(stats_file) as f:
+            for line in f:
+                entry = json.loads(line)
+                sizes.append(entry["state_bytes"])
+                parse_stats = entry["llm_json"]
+    return sizes, parse_stats
+
+async def run(args, url, pid, stats_file):
+    print(f"{'conc':>5} {'users':>6} {'done':>5} {'fail':>5} {'reports/min':>12} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'max ms':>8} {'state KB':>9} {'RSS KB':>8} {'CPU ms':>8}")
+    await warm_up(url)
+    seen = 0
+    for level, concurrency in enumerate(args.concurrency):
+        r = await run_level(url, pid, concurrency, args.users, args.feedback_every, offset=level * args.users)
+        sizes = read_stats(stats_file)[0][seen:]
+        seen += len(sizes)
+        print(f"{r['concurrency']:>5} {r['users']:>6} {r['completed']:>5} {r['failed']:>5} {r['reports_per_min']:>12.1f} "
+              f"{r['rerun_p50_ms']:>8.1f} {r['rerun_p95_ms']:>8.1f} {r['rerun_max_ms']:>8.1f} "
+              f"{statistics.mean(sizes or [0]) / 1024:>9.1f} {r['rss_kb']:>8.1f} {r['cpu_ms']:>8.1f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load harness for one app.py server.")
+    parser.add_argument("--users", type=int, default=200, help="Simulated users per level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--feedback-every", type=int, default=5,
+                        help="Every Nth user leaves feedback instead of a complaint (0 = never)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock LLM latency per call (s)")
+    parser.add_argument("--cpu-ms", type=float, default=1.0, help="Mock LLM CPU per call (ms)")
+    parser.add_argument("--port", type=int, help="Server port (default: a free one)")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="complaint-bot-load-")
+    stats_file = os.path.join(data_dir, "load_stats.jsonl")
+    port = args.port or _free_port()
+    print(f"data dir: {data_dir}")
+    server = start_server(port, data_dir, stats_file, args.latency, args.cpu_ms)
+    try:
+        asyncio.run(run(args, f"ws://127.0.0.1:{port}/_stcore/stream", server.pid, stats_file))
+    finally:
+        server.terminate()
+        server.wait(10)
+
+    parse_stats = read_stats(stats_file)[1]
+    for site, counts in sorted(parse_stats.items()):
+        counts = Counter({k: counts.get(k, 0) for k in llm_json.OUTCOMES})
+        rate = counts["failed"] / max(1, sum(counts.values()))
+        print(f"LLM JSON parse [{site}]: " + ", ".join(f"{k}={counts[k]}" for k in llm_json.OUTCOMES)
+              + f", failure_rate={rate:.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Deterministic stand-in for shared_utils.query_llm, shared by the benchmarks.
+
+- Extraction prompts: parses "Field: value" pairs (separated by ";" or
+  newlines) out of the user message and returns them as JSON.
+- Validation prompts: accepts the value as-is.
+- Everything else: a short reply naming the fields the prompt asks about
+  ("Could you tell me: Make, VIN?"), so simulated users know what to answer.
+
+Each call sleeps `latency` seconds (network/model time, releases the CPU) and
+then burns `cpu_ms` of CPU (prompt building / parsing work).
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import shared_utils as utils
+
+_PAIR = re.compile(r"([A-Za-z_]+)\s*:\s*([^;\n]+)")
+
+# A complaint in four messages, grouped the way people usually answer
+COMPLAINT_SCRIPT = [
+    "Make: Toyota; Model: Camry; Model_Year: 2019; VIN: 4T1B11HK5KU123456; Mileage: 42000",
+    "City: Austin; State: TX; Date_Complaint: 2024-05-02; Speed: 45",
+    "Crash: NO; Fire: NO; Injured: 0; Deaths: 0; Component: Brakes",
+    "Description: Brake pedal went soft and the car barely slowed at a light; "
+    "Technician_Notes: Master cylinder leaking; Brake_Condition: Worn; Engine_Temperature: Normal",
+]
+
+_VIN_CHARS = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+_VIN_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+_VEHICLES = [("Toyota", "Camry", "4T1"), ("Honda", "Civic", "2HG"), ("Ford", "F-150", "1FT"),
+             ("Tesla", "Model 3", "5YJ"), ("Chevrolet", "Malibu", "1G1"), ("Subaru", "Outback", "4S4"),
+             ("Nissan", "Altima", "1N4")]
+_PLACES = [("Austin", "TX"), ("Denver", "CO"), ("Columbus", "OH"), ("Fresno", "CA"), ("Tampa", "FL")]
+_COMPONENTS = ["Brakes", "Steering", "Airbags", "Engine", "Electrical", "Transmission"]
+_WORDS = ("pedal wheel noise grinding warning light dashboard shook stalled highway merge "
+          "rain parking lot dealer recall smoke smell vibration pulled left right suddenly "
+          "stopped accelerate reverse garage morning night traffic signal").split()
+
+# How complaint_script splits a record into messages
+SCRIPT_GROUPS = [
+    ["Make", "Model", "Model_Year", "VIN", "Mileage"],
+    ["City", "State", "Date_Complaint", "Speed"],
+    ["Crash", "Fire", "Injured", "Deaths", "Component"],
+    ["Description", "Technician_Notes", "Brake_Condition", "Engine_Temperature"],
+]
+
+def make_vin(rng, wmi, year):
+    """Random VIN with the given manufacturer prefix, model year and a valid check digit."""
+    import risk_scoring
+    body = "".join(rng.choice(_VIN_CHARS) for _ in range(5))
+    tail = _VIN_YEAR_CODES[(year - 1980) % 30] + "".join(rng.choice(_VIN_CHARS) for _ in range(7))
+    return next(vin for vin in (wmi + body + c + tail for c in "0123456789X")
+                if risk_scoring.vin_is_valid(vin))
+
+def complaint_record(seed):
+    """A complete, plausible complaint record (the simulated user's ground truth)."""
+    rng = random.Random(seed)
+    make, model, wmi = rng.choice(_VEHICLES)
+    city, state = rng.choice(_PLACES)
+    year = rng.randint(2008, 2024)
+    crash = rng.random() < 0.2
+    fire = rng.random() < 0.05
+    hurt = crash or fire
+    return {
+        "Make": make, "Model": model, "Model_Year": str(year), "VIN": make_vin(rng, wmi, year),
+        "Mileage": str(rng.randint(1000, 150000)), "City": city, "State": state,
+        "Date_Complaint": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "Speed": str(rng.randint(0, 80)), "Crash": "YES" if crash else "NO", "Fire": "YES" if fire else "NO",
+        "Injured": str(rng.randint(0, 3) if hurt else 0), "Deaths": "0",
+        "Component": rng.choice(_COMPONENTS),
+        "Description": " ".join(rng.choice(_WORDS) for _ in range(14)),
+        "Technician_Notes": rng.choice(["none yet", "unknown", "dealer inspected, no fault found"]),
+        "Brake_Condition": rng.choice(["Normal", "Worn", "unknown"]),
+        "Engine_Temperature": rng.choice(["Normal", "unknown"]),
+    }
+
+def say(record, fields):
+    """A user message stating the given fields in the mock's "Field: value" form."""
+    return "; ".join(f"{f}: {record[f]}" for f in fields if f in record)
+
+def complaint_script(seed):
+    """COMPLAINT_SCRIPT with per-user values, so reports don't trip the duplicate check."""
+    record = complaint_record(seed)
+    return [say(record, fields) for fields in SCRIPT_GROUPS]
+
+FEEDBACK_SCRIPT = [
+    "hello there",
+    "The website navigation is confusing when I try to find my old reports",
+]
+
+def _burn(cpu_ms):
+    deadline = time.perf_counter() + cpu_ms / 1000
+    while time.perf_counter() < deadline:
+        pass
+
+def _asked_fields(system):
+    """Field names on the prompt line that says what to ask for (or what to fix)."""
+    for marker in ("Next fields to ask:", "missing field:", "Errors:"):
+        if marker in system:
+            tail = system.split(marker, 1)[1]
+            line = tail.strip().split("\n", 1)[0]
+            return [f for f in re.findall(r"'(\w+)'", line) if f in utils.COMPLAINT_FIELDS]
+    return []
+
+def make_query_llm(latency=0.02, cpu_ms=1.0):
+    def query_llm(messages, max_tokens=150, temperature=0.7, json_mode=False):
+        if latency:
+            time.sleep(latency)
+        if cpu_ms:
+            _burn(cpu_ms)
+        system = messages[0]["content"]
+        if "data extraction assistant" in system:
+            text = messages[-1]["content"]
+            return json.dumps({k: v.strip() for k, v in _PAIR.findall(text)
+                               if k in utils.COMPLAINT_FIELDS})
+        if "data validator" in system:
+            value = system.split("'")[1]
+            return json.dumps({"is_valid": True, "clean_value": value, "error_msg": None})
+        asked = _asked_fields(system)
+        if asked:
+            return f"Thanks! Could you tell me: {', '.join(asked)}?"
+        return "Thanks! Could you tell me a bit more?"
+    return query_llm
+
+def install(latency=0.02, cpu_ms=1.0):
+    """Patch shared_utils in this process: mock LLM, instant text streaming."""
+    utils.query_llm = make_query_llm(latency, cpu_ms)
+    utils.stream_text = lambda text: iter([text])
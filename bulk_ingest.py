@@ -0,0 +1,247 @@
+"""
+Offline bulk ingestion for legacy free-text complaint backlogs.
+
+Streams CSV/JSONL records through the same extraction and validation used by
+the chat flow, writes accepted reports to the sheet in batches and rejected
+ones to a JSONL reject file. Progress is checkpointed so a run can resume;
+records whose LLM call failed in transport (network, HTTP errors) are left
+out of the checkpoint, so the resumed run retries them.
+
+Usage:
+    python bulk_ingest.py backlog.csv --text-field complaint --concurrency 8
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+
+import shared_utils as utils
+import dedup_index
+import llm_json
+
+DEFAULT_REQUIRED = ["Make", "Model", "Description"]
+
+# --- INPUT ---
+def iter_records(path, fmt=None):
+    """Yield (index, dict) pairs from a CSV or JSONL file without loading it whole."""
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for index, row in enumerate(csv.DictReader(f)):
+                yield index, row
+        else:
+            for index, line in enumerate(f):
+                line = line.strip()
+                if line:
+                    yield index, json.loads(line)
+
+# --- CHECKPOINT ---
+def load_checkpoint(path):
+    """Return the set of record indices already written or rejected."""
+    done = set()
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    done.add(int(line))
+    return done
+
+def append_checkpoint(handle, indices):
+    handle.write("".join(f"{i}\n" for i in indices))
+    handle.flush()
+    os.fsync(handle.fileno())
+
+# --- PROCESSING ---
+def process_record(raw, text_field, required):
+    """
+    Run one raw record through extraction + validation.
+    Returns (record, errors); errors is empty when the record is accepted.
+    """
+    text = str(raw.get(text_field) or "").strip()
+    remaining = [f for f in utils.COMPLAINT_FIELDS if f not in utils.AUTOMATED_FIELDS]
+
+    # Structured columns already present in the file win over LLM guesses
+    preset = {k: v for k, v in raw.items()
+              if k in remaining and v not in (None, "")}
+
+    # Relative dates ("3 weeks ago") count from when the complaint was written
+    anchor = raw.get("Timestamp") or None
+
+    extracted = {}
+    if text:
+        extracted = utils.extract_all_fields_from_text(text, remaining, {}, anchor, strict=True)
+    if not isinstance(extracted, dict):
+        extracted = {}
+    extracted.update(preset)
+
+    record = {field: None for field in utils.COMPLAINT_FIELDS}
+    errors = {}
+    locked = set()
+    for field, value in extracted.items():
+        if field not in remaining or value in (None, ""):
+            continue
+        is_valid, clean_value, error_msg = utils.validate_field(field, value, locked, record, anchor)
+        if is_valid:
+            record[field] = clean_value
+        else:
+            errors[field] = error_msg or "invalid value"
+
+    if not record["Description"] and text:
+        record["Description"] = text
+
+    for field in required:
+        if not record.get(field) and field not in errors:
+            errors[field] = "missing"
+
+    if not errors:
+        # The source timestamp is kept: it is when the complaint was actually made
+        source_time = source_timestamp(anchor)
+        if source_time:
+            record["Timestamp"] = source_time
+        utils.finalize_complaint_record(record)
+    return record, errors
+
+def source_timestamp(value):
+    """A backlog row's Timestamp as 'YYYY-MM-DD HH:MM:SS', or None if missing or unreadable."""
+    try:
+        return datetime.fromisoformat(str(value).strip()).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+# --- PIPELINE ---
+def run(path, text_field="text", fmt=None, concurrency=4, batch_size=100,
+        checkpoint_path=None, rejects_path=None, required=None, sheet=None):
+    """Ingest a backlog file. Returns a stats dict."""
+    required = DEFAULT_REQUIRED if required is None else required
+    base = os.path.basename(path)
+    if checkpoint_path is None:
+        os.makedirs(utils.DATA_DIR, exist_ok=True)
+        checkpoint_path = os.path.join(utils.DATA_DIR, f"bulk_{base}.ckpt")
+    rejects_path = rejects_path or f"{path}.rejects.jsonl"
+
+    done = load_checkpoint(checkpoint_path)
+    stats = {"accepted": 0, "rejected": 0, "skipped": len(done), "failed_writes": 0, "unavailable": 0}
+    pending_rows = []
+    pending_indices = []
+    # Rows waiting for the next write aren't in the shared index yet
+    pending_dups = dedup_index.DuplicateIndex()
+    started = time.perf_counter()
+
+    ckpt = open(checkpoint_path, "a")
+    rejects = open(rejects_path, "a", encoding="utf-8")
+
+    def flush():
+        nonlocal pending_dups
+        if not pending_rows:
+            return
+        if utils.save_rows_to_sheet(pending_rows, "COMPLAINT", sheet=sheet):
+            append_checkpoint(ckpt, pending_indices)
+            stats["accepted"] += len(pending_rows)
+        else:
+            # Leave these out of the checkpoint so a rerun retries them
+            stats["failed_writes"] += len(pending_rows)
+        pending_rows.clear()
+        pending_indices.clear()
+        pending_dups = dedup_index.DuplicateIndex()
+
+    def handle_result(index, raw, future):
+        try:
+            record, errors = future.result()
+        except utils.LLMUnavailable as e:
+            # Not the record's fault: no checkpoint, no reject, a rerun retries it
+            print(f"LLM unavailable for record {index}: {e}", file=sys.stderr)
+            stats["unavailable"] += 1
+            return
+        except Exception as e:
+            record, errors = None, {"_error": str(e)}
+
+        if not errors:
+            match = dedup_index.get_index().check(record) or pending_dups.check(record)
+            if match:
+                errors = {"_duplicate": dedup_index.describe_match(match)}
+
+        if errors:
+            rejects.write(json.dumps({"index": index, "errors": errors, "input": raw}) + "\n")
+            rejects.flush()
+            append_checkpoint(ckpt, [index])
+            stats["rejected"] += 1
+        else:
+            pending_rows.append(record)
+            pending_indices.append(index)
+            pending_dups.add(record)
+            if len(pending_rows) >= batch_size:
+                flush()
+
+        handled = (stats["accepted"] + stats["rejected"] + stats["failed_writes"] + stats["unavailable"]
+                   + len(pending_rows))
+        if handled % 100 == 0:
+            report_progress(stats, handled, started)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            in_flight = {}
+            for index, raw in iter_records(path, fmt):
+                if index in done:
+                    continue
+                # Bound the number of outstanding LLM calls (and buffered input)
+                if len(in_flight) >= concurrency * 2:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        handle_result(*in_flight.pop(future), future)
+                future = pool.submit(process_record, raw, text_field, required)
+                in_flight[future] = (index, raw)
+
+            for future in list(in_flight):
+                handle_result(*in_flight.pop(future), future)
+        flush()
+    finally:
+        ckpt.close()
+        rejects.close()
+
+    elapsed = time.perf_counter() - started
+    processed = stats["accepted"] + stats["rejected"] + stats["failed_writes"] + stats["unavailable"]
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["records_per_s"] = round(processed / elapsed, 2) if elapsed > 0 else 0.0
+    stats["llm_json"] = llm_json.stats()
+    return stats
+
+def report_progress(stats, processed, started):
+    elapsed = time.perf_counter() - started
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"{processed} records | {stats['accepted']} accepted | "
+          f"{stats['rejected']} rejected | {rate:.1f} rec/s", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest free-text complaints into the report sheet.")
+    parser.add_argument("input", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: by extension)")
+    parser.add_argument("--text-field", default="text", help="column holding the free-text complaint")
+    parser.add_argument("--concurrency", type=int, default=4, help="max concurrent LLM requests")
+    parser.add_argument("--batch-size", type=int, default=100, help="rows per sheet write")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: DATA_DIR/bulk_<input>.ckpt)")
+    parser.add_argument("--rejects", help="reject file (default: <input>.rejects.jsonl)")
+    parser.add_argument("--require", default=",".join(DEFAULT_REQUIRED),
+                        help="comma-separated fields a record must have to be accepted")
+    args = parser.parse_args(argv)
+
+    required = [f.strip() for f in args.require.split(",") if f.strip()]
+    stats = run(
+        args.input,
+        text_field=args.text_field,
+        fmt=args.format,
+        concurrency=max(1, args.concurrency),
+        batch_size=max(1, args.batch_size),
+        checkpoint_path=args.checkpoint,
+        rejects_path=args.rejects,
+        required=required,
+    )
+    print(json.dumps(stats, indent=2))
+    return 0 if stats["failed_writes"] == 0 and stats["unavailable"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Bounded conversation memory for chat sessions.
+
+Recent turns live in a fixed-size ring buffer with a per-session byte cap;
+anything older is dropped and represented by a rolling summary built from the
+structured record (what has been collected, what failed validation) instead
+of raw text or another LLM call.
+
+ConversationMemory behaves like the message list it replaces (append, pop,
+len, iteration, indexing and slicing), so existing page code keeps working.
+"""
+import pickle
+import sys
+from collections import deque
+
+MAX_TURNS = 20                 # messages kept verbatim per session
+MAX_BYTES = 16 * 1024          # cap on verbatim message text per session
+MAX_MESSAGE_CHARS = 2000       # single pasted walls of text are truncated
+SUMMARY_VALUE_CHARS = 60       # per-field cap inside the rolling summary
+CONTEXT_TURNS = 3              # recent messages sent verbatim with each prompt
+CONTEXT_BYTES = 4 * 1024       # cap on that verbatim text
+
+class ConversationMemory:
+    """Ring buffer of recent {"role", "content"} messages plus eviction stats."""
+
+    def __init__(self, messages=None, max_turns=MAX_TURNS, max_bytes=MAX_BYTES):
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self._turns = deque()
+        self.nbytes = 0
+        self.dropped = 0
+        for msg in messages or []:
+            self.append(msg)
+
+    # --- list-like API ---
+    def append(self, msg):
+        content = str(msg.get("content", ""))
+        if len(content) > MAX_MESSAGE_CHARS:
+            content = content[:MAX_MESSAGE_CHARS] + " …"
+        msg = {"role": msg.get("role", "user"), "content": content}
+        self._turns.append(msg)
+        self.nbytes += len(content.encode())
+        self._evict()
+
+    def pop(self):
+        msg = self._turns.pop()
+        self.nbytes -= len(msg["content"].encode())
+        return msg
+
+    def __len__(self):
+        return len(self._turns)
+
+    def __iter__(self):
+        return iter(self._turns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._turns)[index]
+        return self._turns[index]
+
+    def _evict(self):
+        # Always keep the newest message, even if it alone exceeds the cap
+        while len(self._turns) > 1 and (
+            len(self._turns) > self.max_turns or self.nbytes > self.max_bytes
+        ):
+            old = self._turns.popleft()
+            self.nbytes -= len(old["content"].encode())
+            self.dropped += 1
+
+    # --- prompt context ---
+    def summarize(self, record, attempt_counts=None):
+        """Rolling summary of the session, counting the turns this buffer dropped."""
+        return summarize(record, attempt_counts, self.dropped)
+
+    def context(self, max_turns=CONTEXT_TURNS, max_bytes=CONTEXT_BYTES):
+        """The newest messages (oldest first) that fit in max_turns and max_bytes."""
+        recent, used = [], 0
+        for msg in reversed(self._turns):
+            size = len(msg["content"].encode())
+            if len(recent) >= max_turns or (recent and used + size > max_bytes):
+                break
+            recent.append(msg)
+            used += size
+        return recent[::-1]
+
+    # --- serialization ---
+    def to_dict(self):
+        return {"turns": list(self._turns), "dropped": self.dropped}
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        memory = cls(data.get("turns"), **kwargs)
+        memory.dropped += data.get("dropped", 0)
+        return memory
+
+def summarize_record(record):
+    """Compact 'Field=value; ...' string of the collected (non-empty) fields."""
+    parts = []
+    for field, value in (record or {}).items():
+        if value is None or value == "":
+            continue
+        value = str(value)
+        if len(value) > SUMMARY_VALUE_CHARS:
+            value = value[:SUMMARY_VALUE_CHARS] + "…"
+        parts.append(f"{field}={value}")
+    return "; ".join(parts)
+
+def summarize(record, attempt_counts=None, dropped=0):
+    """Rolling summary of the conversation so far, derived from structured state."""
+    lines = []
+    collected = summarize_record(record)
+    if collected:
+        lines.append(f"- Collected so far: {collected}")
+    retries = [f for f, n in (attempt_counts or {}).items() if n]
+    if retries:
+        lines.append(f"- User has had trouble with: {', '.join(retries)}")
+    if dropped:
+        lines.append(f"- {dropped} earlier messages omitted; rely on the collected fields above")
+    return "\n".join(lines)
+
+def session_state_bytes(state):
+    """
+    Approximate memory held by a session state mapping.
+    Returns (total_bytes, {key: bytes}) using pickled size where possible.
+    """
+    sizes = {}
+    for key in list(state.keys()):
+        value = state[key]
+        try:
+            sizes[key] = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            sizes[key] = sys.getsizeof(value)
+    return sum(sizes.values()), sizes
@@ -0,0 +1,264 @@
+"""
+Deterministic Date_Complaint normalization, no LLM.
+
+Turns what people actually type into YYYY-MM-DD, relative to an anchor (the
+time the chat session started, or the submission time of a backlog record):
+- absolute: 2024-05-02, 5/2/2024, 5/2, Jan 5th, January 5, 2024, 5th of May
+- relative: today, yesterday, the day before yesterday, 3 weeks ago,
+  a couple of days ago, last week, last Tuesday, on Friday
+
+find_date() scores every candidate in the text rather than taking the first:
+- a phrase in a clause about the event ("it happened 3 weeks ago") beats one
+  about the report ("reporting this today")
+- then the more specific phrase wins (a full date over "last week"), then
+  the earlier one
+- bare number and month-word matches need date context: "10/20 mph",
+  "I may 2 times", "I drove 3 mar" and "24/7" are not dates
+
+normalize() also rejects dates after the anchor and dates before the
+vehicle could have existed (earlier than Model_Year - 1, since a model year
+goes on sale the year before).
+
+    python date_normalizer.py "last tuesday" "3 weeks ago" --anchor 2024-05-10
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "a couple of": 2, "a couple": 2, "couple of": 2, "a few": 3, "few": 3,
+}
+# Words that may surround a date in an answer like "it happened last Tuesday"
+FILLER = {"it", "was", "happened", "on", "around", "about", "approximately", "roughly", "the",
+          "this", "that", "i", "think", "maybe", "probably", "date", "day", "in", "at", "of"}
+# Words just before a date in the same clause that say which date it is
+EVENT_CUES = {"happened", "occurred", "crashed", "failed", "broke", "started", "began", "stalled",
+              "incident", "accident", "crash", "when", "since"}
+REPORT_CUES = {"reporting", "report", "writing", "filing", "submitting", "calling", "contacting", "now"}
+# Words before a month-word date that make it a date ("on may 2", not "i may 2 times")
+DATE_CONTEXT = EVENT_CUES | {"on", "around", "about", "approximately", "roughly", "by", "from", "until",
+                             "till", "before", "after", "early", "late", "mid", "date", "of", "was"}
+# Words after a number pair that make it a measurement or count, not a date ("10/20 mph")
+UNITS = {"mph", "kph", "kmh", "km", "miles", "mile", "mi", "psi", "rpm", "percent", "times", "hours",
+         "hrs", "minutes", "mins", "seconds", "feet", "ft", "degrees", "people", "cars", "of"}
+# Month words that are also ordinary words or names
+AMBIGUOUS_MONTHS = {"may", "mar", "march", "jan", "dec", "sep", "sept", "jun", "aug"}
+
+_MONTH = (r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+          r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?")
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+_YEAR = r"(?:,?\s+(\d{4}))?"
+_NUMBER = "|".join(sorted((re.escape(w) for w in NUMBER_WORDS), key=len, reverse=True))
+
+# --- ANCHOR ---
+def anchor_date(anchor=None):
+    """date for an anchor given as datetime, date, epoch seconds, ISO string or None (today)."""
+    if anchor is None or anchor == "":
+        return date.today()
+    if isinstance(anchor, datetime):
+        return anchor.date()
+    if isinstance(anchor, date):
+        return anchor
+    if isinstance(anchor, (int, float)):
+        return datetime.fromtimestamp(anchor).date()
+    try:
+        return datetime.fromisoformat(str(anchor).strip()[:19]).date()
+    except ValueError:
+        return date.today()
+
+# --- PHRASE HANDLERS ---
+def _safe_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def _year(text, today):
+    year = int(text)
+    if year < 100:
+        year += 2000 if year <= today.year % 100 + 1 else 1900
+    return year
+
+def _recent(month, day, today):
+    """Month/day without a year: the most recent one not after today."""
+    d = _safe_date(today.year, month, day)
+    if d and d > today:
+        d = _safe_date(today.year - 1, month, day)
+    return d
+
+def _iso(m, today):
+    return _safe_date(int(m[1]), int(m[2]), int(m[3]))
+
+def _numeric(m, today):
+    # US order: month/day[/year]
+    month, day = int(m[1]), int(m[2])
+    if m[3]:
+        return _safe_date(_year(m[3], today), month, day)
+    return _recent(month, day, today)
+
+def _month_day(m, today):
+    month, day = MONTHS[m[1][:3]], int(m[2])
+    return _safe_date(int(m[3]), month, day) if m[3] else _recent(month, day, today)
+
+def _day_month(m, today):
+    day, month = int(m[1]), MONTHS[m[2][:3]]
+    return _safe_date(int(m[3]), month, day) if m[3] else _recent(month, day, today)
+
+def _before_yesterday(m, today):
+    return today - timedelta(days=2)
+
+def _named_day(m, today):
+    word = m[1]
+    return today - timedelta(days=1) if word in ("yesterday", "last night") else today
+
+def _shift_months(d, months):
+    month = d.month - 1 - months
+    year, month = d.year + month // 12, month % 12 + 1
+    for day in (d.day, 30, 29, 28):
+        shifted = _safe_date(year, month, day)
+        if shifted:
+            return shifted
+
+def _ago(m, today):
+    n = int(m[1]) if m[1].isdigit() else NUMBER_WORDS[m[1]]
+    unit = m[2]
+    if unit == "day":
+        return today - timedelta(days=n)
+    if unit == "week":
+        return today - timedelta(weeks=n)
+    return _shift_months(today, n if unit == "month" else 12 * n)
+
+def _last_week(m, today):
+    return today - timedelta(weeks=1)
+
+def _weekday(m, today):
+    back = (today.weekday() - WEEKDAYS.index(m[2])) % 7
+    # "last Tuesday" on a Tuesday means a week ago; a bare "Tuesday" means today
+    if back == 0 and m[1] in ("last", "past"):
+        back = 7
+    return today - timedelta(days=back)
+
+# (pattern, handler, specificity); every match is a candidate, see find_date.
+# Numeric and month-word dates with a year count one more
+_PATTERNS = [
+    (re.compile(r"\b(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\b"), _iso, 4),
+    (re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{4}|\d{2}))?\b"), _numeric, 3),
+    # Dashes only with a year, so ranges like "60-70" aren't dates
+    (re.compile(r"\b(\d{1,2})-(\d{1,2})-(\d{4}|\d{2})\b"), _numeric, 3),
+    (re.compile(rf"\b{_MONTH}\s+{_DAY}\b{_YEAR}"), _month_day, 3),
+    (re.compile(rf"\b{_DAY}\s+(?:of\s+)?{_MONTH}{_YEAR}"), _day_month, 3),
+    (re.compile(r"\b(?:the\s+)?day\s+before\s+yesterday\b"), _before_yesterday, 2),
+    (re.compile(r"\b(today|tonight|this\s+(?:morning|afternoon|evening)|earlier\s+today|yesterday|last\s+night)\b"),
+     _named_day, 1),
+    (re.compile(rf"\b(\d+|{_NUMBER})\s+(day|week|month|year)s?\s+ago\b"), _ago, 2),
+    (re.compile(r"\blast\s+week\b"), _last_week, 1),
+    (re.compile(rf"\b(?:(last|this|past|on)\s+)?({'|'.join(WEEKDAYS)})\b"), _weekday, 1),
+]
+
+# --- PARSING ---
+def _words(text):
+    return re.findall(r"[a-z0-9%]+", text)
+
+def _only_filler(lowered, span):
+    return all(word in FILLER for word in _words(lowered[:span[0]] + " " + lowered[span[1]:]))
+
+def _cue(lowered, start):
+    """+1 if the clause before a match is about the event, -1 if about the report, else 0."""
+    clause = re.split(r"[,.;!?]|\bbut\b|\band\b", lowered[:start])[-1]
+    before = _words(clause)[-4:]
+    if any(word in REPORT_CUES for word in before):
+        return -1
+    return 1 if any(word in EVENT_CUES for word in before) else 0
+
+def _plausible(m, handler, lowered):
+    """False for number and month-word matches that aren't being used as dates."""
+    if handler not in (_numeric, _month_day, _day_month) or m[3]:
+        return True
+    after = _words(lowered[m.end():])[:1]
+    if after and after[0] in UNITS:
+        return False
+    if handler is _numeric:
+        return True
+    month = m[1] if handler is _month_day else m[2]
+    if re.search(r"\d(?:st|nd|rd|th)\b", m.group()) or month.rstrip(".") not in AMBIGUOUS_MONTHS and len(month) > 3:
+        return True
+    before = _words(lowered[:m.start()])[-1:]
+    return bool(before and before[0] in DATE_CONTEXT) or _only_filler(lowered, m.span())
+
+def find_date(text, anchor=None):
+    """
+    Best date phrase in free text: event clause first, then the most specific, then the earliest.
+    Returns (date, (start, end)) with the phrase's span, or (None, None).
+    """
+    lowered = str(text or "").lower()
+    today = anchor_date(anchor)
+    best, best_rank = (None, None), None
+    for pattern, handler, specificity in _PATTERNS:
+        for m in pattern.finditer(lowered):
+            found = handler(m, today)
+            if not found or not _plausible(m, handler, lowered):
+                continue
+            with_year = handler in (_numeric, _month_day, _day_month) and bool(m[3])
+            rank = (_cue(lowered, m.start()), specificity + with_year, -m.start())
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (found, m.span()), rank
+    return best
+
+def parse(text, anchor=None):
+    """date for a date phrase, or None."""
+    return find_date(text, anchor)[0]
+
+def only_date(text, anchor=None):
+    """date if the message is just a date phrase (plus filler words), else None."""
+    found, span = find_date(text, anchor)
+    if not found:
+        return None
+    return found if _only_filler(str(text).lower(), span) else None
+
+# --- VALIDATION ---
+def normalize(value, anchor=None, model_year=None):
+    """
+    (YYYY-MM-DD or None, error message or None) for a Date_Complaint value.
+    Rejects unreadable dates, dates after the anchor and dates before the vehicle existed.
+    """
+    today = anchor_date(anchor)
+    return _check(value, parse(value, today), today, model_year)
+
+def _check(value, found, today, model_year):
+    if not found:
+        return None, (f"I couldn't read '{value}' as a date. Could you give it like "
+                      f"2024-05-02, 'May 2nd' or 'about 3 weeks ago'?")
+    if found > today:
+        return None, f"{found.isoformat()} is in the future. When did this happen?"
+    match = re.search(r"\d{4}", str(model_year or ""))
+    if match and found.year < int(match.group()) - 1:
+        return None, (f"{found.isoformat()} is before a {match.group()} vehicle was on the road. "
+                      f"Could you double-check the date?")
+    return found.isoformat(), None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize date phrases to YYYY-MM-DD.")
+    parser.add_argument("phrases", nargs="+")
+    parser.add_argument("--anchor", help="reference date (default: today)")
+    parser.add_argument("--model-year")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = [normalize(phrase, args.anchor, args.model_year) for phrase in args.phrases]
+    elapsed_us = (time.perf_counter() - started) * 1e6 / len(args.phrases)
+    for phrase, (value, error) in zip(args.phrases, results):
+        print(f"{phrase!r:32} -> {value or error}")
+    print(f"{elapsed_us:.0f} us per phrase")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
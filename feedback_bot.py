@@ -1,24 +1,33 @@
 import streamlit as st
-import pandas as pd
 import shared_utils as utils
+import session_store
+import review_editor
+import turn_engine
+import turn_api
 from datetime import datetime
 
+FEEDBACK_GROUPS = [("", "feedback_editor", ["Feedback_Topic", "Feedback_Cause_Help"])]
+
 def run():
+    # Restore server-side state after a refresh/reconnect, persist it after every run
+    session_store.resume("FEEDBACK")
+    try:
+        _render()
+    finally:
+        session_store.save("FEEDBACK")
+
+def _render():
     st.title("🗣️ Share Your Feedback")
 
     # --- INITIALIZATION ---
     if "fb_page" not in st.session_state:
-        st.session_state.fb_page = "CHAT"
-        st.session_state.fb_messages = [
-            {"role": "assistant", "content": "Hey there! We'd love to hear your feedback. What's on your mind today? Feel free to share everything - your experience, suggestions, or any concerns you have! 💭"}
-        ]
-        st.session_state.record = {field: None for field in utils.FEEDBACK_FIELDS}
+        st.session_state.update(turn_engine.new_state("FEEDBACK"))
 
     # --- SIDEBAR ---
     with st.sidebar:
         st.markdown("### Your Feedback")
         filled = len([f for f in utils.FEEDBACK_FIELDS 
-                     if f != "Feedback_Timestamp" and st.session_state.record.get(f)])
+                     if f != "Feedback_Timestamp" and st.session_state.fb_record.get(f)])
         total = len([f for f in utils.FEEDBACK_FIELDS if f != "Feedback_Timestamp"])
         
         if filled > 0:
@@ -35,89 +44,37 @@ def run():
 
     # --- CHAT INTERFACE ---
     if st.session_state.fb_page == "CHAT":
+        if st.session_state.fb_messages.dropped:
+            st.caption(f"🗂️ {st.session_state.fb_messages.dropped} earlier messages were summarized.")
         for msg in st.session_state.fb_messages:
             with st.chat_message(msg["role"]):
                 st.markdown(msg["content"])
 
         if prompt := st.chat_input("Type your feedback here..."):
-            st.session_state.fb_messages.append({"role": "user", "content": prompt})
             with st.chat_message("user"):
                 st.markdown(prompt)
 
-            # --- SMART EXTRACTION ---
-            remaining = [f for f in utils.FEEDBACK_FIELDS 
-                        if f != "Feedback_Timestamp" and st.session_state.record.get(f) is None]
-            
-            # For feedback, we use simpler extraction since there are only 2 main fields
-            extracted = {}
-            
-            # Identify topic keywords
-            if "Feedback_Topic" in remaining:
-                topics = {
-                    "service": ["service", "support", "help", "assistance"],
-                    "product": ["product", "quality", "feature", "functionality"],
-                    "website": ["website", "app", "interface", "navigation", "ui"],
-                    "billing": ["billing", "payment", "charge", "invoice", "price"],
-                    "suggestion": ["suggest", "recommend", "improve", "enhancement", "idea"],
-                    "complaint": ["complaint", "issue", "problem", "concern", "dissatisfied"]
-                }
-                
-                text_lower = prompt.lower()
-                for topic, keywords in topics.items():
-                    if any(kw in text_lower for kw in keywords):
-                        extracted["Feedback_Topic"] = topic.title()
-                        break
-                
-                # If no keyword match but text is substantial, use first few words
-                if "Feedback_Topic" not in extracted and len(prompt.split()) > 3:
-                    first_words = " ".join(prompt.split()[:4])
-                    extracted["Feedback_Topic"] = first_words
-            
-            # If message is detailed, capture as the main feedback
-            if "Feedback_Cause_Help" in remaining and len(prompt) > 20:
-                extracted["Feedback_Cause_Help"] = prompt
-            
-            if extracted:
-                for field, value in extracted.items():
-                    st.session_state.record[field] = value
-                    st.toast(f"✅ Noted: {field}", icon="📝")
-                
-                remaining = [f for f in utils.FEEDBACK_FIELDS 
-                           if f != "Feedback_Timestamp" and st.session_state.record.get(f) is None]
-                
-                if remaining:
-                    with st.spinner("Thinking..."):
-                        ai_reply = utils.generate_ai_response(
-                            st.session_state.fb_messages,
-                            st.session_state.record,
-                            remaining,
-                            "FEEDBACK"
-                        )
-                    
-                    st.session_state.fb_messages.append({"role": "assistant", "content": ai_reply})
-                    with st.chat_message("assistant"):
-                        st.write_stream(utils.stream_text(ai_reply))
+            # --- KEYWORD EXTRACTION AND REPLY (turn_engine / turn API) ---
+            with st.spinner("Thinking..."):
+                if utils.TURN_API_URL:
+                    result = turn_api.remote_turn(st.session_state, "FEEDBACK", prompt)
                 else:
-                    st.session_state.fb_page = "REVIEW"
-                    st.rerun()
-            else:
-                # Small talk or unclear input
-                with st.spinner("..."):
-                    ai_reply = utils.generate_small_talk_response(
-                        st.session_state.fb_messages,
-                        ["your feedback"]
-                    )
-                
-                st.session_state.fb_messages.append({"role": "assistant", "content": ai_reply})
-                with st.chat_message("assistant"):
-                    st.write_stream(utils.stream_text(ai_reply))
+                    result = turn_engine.feedback_turn(st.session_state, prompt)
+
+            for field in result["validated"]:
+                st.toast(f"✅ Noted: {field}", icon="📝")
+
+            if result["reply"] is None:
+                st.rerun()
+            with st.chat_message("assistant"):
+                st.write_stream(utils.stream_text(result["reply"]))
 
     # --- REVIEW PAGE ---
     elif st.session_state.fb_page == "REVIEW":
         st.subheader("✨ Review Your Feedback")
         st.markdown("Take a moment to review what you've shared. You can edit anything below!")
 
-        display_data = {k: v for k, v in st.session_state.record.items() 
+        display_data = {k: v for k, v in st.session_state.fb_record.items() 
                        if v is not None and k != "Feedback_Timestamp"}
         
         if not display_data:
@@ -127,17 +84,8 @@ def run():
                 st.rerun()
             return
         
-        df = pd.DataFrame(list(display_data.items()), columns=["Field", "Value"])
-        
-        edited_df = st.data_editor(
-            df,
-            use_container_width=True,
-            hide_index=True,
-            num_rows="fixed",
-            column_config={
-                "Field": st.column_config.TextColumn(disabled=True, width="medium"),
-                "Value": st.column_config.TextColumn("Your Feedback", width="large")
-            }
+        review_editor.render(
+            st.session_state.fb_record, FEEDBACK_GROUPS, "Your Feedback", cache_key="fb_review_views"
         )
         
         st.markdown("---")
@@ -145,19 +93,24 @@ def run():
         
         with col1:
             if st.button("📤 Submit Feedback", type="primary", use_container_width=True):
-                for index, row in edited_df.iterrows():
-                    st.session_state.record[row["Field"]] = row["Value"]
-                
-                st.session_state.record["Feedback_Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-                with st.spinner("Sending your feedback..."):
-                    success = utils.save_to_sheet(st.session_state.record, "FEEDBACK")
-                
-                if success:
-                    st.session_state.fb_page = "SUCCESS"
-                    st.rerun()
+                edits = review_editor.dirty_fields(
+                    st.session_state.fb_record, FEEDBACK_GROUPS, cache_key="fb_review_views"
+                )
+                clean_edits, edit_errors = review_editor.revalidate(edits)
+                if edit_errors:
+                    st.error(" ".join(edit_errors.values()))
                 else:
-                    st.error("Submission failed. Please try again.")
+                    st.session_state.fb_record.update(clean_edits)
+                    st.session_state.fb_record["Feedback_Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+                    with st.spinner("Sending your feedback..."):
+                        success = utils.save_to_sheet(st.session_state.fb_record, "FEEDBACK")
+                    
+                    if success:
+                        st.session_state.fb_page = "SUCCESS"
+                        st.rerun()
+                    else:
+                        st.error("Submission failed. Please try again.")
         
         with col2:
             if st.button("💬 Add More Details", use_container_width=True):
@@ -166,7 +119,7 @@ def run():
         
         with col3:
             if st.button("🔄 Reset"):
-                st.session_state.clear()
+                session_store.clear_session()
                 st.rerun()
 
     # --- SUCCESS PAGE ---
@@ -177,5 +130,5 @@ def run():
         st.info("**Your voice matters!** Our team reviews all feedback to continuously improve our services.")
         
         if st.button("💭 Share More Feedback", type="primary"):
-            st.session_state.clear()
+            session_store.clear_session()
             st.rerun()
\ No newline at end of file
@@ -0,0 +1,451 @@
+"""
+Offline US place gazetteer for City / State validation.
+
+Answers, without an LLM or network call:
+- state_code("california") -> "CA"
+- find("los angelas") -> Los Angeles, CA (exact, then fuzzy)
+- infer_state("Los Angeles") -> "CA" when the city name is unambiguous
+- check_pair("Austin", "CA") -> not in CA, did you mean Austin, TX?
+
+check_pair only rejects pairs with the complete (Census) gazetteer: a city
+that the bundled list knows in one state only can still be a real place
+elsewhere (Springfield, OR; Kent, OH), so against the bundled list every pair
+passes. infer_state likewise needs complete data, except for the few bundled
+cities of a million or more people, which no namesake comes close to.
+A build is complete only with incorporated places, census-designated places
+(Columbia, MD; Bethesda, MD) and minor civil divisions (Greenwich, CT).
+
+Places are two flat NumPy arrays: a structured row per place (name offsets,
+state index, population, letter mask), sorted by normalized name, and one
+uint8 blob of "key\\x1fDisplay Name" strings. Exact lookups are a binary
+search over the sorted keys; fuzzy lookups prefilter one first-letter range
+by length and letter set with vectorized ops before scoring with difflib.
+
+A full gazetteer is compiled once into DATA_DIR/gazetteer/*.npy and
+memory-mapped on load:
+
+    python gazetteer.py build sub-est2023_all.csv 2023_Gaz_place_national.txt \
+        2023_Gaz_cousubs_national.txt                   # Census estimates + Gazetteer Files
+    python gazetteer.py find "springfeild"
+
+Without a compiled file, the bundled list of larger US cities (BUNDLED_PLACES)
+is used.
+"""
+import argparse
+import csv
+import difflib
+import json
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+
+import shared_utils as utils
+
+GAZETTEER_DIR = "gazetteer"
+META_FILE = "gazetteer.json"
+FUZZY_CUTOFF = 0.82
+# A city name is "unambiguous" if its largest place is this many times bigger than the next
+DOMINANCE = 10
+# Smallest bundled city whose name alone gives its state (Los Angeles -> CA)
+BUNDLED_INFER_POP = 1_000_000
+# Kinds of place a complete build has
+PLACE_KINDS = {"place", "cdp", "mcd"}
+
+STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California",
+    "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois",
+    "IN": "Indiana", "IA": "Iowa", "KS": "Kansas", "KY": "Kentucky", "LA": "Louisiana",
+    "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York",
+    "NC": "North Carolina", "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VT": "Vermont", "VA": "Virginia",
+    "WA": "Washington", "WV": "West Virginia", "WI": "Wisconsin", "WY": "Wyoming",
+    "PR": "Puerto Rico",
+}
+STATE_CODES = list(STATES)
+
+# Common non-postal abbreviations
+STATE_ALIASES = {
+    "ala": "AL", "ariz": "AZ", "ark": "AR", "calif": "CA", "cali": "CA", "colo": "CO",
+    "conn": "CT", "del": "DE", "fla": "FL", "ill": "IL", "ind": "IN", "kan": "KS", "kans": "KS",
+    "mass": "MA", "mich": "MI", "minn": "MN", "miss": "MS", "mont": "MT", "neb": "NE",
+    "nev": "NV", "okla": "OK", "ore": "OR", "penn": "PA", "penna": "PA", "tenn": "TN",
+    "tex": "TX", "wash": "WA", "wis": "WI", "wisc": "WI", "wyo": "WY", "washington dc": "DC",
+    "washington d c": "DC", "d c": "DC",
+}
+
+# "ST City:population-in-thousands, ..." for larger US cities
+BUNDLED_PLACES = """
+AL Birmingham:197, Montgomery:198, Huntsville:225, Mobile:183, Tuscaloosa:110
+AK Anchorage:290, Fairbanks:32, Juneau:32
+AZ Phoenix:1650, Tucson:545, Mesa:505, Chandler:275, Gilbert:270, Glendale:250, Scottsdale:242, Peoria:195, Tempe:185, Flagstaff:77
+AR Little Rock:203, Fayetteville:100, Fort Smith:89, Springdale:88, Jonesboro:80
+CA Los Angeles:3820, San Diego:1390, San Jose:970, San Francisco:810, Fresno:545, Sacramento:525, Long Beach:450, Oakland:430, Bakersfield:410, Anaheim:345, Stockton:320, Riverside:315, Santa Ana:310, Irvine:310, Chula Vista:275, Fremont:225, San Bernardino:222, Modesto:218, Oxnard:200, Huntington Beach:195, Glendale:190, Ontario:180, Santa Rosa:178, Sunnyvale:152, Pomona:147, Torrance:143, Pasadena:135, Santa Clara:128, Berkeley:120, Burbank:105
+CO Denver:715, Colorado Springs:490, Aurora:395, Fort Collins:170, Lakewood:155, Pueblo:111, Boulder:105
+CT Bridgeport:148, Stamford:136, New Haven:135, Hartford:120, Waterbury:114
+DE Wilmington:71, Dover:39, Newark:31
+DC Washington:680
+FL Jacksonville:985, Miami:450, Tampa:400, Orlando:320, St. Petersburg:260, Port St. Lucie:230, Hialeah:220, Cape Coral:215, Tallahassee:200, Fort Lauderdale:185, Gainesville:145, Pensacola:54
+GA Atlanta:510, Columbus:205, Augusta:200, Macon:157, Savannah:148, Athens:128
+HI Honolulu:345, Hilo:45
+ID Boise:237, Meridian:125, Nampa:110, Idaho Falls:67, Pocatello:57
+IL Chicago:2660, Aurora:180, Naperville:150, Joliet:150, Rockford:148, Springfield:113, Elgin:113, Peoria:111, Champaign:89
+IN Indianapolis:880, Fort Wayne:270, Evansville:115, South Bend:103, Carmel:102, Bloomington:80
+IA Des Moines:212, Cedar Rapids:137, Davenport:101, Sioux City:86, Iowa City:75
+KS Wichita:395, Overland Park:200, Kansas City:155, Olathe:145, Topeka:126
+KY Louisville:625, Lexington:320, Bowling Green:75
+LA New Orleans:365, Baton Rouge:220, Shreveport:180, Lafayette:121
+ME Portland:68, Lewiston:38, Bangor:32
+MD Baltimore:570, Frederick:80, Gaithersburg:69, Rockville:68, Annapolis:40
+MA Boston:650, Worcester:206, Springfield:155, Cambridge:118, Lowell:115
+MI Detroit:635, Grand Rapids:197, Warren:138, Sterling Heights:133, Ann Arbor:122, Lansing:112, Flint:80
+MN Minneapolis:425, Saint Paul:303, Rochester:121, Bloomington:89, Duluth:87
+MS Jackson:145, Gulfport:72, Southaven:55, Hattiesburg:48
+MO Kansas City:510, St. Louis:290, Springfield:170, Columbia:128, Independence:123
+MT Billings:120, Missoula:77, Great Falls:60, Bozeman:56
+NE Omaha:485, Lincoln:295, Bellevue:64
+NV Las Vegas:660, Henderson:330, North Las Vegas:280, Reno:270
+NH Manchester:116, Nashua:91, Concord:44
+NJ Newark:305, Jersey City:290, Paterson:157, Elizabeth:137, Trenton:90, Camden:71
+NM Albuquerque:560, Las Cruces:112, Rio Rancho:105, Santa Fe:89
+NY New York:8260, Buffalo:275, Rochester:210, Yonkers:210, Syracuse:145, Albany:100
+NC Charlotte:900, Raleigh:480, Greensboro:300, Durham:290, Winston-Salem:250, Fayetteville:208, Cary:180, Wilmington:120, Asheville:94
+ND Fargo:130, Bismarck:75, Grand Forks:59
+OH Columbus:910, Cleveland:360, Cincinnati:310, Toledo:265, Akron:188, Dayton:136
+OK Oklahoma City:700, Tulsa:410, Norman:130
+OR Portland:630, Eugene:177, Salem:177, Gresham:113, Hillsboro:108, Bend:102
+PA Philadelphia:1550, Pittsburgh:300, Allentown:125, Reading:95, Erie:93, Scranton:76
+RI Providence:190, Cranston:83, Warwick:82
+SC Charleston:155, Columbia:137, North Charleston:118, Greenville:72
+SD Sioux Falls:200, Rapid City:77
+TN Nashville:690, Memphis:620, Knoxville:195, Chattanooga:185, Clarksville:170
+TX Houston:2300, San Antonio:1450, Dallas:1300, Austin:960, Fort Worth:960, El Paso:680, Arlington:395, Corpus Christi:317, Plano:285, Lubbock:260, Laredo:255, Irving:255, Garland:240, Amarillo:200, McKinney:200, Frisco:200, Brownsville:187, Waco:140
+UT Salt Lake City:200, West Valley City:135, West Jordan:116, Provo:113, St. George:100, Orem:98, Ogden:87
+VT Burlington:45, South Burlington:20
+VA Virginia Beach:455, Chesapeake:250, Norfolk:235, Arlington:235, Richmond:228, Newport News:185, Alexandria:155, Hampton:137
+WA Seattle:750, Spokane:230, Tacoma:220, Vancouver:195, Bellevue:150, Kent:135, Everett:112
+WV Charleston:48, Huntington:46, Morgantown:30
+WI Milwaukee:570, Madison:270, Green Bay:107, Kenosha:99
+WY Cheyenne:65, Casper:59, Laramie:32
+PR San Juan:340, Bayamon:180, Ponce:135
+"""
+
+_PLACE_DTYPE = np.dtype([("key", "<u4"), ("name", "<u4"), ("end", "<u4"), ("state", "u1"), ("pop", "<u4"),
+                         ("letters", "<u4")])
+_SEP = b"\x1f"
+_PREFIXES = {"st": "saint", "ste": "sainte", "ft": "fort", "mt": "mount", "n": "north", "s": "south",
+             "e": "east", "w": "west"}
+# Census place names carry a legal-status suffix ("Austin city")
+_LSAD = re.compile(r"\s+(city|town|village|borough|CDP|municipality|city and borough|(charter )?township|"
+                   r"plantation|comunidad|zona urbana|"
+                   r"(unified|consolidated|metropolitan) government.*|urban county)$", re.I)
+# Population-estimates summary levels read: incorporated places, minor civil divisions
+_ESTIMATE_LEVELS = {"162": "place", "061": "mcd"}
+# Gazetteer LSAD code of a census-designated place
+_CDP_LSAD = "57"
+# FUNCSTAT of statistical / fictitious county subdivisions (census county divisions,
+# unorganized territories): not places. CDPs are statistical too, but are places.
+_NOT_PLACES = {"S", "F"}
+
+# --- NORMALIZATION ---
+def _letters(key):
+    """Bitmask of the letters a-z in key, for the fuzzy-match prefilter."""
+    mask = 0
+    for ch in key:
+        if "a" <= ch <= "z":
+            mask |= 1 << (ord(ch) - 97)
+    return mask
+
+def _bit_counts(values):
+    return np.unpackbits(np.ascontiguousarray(values, dtype="<u4").view(np.uint8)).reshape(-1, 32).sum(axis=1)
+
+def normalize(name):
+    """Lookup key: lowercase words, St./Ft./Mt. spelled out, no punctuation."""
+    words = re.findall(r"[a-z0-9]+", str(name or "").lower().replace("'", ""))
+    if words and words[0] in _PREFIXES and len(words) > 1:
+        words[0] = _PREFIXES[words[0]]
+    return " ".join(words)
+
+def state_code(value):
+    """Two-letter code for a state code, name or common abbreviation; None if not a state."""
+    text = str(value or "").strip()
+    if text.upper() in STATES:
+        return text.upper()
+    key = normalize(text)
+    for code, name in STATES.items():
+        if key == name.lower():
+            return code
+    return STATE_ALIASES.get(key) or STATE_ALIASES.get(key.replace(" ", ""))
+
+# --- BUILD ---
+def compile_places(rows):
+    """(places, blob) arrays for an iterable of (display_name, state_code, population)."""
+    best = {}
+    for name, state, pop in rows:
+        key = normalize(name)
+        if key and state in STATES and pop >= best.get((key, state), ("", -1))[1]:
+            best[(key, state)] = (name.strip(), int(pop))
+
+    places = np.zeros(len(best), dtype=_PLACE_DTYPE)
+    blob = bytearray()
+    for i, ((key, state), (name, pop)) in enumerate(sorted(best.items())):
+        places[i]["key"] = len(blob)
+        blob += key.encode() + _SEP
+        places[i]["name"] = len(blob)
+        blob += name.encode()
+        places[i]["end"] = len(blob)
+        places[i]["state"] = STATE_CODES.index(state)
+        places[i]["pop"] = pop
+        places[i]["letters"] = _letters(key)
+    return places, np.frombuffer(bytes(blob), dtype=np.uint8)
+
+def bundled_rows():
+    for line in BUNDLED_PLACES.strip().splitlines():
+        state, entries = line.split(" ", 1)
+        for entry in entries.split(", "):
+            name, pop = entry.rsplit(":", 1)
+            yield name, state, int(pop) * 1000
+
+def census_rows(path, kinds=None):
+    """
+    Rows from a Census file; the kinds of place read ("place", "cdp", "mcd")
+    are added to `kinds` as the rows are read.
+    - population-estimates CSV (sub-est2023_all.csv): incorporated places
+      (SUMLEV 162) and minor civil divisions (061), latest POPESTIMATE
+    - Gazetteer place file (2023_Gaz_place_national.txt, tab-separated):
+      incorporated and census-designated places
+    - Gazetteer county subdivision file (2023_Gaz_cousubs_national.txt): MCDs
+    Gazetteer files since 2020 have no population; those rows get 0 (unknown).
+    """
+    kinds = set() if kinds is None else kinds
+    with open(path, newline="", encoding="latin-1") as f:
+        tabbed = "\t" in f.readline()
+    if tabbed:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from _gazetteer_file_rows(csv.DictReader(f, delimiter="\t"), kinds)
+    else:
+        with open(path, newline="", encoding="latin-1") as f:
+            yield from _estimate_rows(csv.DictReader(f), kinds)
+
+def _estimate_rows(reader, kinds):
+    pop_col = [c for c in reader.fieldnames if c.startswith("POPESTIMATE")][-1]
+    for row in reader:
+        kind = _ESTIMATE_LEVELS.get(row.get("SUMLEV", "162"))
+        state = state_code(row["STNAME"])
+        if kind and state and row.get("FUNCSTAT") not in _NOT_PLACES:
+            kinds.add(kind)
+            yield _LSAD.sub("", row["NAME"]), state, int(row[pop_col] or 0)
+
+def _gazetteer_file_rows(reader, kinds):
+    for row in reader:
+        row = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+        state = state_code(row["USPS"])
+        if not state:
+            continue
+        # Place GEOIDs are state + 5 digits, county subdivisions state + county + 5
+        if len(row["GEOID"]) > 7:
+            if row.get("FUNCSTAT") in _NOT_PLACES:
+                continue
+            kind = "mcd"
+        else:
+            kind = "cdp" if row.get("LSAD") == _CDP_LSAD else "place"
+        kinds.add(kind)
+        yield _LSAD.sub("", row["NAME"]), state, int(row.get("POP10") or 0)
+
+def build(rows, out_dir=None, complete=False):
+    """
+    Compile rows into out_dir/places.npy + names.npy. Returns the place count.
+    complete marks the data as covering every kind of place (PLACE_KINDS).
+    """
+    out_dir = out_dir or os.path.join(utils.DATA_DIR, GAZETTEER_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    places, blob = compile_places(rows)
+    np.save(os.path.join(out_dir, "places.npy"), places)
+    np.save(os.path.join(out_dir, "names.npy"), blob)
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump({"complete": bool(complete)}, f)
+    return len(places)
+
+# --- LOOKUP ---
+class Gazetteer:
+    """Sorted place array plus name blob; works the same on memory-mapped files."""
+
+    def __init__(self, places, blob, complete=False):
+        self.places = places
+        self.blob = blob
+        # True for a full Census build: a name missing from a state really isn't there
+        self.complete = complete
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(utils.DATA_DIR, GAZETTEER_DIR)
+        if os.path.exists(os.path.join(path, "places.npy")):
+            meta = {}
+            if os.path.exists(os.path.join(path, META_FILE)):
+                with open(os.path.join(path, META_FILE)) as f:
+                    meta = json.load(f)
+            return cls(np.load(os.path.join(path, "places.npy"), mmap_mode="r"),
+                       np.load(os.path.join(path, "names.npy"), mmap_mode="r"),
+                       complete=meta.get("complete", False))
+        return cls(*compile_places(bundled_rows()))
+
+    def __len__(self):
+        return len(self.places)
+
+    def _key(self, i):
+        p = self.places[i]
+        return self.blob[p["key"]:p["name"] - 1].tobytes().decode()
+
+    def _place(self, i):
+        p = self.places[i]
+        return {"city": self.blob[p["name"]:p["end"]].tobytes().decode(),
+                "state": STATE_CODES[p["state"]], "population": int(p["pop"])}
+
+    def _lower_bound(self, key):
+        lo, hi = 0, len(self.places)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, city, state=None):
+        """Places named exactly `city` (normalized), largest first."""
+        key = normalize(city)
+        found = []
+        i = self._lower_bound(key)
+        while i < len(self.places) and self._key(i) == key:
+            place = self._place(i)
+            if state is None or place["state"] == state:
+                found.append(place)
+            i += 1
+        return sorted(found, key=lambda p: -p["population"])
+
+    def fuzzy(self, city, state=None, limit=3, cutoff=FUZZY_CUTOFF):
+        """Closest place names (same first letter, similar length), best match first."""
+        key = normalize(city)
+        if not key:
+            return []
+        start = self._lower_bound(key[0])
+        end = self._lower_bound(chr(ord(key[0]) + 1))
+        # Vectorized prefilter on key length and letter set (and state) before any string work
+        rows = self.places[start:end]
+        lengths = rows["name"].astype(np.int64) - rows["key"] - 1
+        keep = np.abs(lengths - len(key.encode())) <= 3
+        keep &= _bit_counts(rows["letters"] ^ np.uint32(_letters(key))) <= 3
+        if state is not None:
+            keep &= rows["state"] == STATE_CODES.index(state)
+        scored = []
+        for i in start + np.flatnonzero(keep):
+            matcher = difflib.SequenceMatcher(None, key, self._key(i))
+            if (matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff
+                    and matcher.ratio() >= cutoff):
+                place = self._place(i)
+                scored.append((matcher.ratio(), place["population"], place))
+        scored.sort(key=lambda s: (-s[0], -s[1]))
+        return [place for _, _, place in scored[:limit]]
+
+    def find(self, city, state=None):
+        """Best place for a (possibly misspelled) city name, or None."""
+        exact = self.lookup(city, state)
+        if exact:
+            return exact[0]
+        close = self.fuzzy(city, state, limit=1)
+        return close[0] if close else None
+
+    def infer_state(self, city):
+        """
+        State code when the city name points to one state, else None. Without
+        complete data only cities of BUNDLED_INFER_POP or more give a state.
+        """
+        if self.complete:
+            places = self.lookup(city) or self.fuzzy(city, limit=2)
+        else:
+            places = self.lookup(city)
+            if places and places[0]["population"] < BUNDLED_INFER_POP:
+                return None
+        if not places:
+            return None
+        if len(places) == 1:
+            return places[0]["state"]
+        # A population of 0 is unknown (Gazetteer-file rows): never assume it is small
+        runner_up = places[1]["population"]
+        if runner_up and places[0]["population"] >= DOMINANCE * runner_up:
+            return places[0]["state"]
+        return None
+
+    def check_pair(self, city, state):
+        """
+        (ok, suggestion). ok is False when the city is known but not in `state`;
+        suggestion is then the most likely place it refers to. Unknown cities
+        pass, and so does every pair without complete data.
+        """
+        if not self.complete or self.find(city, state):
+            return True, None
+        elsewhere = self.find(city)
+        return (False, elsewhere) if elsewhere else (True, None)
+
+# --- SHARED INSTANCE ---
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer():
+    """Process-wide gazetteer: the compiled file in DATA_DIR, else the bundled list."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer.load()
+    return _gazetteer
+
+def find(city, state=None):
+    return get_gazetteer().find(city, state)
+
+def lookup(city, state=None):
+    return get_gazetteer().lookup(city, state)
+
+def is_complete():
+    return get_gazetteer().complete
+
+def infer_state(city):
+    return get_gazetteer().infer_state(city)
+
+def check_pair(city, state):
+    return get_gazetteer().check_pair(city, state)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline US place gazetteer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="compile Census population estimates and Gazetteer Files into DATA_DIR")
+    b.add_argument("files", nargs="+", help="sub-est*.csv, *_Gaz_place_national.txt, *_Gaz_cousubs_national.txt")
+    f = sub.add_parser("find", help="look up a city")
+    f.add_argument("city")
+    f.add_argument("--state")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        kinds = set()
+        rows = [row for path in args.files for row in census_rows(path, kinds)]
+        complete = PLACE_KINDS <= kinds
+        print(f"{build(rows, complete=complete)} places written")
+        if not complete:
+            print(f"incomplete (no {', '.join(sorted(PLACE_KINDS - kinds))} rows): "
+                  "City / State pairs won't be checked", file=sys.stderr)
+        return 0
+    gaz = get_gazetteer()
+    state = state_code(args.state) if args.state else None
+    for place in gaz.lookup(args.city, state) or gaz.fuzzy(args.city, state, limit=5):
+        print(f"{place['city']}, {place['state']}  ({place['population']:,})")
+    print(f"inferred state: {gaz.infer_state(args.city)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Tolerant decoding of JSON objects out of LLM replies.
+
+Model output is often not quite JSON: prose or ``` fences around the object,
+single quotes (our own prompt shows {'Make': 'Toyota'}), Python literals,
+trailing commas, or an object cut off at max_tokens. Instead of discarding
+the whole reply (and paying for another turn), decode() scans the first
+object leniently and keeps every key/value pair that was complete.
+
+Parse outcomes are counted per call site ("extract", "validate", ...), so
+we can see where replies are being lost:
+- ok        strict json.loads succeeded
+- repaired  lenient scan recovered the whole object
+- partial   object was cut off or broke off; complete pairs were salvaged
+- failed    nothing usable
+"""
+import json
+import threading
+from collections import Counter, defaultdict
+
+OUTCOMES = ("ok", "repaired", "partial", "failed")
+
+_stats = defaultdict(Counter)
+_stats_lock = threading.Lock()
+
+class _Truncated(Exception):
+    """Input ended inside a value."""
+
+_LITERALS = {"true": True, "false": False, "null": None,
+             "True": True, "False": False, "None": None}
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "/": "/"}
+
+# --- LENIENT SCANNER ---
+class _Scanner:
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+
+    def _skip(self):
+        while self.pos < len(self.text) and self.text[self.pos] in " \t\r\n":
+            self.pos += 1
+        if self.pos >= len(self.text):
+            raise _Truncated
+
+    def value(self):
+        self._skip()
+        ch = self.text[self.pos]
+        if ch == "{":
+            return self.obj()[0]
+        if ch == "[":
+            return self.array()
+        if ch in "\"'":
+            return self.string()
+        return self.bare()
+
+    def obj(self, salvage=False):
+        """Parse {...}. With salvage, a truncated object returns its complete pairs."""
+        self.pos += 1  # {
+        result = {}
+        try:
+            while True:
+                self._skip()
+                if self.text[self.pos] == "}":
+                    self.pos += 1
+                    return result, True
+                if self.text[self.pos] == ",":
+                    self.pos += 1
+                    continue
+                key = self.string() if self.text[self.pos] in "\"'" else self.bare(stop=":")
+                self._skip()
+                if self.text[self.pos] != ":":
+                    raise ValueError(f"expected ':' at {self.pos}")
+                self.pos += 1
+                # Kept as soon as the value is complete, even if the text ends right after it
+                result[str(key)] = self.value()
+                self._skip()
+                if self.text[self.pos] not in ",}":
+                    raise ValueError(f"expected ',' or '}}' at {self.pos}")
+        except (_Truncated, ValueError, IndexError):
+            if salvage:
+                return result, False
+            raise
+
+    def array(self):
+        self.pos += 1  # [
+        items = []
+        while True:
+            self._skip()
+            if self.text[self.pos] == "]":
+                self.pos += 1
+                return items
+            if self.text[self.pos] == ",":
+                self.pos += 1
+                continue
+            items.append(self.value())
+
+    def string(self):
+        quote = self.text[self.pos]
+        self.pos += 1
+        out = []
+        while self.pos < len(self.text):
+            ch = self.text[self.pos]
+            self.pos += 1
+            if ch == quote and not (quote == "'" and self._apostrophe()):
+                return "".join(out)
+            if ch == "\\" and self.pos < len(self.text):
+                esc = self.text[self.pos]
+                self.pos += 1
+                if esc == "u" and self.pos + 4 <= len(self.text):
+                    out.append(chr(int(self.text[self.pos:self.pos + 4], 16)))
+                    self.pos += 4
+                else:
+                    out.append(_ESCAPES.get(esc, esc))
+            else:
+                out.append(ch)
+        raise _Truncated
+
+    def _apostrophe(self):
+        """
+        Inside a single-quoted string, a quote that isn't followed by what can
+        come after a string (',', '}', ']', ':' or the end) is an apostrophe,
+        as in 'driver's door'.
+        """
+        rest = self.text[self.pos:].lstrip(" \t\r\n")
+        return bool(rest) and rest[0] not in ",}]:"
+
+    def bare(self, stop=",}]"):
+        """Number, literal, or an unquoted word (e.g. YES)."""
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] not in stop and self.text[self.pos] != "\n":
+            self.pos += 1
+        if self.pos >= len(self.text):
+            raise _Truncated
+        token = self.text[start:self.pos].strip()
+        if not token:
+            raise ValueError(f"empty value at {start}")
+        if token in _LITERALS:
+            return _LITERALS[token]
+        try:
+            return json.loads(token)
+        except ValueError:
+            return token
+
+# --- PUBLIC API ---
+def _strip_fences(text):
+    return text.replace("```json", "").replace("```", "").strip()
+
+def parse(text):
+    """
+    Decode the first JSON object in text.
+    Returns (dict_or_None, outcome) with outcome in OUTCOMES.
+    """
+    if not isinstance(text, str):
+        return None, "failed"
+    cleaned = _strip_fences(text)
+    try:
+        data = json.loads(cleaned)
+        if isinstance(data, dict):
+            return data, "ok"
+    except ValueError:
+        pass
+
+    start = cleaned.find("{")
+    if start < 0:
+        return None, "failed"
+    try:
+        data, complete = _Scanner(cleaned[start:]).obj(salvage=True)
+    except (ValueError, IndexError):
+        return None, "failed"
+    if complete:
+        return data, "repaired"
+    return (data, "partial") if data else (None, "failed")
+
+def decode(text, site):
+    """parse() and count the outcome under call site `site`. Returns the dict or None."""
+    data, outcome = parse(text)
+    with _stats_lock:
+        _stats[site][outcome] += 1
+    if outcome == "failed":
+        print(f"LLM JSON Error ({site}): {str(text)[:120]!r}")
+    return data
+
+def stats():
+    """{site: {outcome: count, ..., "failure_rate": float}} snapshot."""
+    with _stats_lock:
+        snapshot = {}
+        for site, counts in _stats.items():
+            total = sum(counts.values())
+            row = {outcome: counts[outcome] for outcome in OUTCOMES}
+            row["failure_rate"] = counts["failed"] / total if total else 0.0
+            snapshot[site] = row
+        return snapshot
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
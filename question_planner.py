@@ -0,0 +1,197 @@
+"""
+Question planner for the complaint flow.
+
+Instead of asking for remaining_fields[:3] in COMPLAINT_FIELDS order, the
+bot asks about one topic at a time (vehicle identity, incident
+circumstances, location and time, technical details), picking the question
+expected to resolve the most fields in one turn:
+- fields people answer together are asked together
+- fields that can be derived are filled in locally, never asked
+  (Make / Model_Year from a valid VIN, Injured / Deaths = 0 when there was
+  no crash and no fire, State from a City that is unambiguous in the
+  complete Census gazetteer); while a field's source is still missing, the
+  source is asked first
+- per-field fill rates learned from past submissions (share of real answers
+  vs "unknown"/"n/a") rank fields, so likely answers come first; they are
+  counted with Arrow compute in a background thread, off the request path
+
+plan() only reorders the remaining fields, so generate_ai_response's
+"next fields to ask" (the first three) becomes the planned question.
+"""
+import threading
+import time
+from datetime import datetime
+
+MAX_ASK = 3
+FILL_RATE_TTL_S = 10 * 60
+
+# Topics users tend to answer in one message
+GROUPS = [
+    ("vehicle", ["VIN", "Make", "Model", "Model_Year", "Mileage"]),
+    ("incident", ["Description", "Component", "Crash", "Fire", "Speed", "Injured", "Deaths"]),
+    ("where_when", ["City", "State", "Date_Complaint"]),
+    ("technical", ["Technician_Notes", "Brake_Condition", "Engine_Temperature"]),
+]
+
+# field -> fields it can be derived from
+DERIVES_FROM = {
+    "Make": ["VIN"],
+    "Model_Year": ["VIN"],
+    "Injured": ["Crash", "Fire"],
+    "Deaths": ["Crash", "Fire"],
+    "State": ["City"],
+}
+
+# Priors until there is history: how often users actually know the field
+DEFAULT_FILL_RATES = {
+    "Description": 1.0, "Make": 0.98, "Model": 0.97, "Model_Year": 0.95, "Crash": 0.95,
+    "Fire": 0.95, "Injured": 0.95, "Deaths": 0.95, "City": 0.9, "State": 0.9,
+    "Date_Complaint": 0.85, "Component": 0.8, "Speed": 0.75, "Mileage": 0.7, "VIN": 0.6,
+    "Technician_Notes": 0.25, "Brake_Condition": 0.3, "Engine_Temperature": 0.3,
+}
+PLACEHOLDERS = {"", "none", "null", "n/a", "na", "unknown", "not sure", "don't know", "idk", "-"}
+
+# World manufacturer identifiers (VIN characters 1-3, or 1-2) for common makes
+VIN_MAKES = {
+    "1HG": "Honda", "2HG": "Honda", "JHM": "Honda", "5FN": "Honda", "5J6": "Honda",
+    "JT": "Toyota", "4T1": "Toyota", "4T3": "Toyota", "5TD": "Toyota", "5TF": "Toyota", "2T1": "Toyota",
+    "1FA": "Ford", "1FM": "Ford", "1FT": "Ford", "3FA": "Ford",
+    "1G1": "Chevrolet", "1GC": "Chevrolet", "2G1": "Chevrolet", "3GN": "Chevrolet",
+    "1N4": "Nissan", "JN1": "Nissan", "3N1": "Nissan", "5N1": "Nissan",
+    "4S3": "Subaru", "4S4": "Subaru", "JF1": "Subaru", "JF2": "Subaru",
+    "5YJ": "Tesla", "7SA": "Tesla",
+    "KNA": "Kia", "KND": "Kia", "5XY": "Kia",
+    "KMH": "Hyundai", "5NP": "Hyundai", "5NM": "Hyundai",
+    "WBA": "BMW", "5UX": "BMW", "WDD": "Mercedes-Benz", "4JG": "Mercedes-Benz",
+    "WVW": "Volkswagen", "3VW": "Volkswagen", "1VW": "Volkswagen",
+    "1C4": "Jeep", "1J4": "Jeep", "1C6": "Ram", "2C3": "Chrysler",
+    "JM1": "Mazda", "JM3": "Mazda",
+}
+
+# --- DERIVATION ---
+def _missing(record, field):
+    return record.get(field) is None
+
+def _vin_year(vin):
+    """Newest model year encoded in the VIN that isn't in the future."""
+    import risk_scoring
+    latest = datetime.now().year + 1
+    return next((y for y in risk_scoring.vin_model_years(vin) if y <= latest), None)
+
+def derive(record):
+    """{field: value} for missing fields implied by what's already in the record."""
+    import risk_scoring
+    derived = {}
+    vin = record.get("VIN")
+    if vin and risk_scoring.vin_is_valid(vin):
+        vin = str(vin).strip().upper()
+        if _missing(record, "Model_Year"):
+            year = _vin_year(vin)
+            if year:
+                derived["Model_Year"] = str(year)
+        if _missing(record, "Make"):
+            make = VIN_MAKES.get(vin[:3]) or VIN_MAKES.get(vin[:2])
+            if make:
+                derived["Make"] = make
+
+    if record.get("City") and _missing(record, "State"):
+        import gazetteer
+        state = gazetteer.infer_state(record["City"])
+        if state:
+            derived["State"] = state
+
+    no = lambda field: str(record.get(field) or "").strip().upper() in ("NO", "N", "FALSE")
+    if no("Crash") and no("Fire"):
+        for field in ("Injured", "Deaths"):
+            if _missing(record, field):
+                derived[field] = "0"
+    return derived
+
+# --- FILL RATES ---
+_rates = None
+_rates_at = 0.0
+_refreshing = False
+_rates_lock = threading.Lock()
+
+def learn_fill_rates(table, fields=None):
+    """
+    Per-field share of real (non-placeholder) answers in an Arrow table of past rows.
+    Counted with Arrow compute: nulls plus placeholder strings are the unanswered ones.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    fields = [f for f in (fields or DEFAULT_FILL_RATES) if f in table.column_names]
+    if not table.num_rows:
+        return dict(DEFAULT_FILL_RATES)
+    placeholders = pa.array(sorted(PLACEHOLDERS))
+    rates = dict(DEFAULT_FILL_RATES)
+    for f in fields:
+        column = table[f]
+        lowered = pc.utf8_lower(pc.utf8_trim_whitespace(column))
+        unanswered = column.null_count + (pc.sum(pc.is_in(lowered, value_set=placeholders)).as_py() or 0)
+        rates[f] = 1 - unanswered / table.num_rows
+    return rates
+
+def _refresh_fill_rates():
+    global _rates, _rates_at, _refreshing
+    try:
+        import analytics_store
+        rates = learn_fill_rates(analytics_store.load_table(columns=list(DEFAULT_FILL_RATES)))
+    except Exception as e:
+        print(f"Planner Error: {e}")
+        rates = dict(DEFAULT_FILL_RATES)
+    with _rates_lock:
+        _rates, _rates_at, _refreshing = rates, time.time(), False
+
+def fill_rates():
+    """
+    Fill rates learned from the analytics store. Never waits on the store: a
+    missing or stale value is recomputed in a background thread and the
+    priors (or the previous rates) are used until it lands.
+    """
+    global _refreshing
+    with _rates_lock:
+        rates = _rates
+        if not _refreshing and (rates is None or time.time() - _rates_at >= FILL_RATE_TTL_S):
+            _refreshing = True
+            threading.Thread(target=_refresh_fill_rates, name="fill-rates", daemon=True).start()
+    return rates or DEFAULT_FILL_RATES
+
+# --- PLANNING ---
+def _sources(field):
+    """DERIVES_FROM[field], minus City -> State unless the complete gazetteer is loaded."""
+    if field == "State":
+        import gazetteer
+        if not gazetteer.is_complete():
+            return ()
+    return DERIVES_FROM.get(field, ())
+
+def _askable(field, remaining):
+    """False while a field could still be derived from another missing field."""
+    return not any(source in remaining for source in _sources(field))
+
+def next_question(record, remaining, rates=None):
+    """The fields to ask next: up to MAX_ASK fields from the best topic."""
+    rates = rates or fill_rates()
+    remaining_set = set(remaining)
+    best, best_score = [], -1.0
+    for _, fields in GROUPS:
+        missing = [f for f in fields if f in remaining_set]
+        askable = [f for f in missing if _askable(f, remaining_set)] or missing
+        if not askable:
+            continue
+        ask = sorted(askable, key=lambda f: -rates.get(f, 0.5))[:MAX_ASK]
+        # Expected fields resolved: answers, plus what they unlock for derivation
+        unlocked = sum(1 for f in missing if f not in ask and
+                       any(source in ask for source in _sources(f)))
+        score = sum(rates.get(f, 0.5) for f in ask) + 0.5 * unlocked
+        if score > best_score:
+            best, best_score = ask, score
+    return best or list(remaining)[:MAX_ASK]
+
+def plan(record, remaining):
+    """remaining reordered so the planned question comes first."""
+    first = next_question(record, remaining)
+    rates = fill_rates()
+    rest = sorted((f for f in remaining if f not in first), key=lambda f: -rates.get(f, 0.5))
+    return first + rest
@@ -0,0 +1,178 @@
+"""
+Report IDs and the local report status index.
+
+IDs are ULIDs: 48-bit millisecond timestamp + 80 random bits, written as 26
+Crockford base32 characters. They sort by creation time, need no
+coordination between workers (the random part makes collisions negligible)
+and are monotonic within a process: IDs made in the same millisecond
+increment the random part instead of drawing a new one.
+
+An ID is assigned in finalize_complaint_record, before the sheet write, and
+stored in the row's Report_ID column. After the write, the index maps it to
+status, submission time and sheet row: a SQLite table keyed on the ID
+(WAL mode, shared by every worker on the machine), so a status query is a
+single primary-key lookup, with no sheet scan.
+
+    python report_ids.py show 01HXF3Q9V6Y5J0K8M2N4P6R8T0
+    python report_ids.py status 01HXF3Q9V6Y5J0K8M2N4P6R8T0 "UNDER REVIEW"
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import shared_utils as utils
+
+INDEX_FILE = "report_index.sqlite3"
+STATUSES = ["RECEIVED", "UNDER REVIEW", "NEEDS INFO", "CLOSED"]
+
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_ID_RE = re.compile(r"^[0-9A-HJKMNP-TV-Z]{26}$")
+_RANDOM_BITS = 80
+
+# --- ID GENERATION ---
+_last = [0, 0]  # [ms, random] of the last ID made in this process
+_id_lock = threading.Lock()
+
+def _encode(value, length):
+    chars = []
+    for _ in range(length):
+        value, rem = divmod(value, 32)
+        chars.append(_ALPHABET[rem])
+    return "".join(reversed(chars))
+
+def new_id(now=None):
+    """A new ULID, greater than every ID this process made before."""
+    ms = int((time.time() if now is None else now) * 1000)
+    with _id_lock:
+        if ms <= _last[0]:
+            # Same (or earlier, if the clock stepped back) millisecond
+            ms, rand = _last[0], _last[1] + 1
+            if rand >> _RANDOM_BITS:
+                ms, rand = ms + 1, int.from_bytes(os.urandom(10), "big")
+        else:
+            rand = int.from_bytes(os.urandom(10), "big")
+        _last[:] = [ms, rand]
+    return _encode(ms, 10) + _encode(rand, 16)
+
+def normalize_id(report_id):
+    """Upper-cased ID with Crockford look-alikes (I, L -> 1, O -> 0) fixed, or None if malformed."""
+    text = re.sub(r"[\s-]", "", str(report_id or "")).upper()
+    text = text.translate(str.maketrans("ILO", "110"))
+    return text if _ID_RE.match(text) else None
+
+def id_time(report_id):
+    """Creation time encoded in an ID, or None if malformed."""
+    report_id = normalize_id(report_id)
+    if not report_id:
+        return None
+    ms = 0
+    for ch in report_id[:10]:
+        ms = ms * 32 + _ALPHABET.index(ch)
+    return datetime.fromtimestamp(ms / 1000)
+
+# --- INDEX ---
+class ReportIndex:
+    """report_id -> (status, submitted, sheet_row), one row per report."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reports (report_id TEXT PRIMARY KEY, status TEXT NOT NULL, "
+            "submitted TEXT NOT NULL, sheet_row INTEGER, updated TEXT NOT NULL) WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+
+    def add(self, records, rows=None):
+        """Index written records (those with a Report_ID). rows are their sheet rows, if known."""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = rows or [None] * len(records)
+        # Stored normalized, the form get() looks up; blank or malformed IDs are skipped
+        entries = [(normalize_id(r.get("Report_ID")), "RECEIVED", r.get("Timestamp") or now, row, now)
+                   for r, row in zip(records, rows)]
+        entries = [e for e in entries if e[0]]
+        with self._lock:
+            # A retried write keeps the existing status; only the row location is refreshed
+            self._db.executemany(
+                "INSERT INTO reports VALUES (?, ?, ?, ?, ?) ON CONFLICT(report_id) DO UPDATE SET "
+                "sheet_row = COALESCE(excluded.sheet_row, sheet_row), updated = excluded.updated",
+                entries,
+            )
+        return len(entries)
+
+    def get(self, report_id):
+        """{"report_id", "status", "submitted", "sheet_row", "updated"} or None."""
+        report_id = normalize_id(report_id)
+        if not report_id:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT report_id, status, submitted, sheet_row, updated FROM reports WHERE report_id = ?",
+                (report_id,),
+            ).fetchone()
+        return dict(zip(("report_id", "status", "submitted", "sheet_row", "updated"), row)) if row else None
+
+    def set_status(self, report_id, status):
+        """Update a report's status. Returns False if the ID is unknown."""
+        if status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES}")
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE reports SET status = ?, updated = ? WHERE report_id = ?",
+                (status, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), normalize_id(report_id)),
+            )
+        return cursor.rowcount > 0
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+# --- SHARED INSTANCE ---
+_index = None
+_index_lock = threading.Lock()
+
+def get_index():
+    """Process-wide index in DATA_DIR, opened on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ReportIndex(os.path.join(utils.DATA_DIR, INDEX_FILE))
+    return _index
+
+def lookup(report_id):
+    return get_index().get(report_id)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up or update report status.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="print a report's status")
+    show.add_argument("report_id")
+    status = sub.add_parser("status", help="set a report's status")
+    status.add_argument("report_id")
+    status.add_argument("status", choices=STATUSES)
+    sub.add_parser("new", help="print a new report ID")
+    args = parser.parse_args(argv)
+
+    if args.command == "new":
+        print(new_id())
+        return 0
+    if args.command == "status" and not get_index().set_status(args.report_id, args.status):
+        print(f"Unknown report ID: {args.report_id}")
+        return 1
+    entry = lookup(args.report_id)
+    if not entry:
+        print(f"Unknown report ID: {args.report_id}")
+        return 1
+    for key, value in entry.items():
+        print(f"{key:>10}: {value}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
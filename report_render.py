@@ -0,0 +1,166 @@
+"""
+Downloadable report artifacts (plain text and PDF) built from a record.
+
+- render_text / render_pdf build the document in one pass (list + join, no
+  repeated string concatenation). The PDF writer is a small dependency-free
+  PDF 1.4 generator using the built-in Helvetica font.
+- get_report memoizes the rendered bytes per report content (a hash of the
+  record, not just its ID, so two reports can never share an entry), and
+  download_data hands st.download_button a callable so nothing is rendered
+  until the user actually clicks.
+- render_batch zips many reports from the analytics store for the safety team:
+    python report_render.py --month 2024-05 -o reports.zip
+"""
+import argparse
+import hashlib
+import io
+import json
+import sys
+import textwrap
+import zipfile
+from datetime import datetime
+
+import streamlit as st
+
+import analytics_store
+
+SECTIONS = [
+    ("VEHICLE INFORMATION", ["Make", "Model", "Model_Year", "VIN", "Mileage"]),
+    ("INCIDENT DETAILS", ["Date_Complaint", "City", "State", "Speed", "Crash", "Fire", "Injured", "Deaths"]),
+]
+TITLE = "VEHICLE SAFETY REPORT SUMMARY"
+RULE = "=" * 50
+
+MIME_TYPES = {"txt": "text/plain", "pdf": "application/pdf"}
+
+def _present(value):
+    return value not in (None, "", "None")
+
+# --- LAYOUT ---
+def report_lines(record, report_id=None):
+    """The report as a list of lines, shared by the text and PDF renderers."""
+    report_id = report_id or record.get("Report_ID")
+    generated = record.get("Timestamp") if _present(record.get("Timestamp")) else \
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lines = [TITLE]
+    if report_id:
+        lines.append(f"Report ID: {report_id}")
+    lines += [f"Generated: {generated}", RULE]
+    for heading, fields in SECTIONS:
+        lines += ["", heading]
+        lines += [f"{field}: {record[field]}" for field in fields if _present(record.get(field))]
+    lines += ["", "DESCRIPTION"]
+    if _present(record.get("Description")):
+        lines.append(str(record["Description"]))
+    lines += ["", RULE, "End of Report"]
+    return lines
+
+def render_text(record, report_id=None):
+    return "\n".join(report_lines(record, report_id)) + "\n"
+
+# --- PDF ---
+_PAGE_W, _PAGE_H = 612, 792          # US Letter, points
+_MARGIN, _LEADING, _FONT_SIZE = 54, 14, 10
+_WRAP = 95
+_LINES_PER_PAGE = (_PAGE_H - 2 * _MARGIN) // _LEADING
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def render_pdf(record, report_id=None):
+    """Minimal multi-page PDF of the report."""
+    wrapped = []
+    for line in report_lines(record, report_id):
+        wrapped.extend(textwrap.wrap(line, _WRAP) or [""])
+    pages = [wrapped[i:i + _LINES_PER_PAGE] for i in range(0, len(wrapped), _LINES_PER_PAGE)]
+
+    # Object numbers: 1 catalog, 2 pages, 3 font, then (page, content) pairs
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    kids = []
+    for n, page in enumerate(pages):
+        page_obj, content_obj = 4 + 2 * n, 5 + 2 * n
+        kids.append(f"{page_obj} 0 R")
+        ops = [f"BT /F1 {_FONT_SIZE} Tf {_LEADING} TL {_MARGIN} {_PAGE_H - _MARGIN} Td"]
+        ops.extend(f"({_pdf_escape(line)}) Tj T*" for line in page)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", "replace")
+        objects[content_obj] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_obj] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PAGE_W} {_PAGE_H}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_obj} 0 R >>"
+        ).encode()
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (num, objects[num]))
+    xref = out.tell()
+    size = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+    for num in range(1, size):
+        out.write(b"%010d 00000 n \n" % offsets[num])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref))
+    return out.getvalue()
+
+RENDERERS = {
+    "txt": lambda record, report_id: render_text(record, report_id).encode("utf-8"),
+    "pdf": render_pdf,
+}
+
+# --- CACHED / LAZY ACCESS ---
+def record_digest(record):
+    """Content hash of a record, the cache key for its rendered report."""
+    payload = json.dumps(record, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def get_report(report_id, fmt, digest, _record):
+    """
+    Rendered bytes, memoized per (report ID, format, record digest).
+    _record isn't hashed by Streamlit; digest (record_digest(_record)) stands in for it.
+    """
+    return RENDERERS[fmt](_record, report_id)
+
+def download_data(report_id, record, fmt):
+    """Zero-argument callable for st.download_button(data=...): renders on first click."""
+    snapshot = dict(record)
+    digest = record_digest(snapshot)
+    return lambda: io.BytesIO(get_report(report_id, fmt, digest, snapshot))
+
+def file_name(report_id, fmt):
+    return f"safety_report_{report_id}.{fmt}"
+
+# --- BATCH ---
+def render_batch(items, fmt="pdf", out=None):
+    """
+    Zip many reports. items is an iterable of (report_id, record).
+    Writes into out (a binary file-like) or returns the zip bytes.
+    """
+    target = out or io.BytesIO()
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for report_id, record in items:
+            zf.writestr(file_name(report_id, fmt), RENDERERS[fmt](record, report_id))
+    return None if out else target.getvalue()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-render stored reports into a zip.")
+    parser.add_argument("--month", action="append", help="YYYY-MM (repeatable, default: all)")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="pdf")
+    parser.add_argument("-o", "--output", default="reports.zip")
+    args = parser.parse_args(argv)
+
+    rows = analytics_store.load_table(args.month).to_pylist()
+    items = ((row.get("Report_ID") or row.get("Sheet_Row") or i, row) for i, row in enumerate(rows, start=1))
+    with open(args.output, "wb") as f:
+        render_batch(items, args.format, out=f)
+    print(f"Rendered {len(rows)} reports to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
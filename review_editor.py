@@ -0,0 +1,125 @@
+"""
+Review-page editor shared by complaint_bot and feedback_bot.
+
+- The grouped Field/Value frames are built once per record version and kept
+  in session state, not rebuilt on every rerun.
+- Edits are read from each st.data_editor's own widget state
+  ("edited_rows"), so only fields the user actually touched are returned.
+- Dirty fields (plus the fields checked against them, e.g. City and State)
+  are revalidated against the edited record and merged with a plain dict
+  update; no DataFrame row iteration.
+"""
+import time
+
+import pandas as pd
+import streamlit as st
+
+COMPLAINT_GROUPS = [
+    ("### 🚗 Vehicle Information", "vehicle_editor", ["Make", "Model", "Model_Year", "VIN", "Mileage"]),
+    ("### 📍 Incident Location", "location_editor", ["City", "State", "Date_Complaint"]),
+    ("### 🚨 Incident Details", "incident_editor", ["Speed", "Crash", "Fire", "Injured", "Deaths", "Component"]),
+    ("### 📝 Full Description", "description_editor",
+     ["Description", "Technician_Notes", "Brake_Condition", "Engine_Temperature"]),
+]
+
+# Fields validated against another field's value: editing the key rechecks them
+DEPENDENT_FIELDS = {
+    "City": ["State"],
+    "State": ["City"],
+    "Model_Year": ["Date_Complaint"],
+}
+
+def _record_version(record):
+    return tuple(sorted((k, str(v)) for k, v in record.items() if v is not None))
+
+def grouped_views(record, groups, cache_key):
+    """
+    {editor_key: (fields, DataFrame)} for the groups that have data.
+    Rebuilt only when the record changes.
+    """
+    version = _record_version(record)
+    cached = st.session_state.get(cache_key)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    views = {}
+    for _, editor_key, fields in groups:
+        present = [f for f in fields if record.get(f) is not None]
+        if present:
+            frame = pd.DataFrame({"Field": present, "Value": [str(record[f]) for f in present]})
+            views[editor_key] = (present, frame)
+    st.session_state[cache_key] = (version, views)
+    return views
+
+def render(record, groups, value_label="Your Information", cache_key="review_views"):
+    """
+    Draw one data editor per non-empty group.
+    Returns True if anything was rendered. Render time is kept in
+    st.session_state.review_render_ms.
+    """
+    started = time.perf_counter()
+    views = grouped_views(record, groups, cache_key)
+    for title, editor_key, _ in groups:
+        if editor_key not in views:
+            continue
+        if title:
+            st.markdown(title)
+        st.data_editor(
+            views[editor_key][1],
+            num_rows="fixed",
+            hide_index=True,
+            use_container_width=True,
+            key=editor_key,
+            column_config={
+                "Field": st.column_config.TextColumn(disabled=True, width="medium"),
+                "Value": st.column_config.TextColumn(value_label, width="large")
+            }
+        )
+    st.session_state.review_render_ms = (time.perf_counter() - started) * 1000
+    return bool(views)
+
+def dirty_fields(record, groups, cache_key="review_views"):
+    """{field: new_value} for rows the user edited and whose value actually changed."""
+    views = grouped_views(record, groups, cache_key)
+    edits = {}
+    for editor_key, (fields, _) in views.items():
+        state = st.session_state.get(editor_key) or {}
+        for row, changes in state.get("edited_rows", {}).items():
+            if "Value" not in changes:
+                continue
+            field = fields[int(row)]
+            value = changes["Value"]
+            if str(value) != str(record.get(field)):
+                edits[field] = value
+    return edits
+
+def revalidate(edits, validator=None, record=None, anchor=None):
+    """
+    Validate the edited fields, and the unedited fields that depend on them,
+    against the record as edited (so City / State are checked as a pair and
+    dates against Model_Year). anchor is "today" for relative dates.
+    Returns (clean_values, errors). Without a validator, blank values are rejected.
+    """
+    clean, errors = {}, {}
+    merged = {**(record or {}), **edits}
+    fields = list(edits)
+    for field in edits:
+        fields += [f for f in DEPENDENT_FIELDS.get(field, [])
+                   if f not in fields and merged.get(f) not in (None, "")]
+    for field in fields:
+        if field not in edits and any(f in errors and field in DEPENDENT_FIELDS.get(f, []) for f in edits):
+            continue  # the edit it depends on is already reported
+        value = merged[field]
+        if value is None or not str(value).strip():
+            errors[field] = f"{field} can't be empty."
+            continue
+        if validator is None:
+            clean[field] = value
+            continue
+        # An explicit edit on the review page overrides earlier locking
+        is_valid, clean_value, error_msg = validator(field, value, set(), merged, anchor)
+        if is_valid:
+            clean[field] = merged[field] = clean_value
+        else:
+            errors[field] = error_msg or f"{field} looks invalid."
+    return clean, errors
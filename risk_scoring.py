@@ -0,0 +1,185 @@
+"""
+Local severity / suspicion scoring for complaint reports.
+
+Each record becomes a fixed-length NumPy feature vector; two logistic models
+over the same features give:
+- User_Risk_Level: how severe the incident is (LOW / MEDIUM / HIGH / CRITICAL)
+- Suspicion_Score: 0-100, how inconsistent or implausible the report looks
+
+Scoring is pure NumPy, so it runs at submit time without an LLM call and can
+batch-score historical sheet rows:
+    python risk_scoring.py export.csv --top 20
+"""
+import argparse
+import csv
+import re
+import sys
+
+import numpy as np
+
+import component_taxonomy
+import shared_utils as utils
+
+FEATURES = [
+    "crash", "fire", "injured", "deaths", "speed", "component_severity",
+    "description_length", "vin_invalid", "vin_year_mismatch",
+    "casualties_without_crash", "implausible_speed", "missing_core_fields",
+]
+
+# Severity weights: casualties dominate, then fire/crash, then context
+RISK_WEIGHTS = np.array([1.0, 1.2, 1.0, 4.0, 0.8, 1.0, 0.2, 0.0, 0.0, 0.0, 0.0, 0.0])
+RISK_BIAS = -3.0
+
+# Suspicion weights: only consistency signals contribute
+SUSPICION_WEIGHTS = np.array([0.0, 0.0, 0.0, 0.0, 0.0, 0.0, -1.0, 1.6, 2.2, 2.0, 2.5, 1.2])
+SUSPICION_BIAS = -2.5
+
+RISK_LEVELS = [(0.85, "CRITICAL"), (0.6, "HIGH"), (0.25, "MEDIUM"), (0.0, "LOW")]
+
+# Keyed by component_taxonomy codes
+COMPONENT_SEVERITY = {
+    "SERVICE BRAKES": 1.0, "STEERING": 1.0, "AIR BAGS": 0.9, "FUEL SYSTEM": 0.9,
+    "VEHICLE SPEED CONTROL": 0.9, "FORWARD COLLISION AVOIDANCE": 0.9, "PARKING BRAKE": 0.8,
+    "TIRES": 0.8, "WHEELS": 0.8, "SEAT BELTS": 0.8, "ELECTRONIC STABILITY CONTROL": 0.8,
+    "SUSPENSION": 0.7, "HYBRID PROPULSION SYSTEM": 0.7, "ENGINE": 0.6, "POWER TRAIN": 0.6,
+    "STRUCTURE": 0.6, "ELECTRICAL SYSTEM": 0.5, "LANE DEPARTURE": 0.5, "EXTERIOR LIGHTING": 0.4,
+    "VISIBILITY": 0.4, "LATCHES/LOCKS/LINKAGES": 0.4, "SEATS": 0.3,
+}
+
+# 10th VIN character -> model year (cycle repeats every 30 years)
+_VIN_YEAR_CODES = "ABCDEFGHJKLMNPRSTVWXY123456789"
+_VIN_TRANSLIT = {**{str(d): d for d in range(10)},
+                 **dict(zip("ABCDEFGH", range(1, 9))), **dict(zip("JKLMN", range(1, 6))),
+                 "P": 7, "R": 9, **dict(zip("STUVWXYZ", range(2, 10)))}
+_VIN_WEIGHTS = [8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2]
+_VIN_RE = re.compile(r"^[A-HJ-NPR-Z0-9]{17}$")
+# WMI ranges assigned to North America (US 1/4/5 and 7F-7Z, Canada 2, Mexico 3), where
+# the position-9 check digit and the position-10 model year are mandatory
+_NA_WMI = re.compile(r"^(?:[1-5]|7[F-Z])")
+
+# --- FIELD PARSING ---
+def _value(record, field):
+    """Field value with sheet placeholders ("", "None") treated as missing."""
+    value = record.get(field)
+    return None if value is None or str(value).strip() in ("", "None") else value
+
+def _yes(value):
+    return str(value or "").strip().upper() in ("YES", "Y", "TRUE", "1")
+
+def _number(value):
+    match = re.search(r"\d+(?:\.\d+)?", str(value or "").replace(",", ""))
+    return float(match.group()) if match else 0.0
+
+def component_severity(component, description=None):
+    """Severity of the component's canonical code; the description is used when Component names none."""
+    code = component_taxonomy.canonical(component, fallback=description)
+    return COMPONENT_SEVERITY.get(code, 0.2)
+
+def north_american_vin(vin):
+    """True if the VIN's maker prefix (WMI) is a North American one."""
+    return bool(_NA_WMI.match(str(vin or "").strip().upper()))
+
+def vin_is_valid(vin):
+    """17 chars, no I/O/Q, and for North American VINs a correct check digit in position 9."""
+    vin = str(vin or "").strip().upper()
+    if not _VIN_RE.match(vin):
+        return False
+    if not north_american_vin(vin):
+        # Elsewhere position 9 is the maker's own, not a check digit
+        return True
+    total = sum(_VIN_TRANSLIT[c] * w for c, w in zip(vin, _VIN_WEIGHTS))
+    check = total % 11
+    return vin[8] == ("X" if check == 10 else str(check))
+
+def vin_model_years(vin):
+    """Candidate model years encoded in a North American VIN (10th char), newest first."""
+    vin = str(vin or "").strip().upper()
+    if len(vin) != 17 or vin[9] not in _VIN_YEAR_CODES or not north_american_vin(vin):
+        return []
+    base = 1980 + _VIN_YEAR_CODES.index(vin[9])
+    return [base + 30, base]
+
+# --- FEATURES ---
+def build_features(records):
+    """Feature matrix (n_records x len(FEATURES)) for a list of record dicts."""
+    X = np.zeros((len(records), len(FEATURES)))
+    for i, r in enumerate(records):
+        crash, fire = _yes(r.get("Crash")), _yes(r.get("Fire"))
+        injured, deaths = _number(r.get("Injured")), _number(r.get("Deaths"))
+        speed = _number(r.get("Speed"))
+        vin = _value(r, "VIN")
+        model_year = int(_number(r.get("Model_Year")))
+        vin_years = vin_model_years(vin)
+
+        X[i] = [
+            crash,
+            fire,
+            injured,
+            deaths,
+            speed,
+            component_severity(_value(r, "Component"), _value(r, "Description")),
+            len(str(_value(r, "Description") or "")),
+            bool(vin) and not vin_is_valid(vin),
+            bool(vin_years and model_year) and model_year not in vin_years,
+            (injured > 0 or deaths > 0) and not crash and not fire,
+            speed > 150,
+            sum(1 for f in ("Make", "Model", "Description") if not _value(r, f)),
+        ]
+
+    # Vectorized squashing of the raw counts / magnitudes
+    X[:, 2] = np.log1p(X[:, 2])
+    X[:, 3] = np.log1p(X[:, 3])
+    X[:, 4] = np.clip(X[:, 4] / 70.0, 0, 2)
+    X[:, 6] = np.log1p(X[:, 6]) / np.log(500)
+    return X
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+# --- SCORING ---
+def score_features(X):
+    """Return (risk_probability, suspicion_score_0_100) arrays."""
+    risk = _sigmoid(X @ RISK_WEIGHTS + RISK_BIAS)
+    suspicion = np.rint(100 * _sigmoid(X @ SUSPICION_WEIGHTS + SUSPICION_BIAS)).astype(int)
+    return risk, suspicion
+
+def risk_level(probability):
+    for threshold, level in RISK_LEVELS:
+        if probability >= threshold:
+            return level
+    return "LOW"
+
+def score_records(records):
+    """Batch score record dicts. Returns a list of (User_Risk_Level, Suspicion_Score)."""
+    if not records:
+        return []
+    risk, suspicion = score_features(build_features(records))
+    return [(risk_level(p), str(s)) for p, s in zip(risk, suspicion)]
+
+def score_record(record):
+    return score_records([record])[0]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-score exported complaint rows.")
+    parser.add_argument("input", help="CSV export of the report sheet (header row optional)")
+    parser.add_argument("--top", type=int, default=20, help="number of most severe rows to print")
+    args = parser.parse_args(argv)
+
+    with open(args.input, newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    # Columns by header name when the export has one (older sheets lack Report_ID)
+    header = utils.COMPLAINT_FIELDS
+    if rows and rows[0][:2] == utils.COMPLAINT_FIELDS[:2]:
+        header, rows = rows[0], rows[1:]
+    records = [dict(zip(header, row)) for row in rows]
+
+    risk, suspicion = score_features(build_features(records))
+    order = np.argsort(-risk)[:args.top]
+    for i in order:
+        r = records[i]
+        print(f"{risk_level(risk[i]):8} {risk[i]:.2f}  suspicion={suspicion[i]:3d}  "
+              f"{r.get('Make', '')} {r.get('Model', '')}  {str(r.get('Description', ''))[:60]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Server-side store for resumable chat sessions.
+
+The browser keeps only a random token in the URL (?sid=...). The collected
+record, attempt counts and message history live here, serialized as
+zlib-compressed JSON:
+- hot tier:  in-memory LRU with a TTL, so most reads never touch disk
+- durable tier: SQLite in DATA_DIR; every put is written through, so a
+  server restart loses nothing. Expired rows are purged on open and then
+  every PURGE_INTERVAL_S.
+
+A page refresh or websocket reconnect restores complaint_bot / feedback_bot
+state with a single lookup instead of starting over (and re-paying for the
+LLM calls).
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import streamlit as st
+
+import shared_utils as utils
+from conversation_memory import ConversationMemory
+
+SESSION_TTL_S = 2 * 60 * 60
+MEMORY_MAX_SESSIONS = 1000
+PURGE_INTERVAL_S = 10 * 60
+DB_FILE = "sessions.sqlite3"
+QUERY_PARAM = "sid"
+
+# Session-state keys persisted for each flow (api_session_*: the turn API's
+# session for this conversation, see turn_api.remote_turn)
+FLOW_KEYS = {
+    "COMPLAINT": ["page", "record", "locked_fields", "attempt_counts",
+                  "no_extraction_count", "messages", "report_id", "started_at", "api_session_COMPLAINT"],
+    "FEEDBACK": ["fb_page", "fb_record", "fb_messages", "api_session_FEEDBACK"],
+}
+
+# --- SERIALIZATION ---
+def _encode(value):
+    if isinstance(value, ConversationMemory):
+        return {"__memory__": value.to_dict()}
+    if isinstance(value, set):
+        return {"__set__": sorted(value)}
+    return value
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "__memory__" in value:
+            return ConversationMemory.from_dict(value["__memory__"])
+        if "__set__" in value:
+            return set(value["__set__"])
+    return value
+
+def encode(data):
+    """State dict -> JSON-safe dict (sets and ConversationMemory tagged)."""
+    return {k: _encode(v) for k, v in data.items()}
+
+def decode(data):
+    return {k: _decode(v) for k, v in data.items()}
+
+def dumps(data):
+    return zlib.compress(json.dumps(encode(data), separators=(",", ":"), default=str).encode())
+
+def loads(blob):
+    return decode(json.loads(zlib.decompress(blob)))
+
+def upgrade(flow, data):
+    """Rename keys in sessions stored before the current FLOW_KEYS (feedback used to share "record")."""
+    if flow == "FEEDBACK" and "record" in data and "fb_record" not in data:
+        data["fb_record"] = data.pop("record")
+    return data
+
+# --- STORE ---
+class SessionStore:
+    """
+    LRU + TTL in-memory cache of serialized sessions in front of SQLite.
+    write_through=False only spills LRU victims (sessions are lost on restart);
+    max_sessions=0 turns the hot tier off so SQLite is the only copy.
+    """
+
+    def __init__(self, path=None, max_sessions=MEMORY_MAX_SESSIONS, ttl=SESSION_TTL_S,
+                 write_through=True):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.write_through = write_through
+        self._hot = OrderedDict()          # key -> (expires_at, blob)
+        self._lock = threading.Lock()
+        self._db = None
+        self._next_purge = 0.0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (key TEXT PRIMARY KEY, expires REAL NOT NULL, "
+                "data BLOB NOT NULL, version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(sessions)")]
+            if "version" not in columns:
+                self._db.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            self.purge_expired()
+
+    def get(self, key):
+        """Return the stored dict for key, or None if unknown or expired."""
+        now = time.time()
+        with self._lock:
+            if not self.max_sessions:
+                blob = self._get_db(key, now)
+                return loads(blob) if blob is not None else None
+            entry = self._hot.get(key)
+            if entry is not None:
+                if entry[0] < now:
+                    del self._hot[key]
+                    return None
+                self._hot.move_to_end(key)
+                self._hot[key] = (now + self.ttl, entry[1])
+                return loads(entry[1])
+
+            blob = self._get_db(key, now)
+            if blob is None:
+                return None
+            # Promote back to the hot tier
+            self._put_hot(key, blob, now)
+            return loads(blob)
+
+    def put(self, key, data):
+        blob = dumps(data)
+        now = time.time()
+        with self._lock:
+            if self.max_sessions:
+                self._put_hot(key, blob, now)
+            if self._db is not None and (self.write_through or not self.max_sessions):
+                self._spill(key, now + self.ttl, blob)
+            if now >= self._next_purge:
+                self._purge(now)
+
+    # --- optimistic concurrency (SQLite only, for stores without a hot tier) ---
+    def get_versioned(self, key):
+        """(data, version) from SQLite, or (None, None) if unknown or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT expires, data, version FROM sessions WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[0] < now:
+            return None, None
+        return loads(row[1]), row[2]
+
+    def put_versioned(self, key, data, version):
+        """
+        Store data only if the stored version is still `version` (None: the key
+        must be new). Returns False if another writer got there first.
+        """
+        blob = dumps(data)
+        expires = time.time() + self.ttl
+        with self._lock:
+            if version is None:
+                cursor = self._db.execute(
+                    "INSERT OR IGNORE INTO sessions (key, expires, data) VALUES (?, ?, ?)",
+                    (key, expires, blob),
+                )
+            else:
+                cursor = self._db.execute(
+                    "UPDATE sessions SET expires = ?, data = ?, version = version + 1 "
+                    "WHERE key = ? AND version = ?",
+                    (expires, blob, key, version),
+                )
+            self._hot.pop(key, None)
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        with self._lock:
+            self._hot.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge(time.time())
+
+    def stats(self):
+        with self._lock:
+            hot_bytes = sum(len(blob) for _, blob in self._hot.values())
+            return {"hot_sessions": len(self._hot), "hot_bytes": hot_bytes}
+
+    def _get_db(self, key, now):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT expires, data FROM sessions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] < now:
+            return None
+        return row[1]
+
+    def _purge(self, now):
+        self._next_purge = now + PURGE_INTERVAL_S
+        for key in [k for k, (exp, _) in self._hot.items() if exp < now]:
+            del self._hot[key]
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE expires < ?", (now,))
+
+    def _put_hot(self, key, blob, now):
+        self._hot[key] = (now + self.ttl, blob)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.max_sessions:
+            old_key, (expires, old_blob) = self._hot.popitem(last=False)
+            if expires >= now and self._db is not None and not self.write_through:
+                self._spill(old_key, expires, old_blob)
+
+    def _spill(self, key, expires, blob):
+        self._db.execute(
+            "INSERT INTO sessions (key, expires, data) VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+            "expires = excluded.expires, data = excluded.data, version = version + 1",
+            (key, expires, blob),
+        )
+
+@st.cache_resource
+def get_store():
+    """One store per server process, shared by all sessions."""
+    return SessionStore(os.path.join(utils.DATA_DIR, DB_FILE))
+
+# --- STREAMLIT INTEGRATION ---
+def _session_id():
+    sid = st.query_params.get(QUERY_PARAM)
+    if not sid:
+        sid = secrets.token_urlsafe(16)
+        st.query_params[QUERY_PARAM] = sid
+    return sid
+
+def resume(flow):
+    """
+    Restore this flow's state from the store, once per browser session.
+    Call at the top of the flow's run() before its own initialization.
+    """
+    sid = _session_id()
+    resumed = st.session_state.setdefault("resumed_flows", set())
+    if flow in resumed:
+        return False
+    resumed.add(flow)
+
+    data = get_store().get(f"{sid}:{flow}")
+    if not data:
+        return False
+    upgrade(flow, data)
+    for key, value in data.items():
+        st.session_state[key] = value
+    return True
+
+def save(flow):
+    """Persist this flow's state. Call at the end of every script run."""
+    sid = st.query_params.get(QUERY_PARAM)
+    if not sid or flow not in st.session_state.get("resumed_flows", ()):
+        return
+    data = {k: st.session_state[k] for k in FLOW_KEYS[flow] if k in st.session_state}
+    if data:
+        get_store().put(f"{sid}:{flow}", data)
+
+def clear_session():
+    """Forget the stored conversation and start a fresh session."""
+    sid = st.query_params.get(QUERY_PARAM)
+    if sid:
+        for flow in FLOW_KEYS:
+            get_store().delete(f"{sid}:{flow}")
+        del st.query_params[QUERY_PARAM]
+    st.session_state.clear()
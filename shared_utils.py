@@ -1,4 +1,5 @@
 import streamlit as st
+import os
 import time
 import requests
 import re
@@ -6,9 +7,20 @@ import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime
 
+import component_taxonomy
+import conversation_memory
+import date_normalizer
+import llm_json
+
 # --- CONFIGURATION ---
 SHEET_NAME = "Safety_Reports"
 
+# Local working directory for checkpoints, indexes and caches
+DATA_DIR = os.environ.get("COMPLAINT_BOT_DATA_DIR", ".data")
+
+# Optional turn API (turn_api.py); when set, the chat pages run turns remotely
+TURN_API_URL = os.environ.get("COMPLAINT_BOT_TURN_API")
+
 MODEL_CHAT = "Qwen/Qwen2.5-3B-Instruct"       
 MODEL_CLASSIFY = "facebook/bart-large-cnn"    
 
@@ -17,15 +29,17 @@ COMPLAINT_FIELDS = [
     "Speed", "Crash", "Fire", "Injured", "Deaths", "Description",
     "Component", "Mileage", "Technician_Notes",
     "Brake_Condition", "Engine_Temperature", "Date_Complaint",
-    "Input_Length", "Suspicion_Score", "User_Risk_Level"
+    "Input_Length", "Suspicion_Score", "User_Risk_Level", "Report_ID"
 ]
 
 FEEDBACK_FIELDS = ["Feedback_Timestamp", "Feedback_Topic", "Feedback_Cause_Help"]
 
-AUTOMATED_FIELDS = [
-    "Timestamp", "Input_Length", "Suspicion_Score", "User_Risk_Level", 
-    "Technician_Notes", "Brake_Condition", "Engine_Temperature"
-]
+# Filled by the app when a complaint is submitted, never asked or shown for review
+AUTO_FIELDS = ["Timestamp", "Input_Length", "Suspicion_Score", "User_Risk_Level", "Report_ID"]
+
+AUTOMATED_FIELDS = AUTO_FIELDS + ["Technician_Notes", "Brake_Condition", "Engine_Temperature"]
+
+SHEET_HEADER = COMPLAINT_FIELDS + FEEDBACK_FIELDS
 
 FIELD_DESCRIPTIONS = {
     "Make": "the vehicle brand (like Toyota, Ford)",
@@ -60,7 +74,7 @@ def initialize_session_state():
         st.session_state.attempt_counts = {}
     
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        st.session_state.messages = conversation_memory.ConversationMemory()
     
     if "mode" not in st.session_state:
         st.session_state.mode = None
@@ -74,11 +88,26 @@ def get_api_key():
         return st.secrets["huggingface"]["api_key"]
     except:
         return None
-def query_llm(messages, max_tokens=150, temperature=0.7):
+# Cleared the first time the router rejects response_format for our model
+_json_mode_supported = True
+
+# query_llm returns failures as text starting with one of these
+LLM_ERROR_PREFIXES = ("Error: API Key missing", "API Error", "Request Error", "Unexpected response format")
+
+class LLMUnavailable(Exception):
+    """The LLM request itself failed (network, HTTP error, missing key), not its content."""
+
+def llm_failed(reply):
+    return isinstance(reply, str) and reply.startswith(LLM_ERROR_PREFIXES)
+
+def query_llm(messages, max_tokens=150, temperature=0.7, json_mode=False):
     """
     Generic wrapper for Hugging Face Router (OpenAI-compatible).
     Uses Qwen/Qwen2.5-3B-Instruct model.
+    json_mode asks the router for a JSON object reply (response_format),
+    falling back to a plain request if the provider doesn't support it.
     """
+    global _json_mode_supported
     api_key = get_api_key()
     if not api_key:
         return "Error: API Key missing."
@@ -95,6 +124,9 @@ def query_llm(messages, max_tokens=150, temperature=0.7):
         "temperature": temperature
     }
 
+    if json_mode and _json_mode_supported:
+        payload["response_format"] = {"type": "json_object"}
+
     try:
         response = requests.post(
             API_URL,
@@ -103,6 +135,11 @@ def query_llm(messages, max_tokens=150, temperature=0.7):
             timeout=8
         )
 
+        if response.status_code in (400, 422) and "response_format" in payload:
+            _json_mode_supported = False
+            del payload["response_format"]
+            response = requests.post(API_URL, headers=headers, json=payload, timeout=8)
+
         if response.status_code != 200:
             return f"API Error {response.status_code}: {response.text}"
 
@@ -130,41 +167,150 @@ def stream_text(text):
         yield word + " "
         time.sleep(0.02)
 
+_header_checked = False
+
+def get_worksheet():
+    """Open the report worksheet. Raises gspread.SpreadsheetNotFound if missing."""
+    global _header_checked
+    scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+    creds_dict = dict(st.secrets["gcp_service_account"])
+    creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
+    client = gspread.authorize(creds)
+    sheet = client.open(SHEET_NAME).sheet1
+    if not _header_checked:
+        migrate_header(sheet)
+        _header_checked = True
+    return sheet
+
+def migrate_header(sheet):
+    """
+    Insert complaint columns missing from an older sheet (e.g. Report_ID) at
+    their place in SHEET_HEADER, so the feedback columns and the rows already
+    under them move right together. Returns the names of inserted columns.
+    """
+    header = sheet.row_values(1)
+    if not header or header[0] != "Timestamp":
+        return []
+    inserted = []
+    for col, name in enumerate(COMPLAINT_FIELDS, start=1):
+        if name not in header:
+            sheet.insert_cols([[name]], col=col)
+            header.insert(col - 1, name)
+            inserted.append(name)
+    return inserted
+
+def record_to_row(record, mode):
+    """Flatten a record into a sheet row (COMPLAINT_FIELDS first, then FEEDBACK_FIELDS)."""
+    if mode == "COMPLAINT":
+        return [str(record.get(f, "")) for f in COMPLAINT_FIELDS]
+    if mode == "FEEDBACK":
+        row_data = ["" for _ in COMPLAINT_FIELDS]
+        row_data.extend([str(record.get(f, "")) for f in FEEDBACK_FIELDS])
+        return row_data
+    return []
+
 def save_to_sheet(record, mode):
     try:
-        scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        creds = Credentials.from_service_account_info(creds_dict, scopes=scope)
-        client = gspread.authorize(creds)
-        
         try:
-            sheet = client.open(SHEET_NAME).sheet1
+            sheet = get_worksheet()
         except gspread.SpreadsheetNotFound:
             st.error(f"Spreadsheet '{SHEET_NAME}' not found.")
             return False
 
-        row_data = []
         record["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        row_data = record_to_row(record, mode)
 
-        if mode == "COMPLAINT":
-            row_data = [str(record.get(f, "")) for f in COMPLAINT_FIELDS]
-        elif mode == "FEEDBACK":
-            row_data = ["" for _ in COMPLAINT_FIELDS]
-            row_data.extend([str(record.get(f, "")) for f in FEEDBACK_FIELDS])
-            
-        sheet.append_row(row_data)
+        response = sheet.append_row(row_data)
+        after_write([record], mode, first_row_of(response))
         return True
     except Exception as e:
         print(f"Database Error: {e}")
         return False
 
+def save_rows_to_sheet(records, mode, sheet=None):
+    """
+    Bulk variant of save_to_sheet: writes all records with a single append call.
+    Records that already carry a Timestamp (bulk_ingest keeps the source
+    row's) keep it; the rest get the current time. Returns True on success.
+    """
+    if not records:
+        return True
+    try:
+        if sheet is None:
+            sheet = get_worksheet()
+
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for record in records:
+            record["Timestamp"] = record.get("Timestamp") or timestamp
+            rows.append(record_to_row(record, mode))
+
+        response = sheet.append_rows(rows)
+        after_write(records, mode, first_row_of(response))
+        return True
+    except Exception as e:
+        print(f"Database Error: {e}")
+        return False
+
+def first_row_of(response):
+    """Sheet row number of the first appended row, from an append API response."""
+    try:
+        updated = response["updates"]["updatedRange"]
+        return int(re.search(r"![A-Z]+(\d+)", updated).group(1))
+    except Exception:
+        return None
+
+def after_write(records, mode, first_row=None):
+    """Keep local indexes in step with rows that were just written to the sheet."""
+    if mode != "COMPLAINT":
+        return
+    try:
+        import dedup_index
+        index = dedup_index.get_index()
+        for record in records:
+            index.add(record)
+    except Exception as e:
+        print(f"Index Error: {e}")
+    try:
+        import analytics_store
+        analytics_store.append_records(records, first_row)
+    except Exception as e:
+        print(f"Analytics Error: {e}")
+    try:
+        import report_ids
+        rows = [first_row + i for i in range(len(records))] if first_row else None
+        report_ids.get_index().add(records, rows)
+    except Exception as e:
+        print(f"Report Index Error: {e}")
+
+def finalize_complaint_record(record):
+    """Fill the automated fields right before a complaint is written."""
+    import report_ids
+    import risk_scoring
+    # Assigned once, so a retried write keeps the same ID
+    if not record.get("Report_ID"):
+        record["Report_ID"] = report_ids.new_id()
+    # Only what the user supplied: not the ID, timestamp or earlier scores
+    record["Input_Length"] = len("".join(str(v) for f, v in record.items() if v and f not in AUTO_FIELDS))
+    record["User_Risk_Level"], record["Suspicion_Score"] = risk_scoring.score_record(record)
+    return record
+
 # --- LLM EXTRACTION ---
-def extract_all_fields_from_text(user_text, remaining_fields, current_record):
+def extract_all_fields_from_text(user_text, remaining_fields, current_record, anchor=None, strict=False):
     """
     Uses LLM to extract JSON data from user text.
     Handles out-of-order and complex inputs.
+    anchor (session start) is "today" for relative dates.
+    With strict, a failed LLM request raises LLMUnavailable instead of
+    looking like a message with nothing in it (bulk_ingest retries those).
     """
     import json
+
+    # A bare date answer ("last Tuesday") needs no LLM
+    if "Date_Complaint" in remaining_fields:
+        only = date_normalizer.only_date(user_text, anchor)
+        if only:
+            return {"Date_Complaint": only.isoformat()}
     
     # Filter fields to only look for relevant ones to save tokens/confusion
     relevant_fields = {k: v for k, v in FIELD_DESCRIPTIONS.items() 
@@ -183,6 +329,7 @@ def extract_all_fields_from_text(user_text, remaining_fields, current_record):
     4. For 'Crash', 'Fire': extract "YES" or "NO" if explicitly stated.
     5. 'Injured', 'Deaths': extract numbers.
     6. Extract as much as possible, even if out of order.
+    7. 'Date_Complaint': copy the user's own words for when it happened (e.g. "3 weeks ago"), don't convert them.
     """
     
     messages = [
@@ -190,29 +337,83 @@ def extract_all_fields_from_text(user_text, remaining_fields, current_record):
         {"role": "user", "content": user_text}
     ]
     
-    response_text = query_llm(messages, max_tokens=300, temperature=0.1)
-    
-    try:
-        # cleanup json if LLM adds markdown
-        json_str = response_text.replace("```json", "").replace("```", "").strip()
-        data = json.loads(json_str)
-        return data
-    except:
-        return {}
+    response_text = query_llm(messages, max_tokens=300, temperature=0.1, json_mode=True)
+    if strict and llm_failed(response_text):
+        raise LLMUnavailable(response_text[:200])
+
+    # Tolerant decode: prose, single quotes or a reply cut off at max_tokens
+    # still yield whatever fields were complete
+    extracted = llm_json.decode(response_text, "extract") or {}
+
+    # Component comes from the local taxonomy, mapped from the part the LLM
+    # extracted only; if none was named, the user is asked rather than guessing
+    # from incidental words in the message or description
+    if extracted.get("Component"):
+        code = component_taxonomy.canonical(extracted["Component"])
+        if code:
+            extracted["Component"] = code
+
+    # The LLM picks out which words are the date; the local parser turns that
+    # span (not the whole message) into YYYY-MM-DD against the session anchor
+    if extracted.get("Date_Complaint"):
+        found = date_normalizer.parse(extracted["Date_Complaint"], anchor)
+        if found:
+            extracted["Date_Complaint"] = found.isoformat()
+
+    # State from the offline gazetteer: names become codes, and with the complete
+    # Census list an unambiguous city implies its state, so "Los Angeles" alone
+    # doesn't cost a follow-up
+    import gazetteer
+    if extracted.get("State"):
+        extracted["State"] = gazetteer.state_code(extracted["State"]) or extracted["State"]
+    elif "State" in remaining_fields:
+        state = gazetteer.infer_state(extracted.get("City") or current_record.get("City") or "")
+        if state:
+            extracted["State"] = state
+    return extracted
 
 # --- LLM VALIDATION ---
-def validate_field(field, value):
+def validate_field(field, value, locked_fields=None, record=None, anchor=None):
     """
     Uses LLM to validate the field value.
     Returns (is_valid, clean_value, error_message)
+
+    locked_fields defaults to the Streamlit session's set; batch callers
+    pass their own per-record set. record (the values known so far) lets
+    City / State be checked against each other and dates against
+    Model_Year; anchor is "today" for relative dates.
     """
     val = str(value).strip()
 
-    if field in st.session_state.locked_fields:
+    if locked_fields is None:
+        locked_fields = st.session_state.locked_fields
+
+    if field in locked_fields:
         return False, value, f"❌ {field} is already confirmed. (Type 'yes' to unlock)"
 
-    import json
-    
+    if field == "Component":
+        # Canonical code from the local taxonomy; no LLM call
+        code = component_taxonomy.canonical(val)
+        if not code and val.lower() in component_taxonomy.OTHER_ANSWERS:
+            code = component_taxonomy.OTHER
+        if not code:
+            return False, value, (f"I couldn't tell which part '{val}' is. Which part failed "
+                                  f"(like brakes, steering, air bags, engine)? 'Not sure' is fine too.")
+        return True, code, None
+
+    if field == "Date_Complaint":
+        # Parsed locally; future dates and dates before the vehicle existed are rejected.
+        # Not locked: the date may be inferred from a phrase, so the user can still correct it
+        clean, error = date_normalizer.normalize(val, anchor, (record or {}).get("Model_Year"))
+        if error:
+            return False, value, error
+        return True, clean, None
+
+    if field in ("City", "State"):
+        location = validate_location(field, val, record or {})
+        if location:
+            return location
+
     system_prompt = f"""You are a data validator. Validate the value '{value}' for the field '{field}'.
     Field Description: {FIELD_DESCRIPTIONS.get(field, 'No description')}
     
@@ -235,23 +436,58 @@ def validate_field(field, value):
         {"role": "user", "content": f"Validate {field}: {value}"}
     ]
     
-    response_text = query_llm(messages, max_tokens=150, temperature=0.1)
+    response_text = query_llm(messages, max_tokens=150, temperature=0.1, json_mode=True)
     
-    try:
-        json_str = response_text.replace("```json", "").replace("```", "").strip()
-        result = json.loads(json_str)
-        
-        if result["is_valid"]:
-            # Hard code locking logic for critical fields
-            if field in ["VIN", "Date_Complaint"]:
-                st.session_state.locked_fields.add(field)
-            return True, result["clean_value"], None
-        else:
-            return False, value, result["error_msg"]
-    except:
+    result = llm_json.decode(response_text, "validate")
+    if not result or "is_valid" not in result:
         # Fallback to true if LLM fails, to not block user
         return True, value, None
 
+    is_valid = result["is_valid"]
+    if isinstance(is_valid, str):
+        is_valid = is_valid.strip().lower() in ("true", "yes")
+
+    if is_valid:
+        # Hard code locking logic for critical fields
+        if field == "VIN":
+            locked_fields.add(field)
+        return True, result.get("clean_value", value), None
+    else:
+        return False, value, result.get("error_msg") or f"{field} looks invalid."
+
+def validate_location(field, value, record):
+    """
+    City / State checked against the offline gazetteer.
+    Returns (is_valid, clean_value, error_message), or None to fall back to
+    the LLM (a city the gazetteer doesn't know).
+    """
+    import gazetteer
+    if field == "State":
+        code = gazetteer.state_code(value)
+        if not code:
+            return False, value, f"I don't recognize '{value}' as a US state. Could you give the state name or its 2-letter code (like CA, TX)?"
+        city = record.get("City")
+        if city:
+            ok, place = gazetteer.check_pair(city, code)
+            if not ok:
+                return False, value, f"I couldn't find {city} in {code}. Did you mean {place['city']}, {place['state']}?"
+        return True, code, None
+
+    state = gazetteer.state_code(record.get("State")) if record.get("State") else None
+    # Spelling fixes only against the complete list: the bundled one would turn
+    # a real small town into the nearest big city
+    if gazetteer.is_complete():
+        place = gazetteer.find(value, state)
+    else:
+        place = next(iter(gazetteer.lookup(value, state)), None)
+    if place:
+        return True, place["city"], None
+    if state:
+        ok, place = gazetteer.check_pair(value, state)
+        if not ok:
+            return False, value, f"I couldn't find {value} in {state}. Did you mean {place['city']}, {place['state']}?"
+    return None
+
 # --- LLM RESPONSE GENERATION ---
 def generate_ai_response(messages, record, remaining_fields, mode="COMPLAINT"):
     """
@@ -328,27 +564,37 @@ def generate_small_talk_response(messages, remaining_fields):
     ], max_tokens=80)
 
 # --- LLM RESPONSE GENERATION ---
-def generate_ai_response(messages, record, remaining_fields, mode="COMPLAINT"):
+def generate_ai_response(messages, record, remaining_fields, mode="COMPLAINT", attempt_counts=None):
     """
     Uses LLM to generate the next helpful conversational response.
+    attempt_counts defaults to the Streamlit session's counts.
     """
     # Simply critical and next fields
     critical = [f for f in ["VIN", "Make", "Model", "Description"] if f in remaining_fields]
     next_up = remaining_fields[:3] if remaining_fields else []
     
+    if attempt_counts is None:
+        attempt_counts = st.session_state["attempt_counts"]
+
     # Force VIN after failed attempts
-    # Note: Accessing st.session_state directly here as it's a shared util for streamlit apps
-    if "VIN" in remaining_fields and st.session_state["attempt_counts"].get("VIN", 0) > 0:
+    if "VIN" in remaining_fields and attempt_counts.get("VIN", 0) > 0:
         return "⚠️ I still need the **VIN** (17-character code). This is required to proceed."
     
     # Check if user is stuck on VIN (attempt count > 0)
-    vin_stuck = "VIN" in remaining_fields and st.session_state["attempt_counts"].get("VIN", 0) > 0
+    vin_stuck = "VIN" in remaining_fields and attempt_counts.get("VIN", 0) > 0
+
+    # Bounded memory: a rolling summary of the structured state plus only the
+    # newest turns verbatim, whatever the length of the conversation
+    memory = messages
+    if not isinstance(memory, conversation_memory.ConversationMemory):
+        memory = conversation_memory.ConversationMemory(messages)
+    summary = memory.summarize(record, attempt_counts)
     
     system_prompt = f"""You are a professional safety reporting assistant.
     Current Mode: {mode}
     
     Context:
-    - Collected so far: {record}
+    {summary}
     - Critical missing: {critical}
     - Next fields to ask: {next_up}
     - User struggling with VIN: {vin_stuck}
@@ -364,8 +610,7 @@ def generate_ai_response(messages, record, remaining_fields, mode="COMPLAINT"):
     
     # tailored messages for context
     chat_context = [{"role": "system", "content": system_prompt}]
-    # Add last few messages for context
-    chat_context.extend(messages[-3:])
+    chat_context.extend(memory.context())
     
     response = query_llm(chat_context, max_tokens=150, temperature=0.5)
     return response
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Modules live at the repo root; keep their DATA_DIR out of the working tree
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("COMPLAINT_BOT_DATA_DIR", tempfile.mkdtemp(prefix="complaint_bot_tests_"))
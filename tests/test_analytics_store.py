@@ -0,0 +1,105 @@
+import multiprocessing
+
+import pytest
+
+import analytics_store
+import report_ids
+import shared_utils as utils
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(report_ids, "get_index", lambda: type("I", (), {"add": lambda self, r, rows: 0})())
+    return tmp_path
+
+
+def complaint(month="2024-05", **fields):
+    record = {f: "" for f in utils.COMPLAINT_FIELDS}
+    record.update(Timestamp=f"{month}-02 10:00:00", Make="Honda", Model="Civic", State="CA",
+                  Component="brakes", Description="Brakes failed on the highway")
+    record.update(fields)
+    return record
+
+
+class FakeSheet:
+    """Worksheet stand-in with the calls sync_from_sheet makes."""
+
+    def __init__(self, records):
+        self.rows = [list(utils.SHEET_HEADER)] + [[r.get(f, "") for f in utils.SHEET_HEADER] for r in records]
+
+    def row_values(self, n):
+        return list(self.rows[n - 1]) if len(self.rows) >= n else []
+
+    def get_values(self, rng):
+        first, last = (int("".join(c for c in part if c.isdigit())) for part in rng.split(":"))
+        return self.rows[first - 1:last]
+
+
+def test_append_records_stores_typed_rows():
+    records = [complaint(Crash="YES", Injured="2 people"), complaint(month="2024-06", Make="Ford", Fire="yes"),
+               {f: "" for f in utils.COMPLAINT_FIELDS}]
+    assert analytics_store.append_records(records, first_row=2) == 2
+    table = analytics_store.load_table()
+    assert table.num_rows == 2
+    rows = {r["Make"]: r for r in table.to_pylist()}
+    assert rows["Honda"]["Component"] == "SERVICE BRAKES"
+    assert rows["Honda"]["Crash_Flag"] and rows["Honda"]["Injured_N"] == 2
+    assert rows["Ford"]["Fire_Flag"] and rows["Ford"]["Sheet_Row"] == 3
+    assert analytics_store.load_table(months=["2024-06"]).num_rows == 1
+    # The empty row was still a sheet row; row 1 (the header) is left to sync_from_sheet
+    assert analytics_store._read_json(analytics_store.SYNC_FILE, None) == {"cursor": 0, "ahead": [2, 3, 4]}
+
+
+def test_rollups_and_summary():
+    analytics_store.append_records([complaint(Crash="YES", Deaths="1"), complaint(Make="Ford"),
+                                    complaint(month="2024-06", Component="air bag", Fire="YES")])
+    rollups = analytics_store.load_rollups()
+    may = rollups["months"]["2024-05"]
+    assert may["reports"] == 2 and may["crashes"] == 1 and may["deaths"] == 1
+    assert may["by_make_model"] == {"Honda|Civic": 1, "Ford|Civic": 1}
+    assert rollups["last_month"] == "2024-06"
+    headline = analytics_store.summary()
+    assert headline["total_reports"] == 3 and headline["fires"] == 1
+    assert headline["top_component"] == ("Service Brakes", 2)
+
+
+def test_group_counts():
+    analytics_store.append_records([complaint(), complaint(Crash="YES"), complaint(Make="Ford", Injured="3")])
+    result = analytics_store.group_counts("Make").to_pylist()
+    assert result[0] == {"Make": "Honda", "reports": 2, "crashes": 1, "fires": 0, "injured": 0, "deaths": 0}
+    assert result[1]["Make"] == "Ford" and result[1]["injured"] == 3
+    assert analytics_store.group_counts(["Make", "Model"], top=1).num_rows == 1
+    assert analytics_store.group_counts("Make", months=["1999-01"]).num_rows == 0
+
+
+def test_sync_pulls_only_rows_not_yet_stored():
+    records = [complaint(Make=make) for make in ("Honda", "Ford", "Kia", "Mazda")]
+    sheet = FakeSheet(records)
+    # Rows 2 and 4 were appended by this process as they were written
+    analytics_store.append_records([records[0]], rows=[2])
+    analytics_store.append_records([records[2]], rows=[4])
+    assert analytics_store.sync_from_sheet(sheet) == 2
+    assert sorted(analytics_store.load_table(columns=["Make"])["Make"].to_pylist()) == ["Ford", "Honda", "Kia", "Mazda"]
+    assert analytics_store._read_json(analytics_store.SYNC_FILE, None) == {"cursor": 5, "ahead": []}
+    assert analytics_store.sync_from_sheet(sheet) == 0
+
+
+def _append_many(data_dir, make, rows):
+    utils.DATA_DIR = data_dir
+    for row in rows:
+        analytics_store.append_records([complaint(Make=make)], rows=[row])
+
+
+def test_concurrent_processes_keep_every_update(store_dir):
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_append_many, args=(str(store_dir), f"Make{i}", range(2 + i, 82, 4)))
+             for i in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(60)
+        assert proc.exitcode == 0
+    assert analytics_store.load_rollups()["months"]["2024-05"]["reports"] == 80
+    assert analytics_store.load_table().num_rows == 80
+    assert analytics_store._read_json(analytics_store.SYNC_FILE, None)["ahead"] == list(range(2, 82))
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+import bulk_ingest
+import dedup_index
+import shared_utils as utils
+
+TEXTS = [
+    "The brakes failed on the highway and the pedal went to the floor without warning",
+    "Steering wheel locked up while turning into a parking lot at low speed yesterday",
+    "The engine stalled at a red light and would not restart for twenty minutes",
+]
+
+
+class FakeSheet:
+    def __init__(self):
+        self.rows = []
+
+    def append_rows(self, rows, **kwargs):
+        first = len(self.rows) + 2
+        self.rows.extend(rows)
+        return {"updates": {"updatedRange": f"Sheet1!A{first}:Z{len(self.rows) + 1}"}}
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    """Offline LLM: extraction reads the row's Make/Model; 'OUTAGE' in the text fails in transport."""
+    outage = {"on": True}
+
+    def extract(text, remaining, record, anchor=None, strict=False):
+        if "OUTAGE" in text and outage["on"]:
+            raise utils.LLMUnavailable("Request Error: timed out")
+        return {"Description": text.replace(" OUTAGE", "")}
+
+    monkeypatch.setattr(utils, "extract_all_fields_from_text", extract)
+    monkeypatch.setattr(utils, "query_llm", lambda *a, **k: '{"is_valid": true}')
+    monkeypatch.setattr(dedup_index, "_index", dedup_index.DuplicateIndex(str(tmp_path / "dedup.bin")))
+    return outage
+
+
+def _write(tmp_path, rows):
+    path = tmp_path / "backlog.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    return str(path)
+
+
+def _run(path, tmp_path, sheet):
+    return bulk_ingest.run(path, concurrency=2, batch_size=2, sheet=sheet,
+                           checkpoint_path=str(tmp_path / "run.ckpt"),
+                           rejects_path=str(tmp_path / "rejects.jsonl"))
+
+
+def _rejects(tmp_path):
+    return [json.loads(line) for line in (tmp_path / "rejects.jsonl").read_text().splitlines()]
+
+
+def test_accepts_rejects_and_resumes(pipeline, tmp_path):
+    path = _write(tmp_path, [
+        {"text": TEXTS[0], "Make": "Honda", "Model": "Civic", "Timestamp": "2021-03-04T05:06:07"},
+        {"text": TEXTS[1], "Make": "Ford"},  # no Model
+        {"text": TEXTS[2], "Make": "Toyota", "Model": "Camry"},
+    ])
+    sheet = FakeSheet()
+    stats = _run(path, tmp_path, sheet)
+    assert (stats["accepted"], stats["rejected"]) == (2, 1)
+    assert _rejects(tmp_path)[0]["errors"] == {"Model": "missing"}
+    written = [dict(zip(utils.COMPLAINT_FIELDS, row)) for row in sheet.rows]
+    assert written[0]["Timestamp"] == "2021-03-04 05:06:07"
+    assert all(r["Report_ID"] for r in written)
+
+    # Everything is checkpointed: a rerun writes nothing
+    stats = _run(path, tmp_path, sheet)
+    assert stats["skipped"] == 3 and stats["accepted"] == stats["rejected"] == 0
+    assert len(sheet.rows) == 2
+
+
+def test_duplicates_are_rejected_within_and_across_runs(pipeline, tmp_path):
+    row = {"text": TEXTS[0], "Make": "Honda", "Model": "Civic"}
+    sheet = FakeSheet()
+    stats = _run(_write(tmp_path, [row, dict(row)]), tmp_path, sheet)
+    assert (stats["accepted"], stats["rejected"]) == (1, 1)
+    assert "_duplicate" in _rejects(tmp_path)[0]["errors"]
+
+    (tmp_path / "run.ckpt").unlink()
+    stats = _run(_write(tmp_path, [row]), tmp_path, sheet)
+    assert (stats["accepted"], stats["rejected"]) == (0, 1)
+
+
+def test_transport_failures_are_retried_on_resume(pipeline, tmp_path):
+    path = _write(tmp_path, [
+        {"text": TEXTS[0] + " OUTAGE", "Make": "Honda", "Model": "Civic"},
+        {"text": TEXTS[2], "Make": "Toyota", "Model": "Camry"},
+    ])
+    sheet = FakeSheet()
+    stats = _run(path, tmp_path, sheet)
+    assert (stats["accepted"], stats["rejected"], stats["unavailable"]) == (1, 0, 1)
+    assert not (tmp_path / "rejects.jsonl").read_text()
+
+    pipeline["on"] = False
+    stats = _run(path, tmp_path, sheet)
+    assert (stats["skipped"], stats["accepted"], stats["unavailable"]) == (1, 1, 0)
+    assert len(sheet.rows) == 2
+
+
+def test_strict_extraction_raises_on_transport_errors(monkeypatch):
+    monkeypatch.setattr(utils, "query_llm", lambda *a, **k: "Request Error: connection reset")
+    with pytest.raises(utils.LLMUnavailable):
+        utils.extract_all_fields_from_text("my brakes failed", ["Make"], {}, strict=True)
+    assert utils.extract_all_fields_from_text("my brakes failed", ["Make"], {}) == {}
@@ -0,0 +1,34 @@
+import json
+
+import component_taxonomy
+import shared_utils as utils
+
+
+def test_canonical_codes():
+    assert component_taxonomy.canonical("brakes") == "SERVICE BRAKES"
+    assert component_taxonomy.canonical("parking brake") == "PARKING BRAKE"
+    assert component_taxonomy.canonical("air bags") == "AIR BAGS"
+    assert component_taxonomy.canonical("a weird noise") is None
+
+
+def test_validate_component():
+    assert utils.validate_field("Component", "ABS module", set()) == (True, "SERVICE BRAKES", None)
+    assert utils.validate_field("Component", "not sure", set()) == (True, component_taxonomy.OTHER, None)
+    ok, value, error = utils.validate_field("Component", "the thing", set())
+    assert not ok and value == "the thing" and error
+
+
+def _extract(monkeypatch, reply, text):
+    monkeypatch.setattr(utils, "query_llm", lambda *a, **k: json.dumps(reply))
+    return utils.extract_all_fields_from_text(text, ["Component", "Description"], {})
+
+
+def test_extraction_maps_only_the_llm_component(monkeypatch):
+    extracted = _extract(monkeypatch, {"Component": "brake pedal"}, "my brake pedal went soft")
+    assert extracted["Component"] == "SERVICE BRAKES"
+
+
+def test_incidental_words_do_not_set_component(monkeypatch):
+    text = "I was at a stop light when the car behind hit me, I heard the engine"
+    extracted = _extract(monkeypatch, {"Description": text}, text)
+    assert "Component" not in extracted
@@ -0,0 +1,31 @@
+from conversation_memory import CONTEXT_BYTES, ConversationMemory
+
+def test_ring_buffer_counts_dropped_turns():
+    memory = ConversationMemory(max_turns=4)
+    for i in range(10):
+        memory.append({"role": "user", "content": str(i)})
+    assert [m["content"] for m in memory] == ["6", "7", "8", "9"]
+    assert memory.dropped == 6
+
+def test_context_is_bounded():
+    memory = ConversationMemory()
+    for i in range(40):
+        memory.append({"role": "user", "content": f"{i} " + "x" * 1500})
+    context = memory.context()
+    assert context[-1] is memory[-1]
+    assert sum(len(m["content"].encode()) for m in context) <= CONTEXT_BYTES
+    assert len(context) <= 3
+
+def test_summary_mentions_dropped_turns():
+    memory = ConversationMemory(max_turns=2)
+    for i in range(5):
+        memory.append({"role": "user", "content": str(i)})
+    summary = memory.summarize({"Make": "Honda", "Model": None}, {"VIN": 2})
+    assert "Make=Honda" in summary and "Model" not in summary
+    assert "VIN" in summary and "3 earlier messages" in summary
+
+def test_round_trip():
+    memory = ConversationMemory([{"role": "user", "content": "hi"}], max_turns=1)
+    memory.append({"role": "assistant", "content": "hello"})
+    restored = ConversationMemory.from_dict(memory.to_dict(), max_turns=1)
+    assert list(restored) == list(memory) and restored.dropped == 1
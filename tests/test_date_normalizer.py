@@ -0,0 +1,75 @@
+import json
+from datetime import date
+
+import pytest
+
+import date_normalizer
+import shared_utils as utils
+
+ANCHOR = "2024-05-10"  # a Friday
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("2024-05-02", date(2024, 5, 2)),
+    ("5/2/2024", date(2024, 5, 2)),
+    ("5/2", date(2024, 5, 2)),
+    ("on May 2", date(2024, 5, 2)),
+    ("Jan 5th", date(2024, 1, 5)),
+    ("January 5, 2023", date(2023, 1, 5)),
+    ("5th of May", date(2024, 5, 5)),
+    ("December 20", date(2023, 12, 20)),
+    ("yesterday", date(2024, 5, 9)),
+    ("the day before yesterday", date(2024, 5, 8)),
+    ("a couple of days ago", date(2024, 5, 8)),
+    ("3 weeks ago", date(2024, 4, 19)),
+    ("last week", date(2024, 5, 3)),
+    ("last Friday", date(2024, 5, 3)),
+    ("on Tuesday", date(2024, 5, 7)),
+])
+def test_phrases(text, expected):
+    assert date_normalizer.parse(text, ANCHOR) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("reporting this today but it happened 3 weeks ago", date(2024, 4, 19)),
+    ("2 days ago at 10/20 mph", date(2024, 5, 8)),
+    ("I may 2 times have seen it", None),
+    ("I drove 3 mar", None),
+    ("the light is on 24/7, it started on 5/2", date(2024, 5, 2)),
+    ("it happened yesterday, I took it in on 5/2", date(2024, 5, 9)),
+    ("we were going 60-70", None),
+])
+def test_free_text(text, expected):
+    assert date_normalizer.parse(text, ANCHOR) == expected
+
+
+def test_only_date():
+    assert date_normalizer.only_date("I think it was last Tuesday", ANCHOR) == date(2024, 5, 7)
+    assert date_normalizer.only_date("may 2", ANCHOR) == date(2024, 5, 2)
+    assert date_normalizer.only_date("my brakes failed last Tuesday", ANCHOR) is None
+
+
+def test_normalize_rejects_future_and_pre_vehicle_dates():
+    assert date_normalizer.normalize("yesterday", ANCHOR) == ("2024-05-09", None)
+    assert date_normalizer.normalize("2024-06-01", ANCHOR)[1]
+    assert date_normalizer.normalize("2015-01-01", ANCHOR, "2020")[1]
+    assert date_normalizer.normalize("sometime", ANCHOR)[1]
+
+
+def test_extraction_parses_only_the_llm_date_span(monkeypatch):
+    reply = {"Speed": "10", "Date_Complaint": "2 days ago"}
+    monkeypatch.setattr(utils, "query_llm", lambda *a, **k: json.dumps(reply))
+    extracted = utils.extract_all_fields_from_text("2 days ago at 10/20 mph", ["Date_Complaint", "Speed"], {}, ANCHOR)
+    assert extracted["Date_Complaint"] == "2024-05-08"
+
+
+def test_extraction_without_llm_date_leaves_it_unset(monkeypatch):
+    monkeypatch.setattr(utils, "query_llm", lambda *a, **k: json.dumps({"Speed": "45"}))
+    extracted = utils.extract_all_fields_from_text("I may 2 times have gone 45", ["Date_Complaint", "Speed"], {}, ANCHOR)
+    assert "Date_Complaint" not in extracted
+
+
+def test_validated_date_is_not_locked():
+    locked = set()
+    assert utils.validate_field("Date_Complaint", "3 weeks ago", locked, {}, ANCHOR) == (True, "2024-04-19", None)
+    assert "Date_Complaint" not in locked
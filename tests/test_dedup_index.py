@@ -0,0 +1,92 @@
+import numpy as np
+
+import dedup_index
+from dedup_index import DuplicateIndex
+
+DESCRIPTION = ("The brakes failed on the highway and the pedal went all the way "
+               "to the floor before the car finally stopped")
+
+def report(**fields):
+    record = {"VIN": "1HGBH41JXMN109186", "Make": "Honda", "Model": "Civic",
+              "Date_Complaint": "2024-05-02", "Description": DESCRIPTION}
+    record.update(fields)
+    return record
+
+def test_exact_match_on_vin_and_date():
+    index = DuplicateIndex()
+    index.add(report())
+    match = index.check(report(Description="something else entirely"))
+    assert match["kind"] == "exact"
+
+def test_near_match_same_vehicle():
+    index = DuplicateIndex()
+    index.add(report())
+    match = index.check(report(Date_Complaint="2024-05-03", Description=DESCRIPTION + "."))
+    assert match["kind"] == "near"
+    assert match["similarity"] >= dedup_index.NEAR_DUP_THRESHOLD
+
+def test_short_descriptions_are_not_compared():
+    index = DuplicateIndex()
+    index.add(report(Description="Brakes failed"))
+    assert index.check(report(Date_Complaint="2024-06-01", Description="brakes failed.")) is None
+
+def test_different_vehicle_is_not_a_near_duplicate():
+    index = DuplicateIndex()
+    index.add(report())
+    assert index.check(report(VIN="2T1BURHE0JC012345", Date_Complaint="2024-06-01")) is None
+    assert index.check(report(VIN="", Make="Ford", Model="F-150", Date_Complaint="2024-06-01")) is None
+
+def test_make_model_match_when_vin_missing():
+    index = DuplicateIndex()
+    index.add(report(VIN=""))
+    assert index.check(report(Date_Complaint="2024-06-01"))["kind"] == "near"
+    assert index.check(report(VIN="", Make="", Model="", Date_Complaint="2024-06-01")) is None
+
+def test_bucket_keeps_every_report():
+    index = DuplicateIndex()
+    index.add(report(VIN="", Make="Ford", Model="Focus"))
+    index.add(report(VIN="", Make="Toyota", Model="Camry"))
+    # Both share every bucket; each is still found for its own vehicle
+    for n, (make, model) in enumerate([("Ford", "Focus"), ("Toyota", "Camry")]):
+        match = index.check(report(VIN="", Make=make, Model=model, Date_Complaint="2024-06-01"))
+        assert (match["kind"], match["report"]) == ("near", n)
+
+def test_log_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "dedup.bin")
+    reader = DuplicateIndex(path)
+    writer = DuplicateIndex(path)
+    assert writer.add(report()) == 0
+    assert writer.add(report(VIN="2T1BURHE0JC012345")) == 1
+    # The reader picks up the other instance's writes on its next check
+    assert reader.check(report(Description="x"))["kind"] == "exact"
+    assert len(reader) == 2
+    assert len(DuplicateIndex(path)) == 2
+
+def test_bulk_load_matches_one_at_a_time(tmp_path):
+    path = str(tmp_path / "dedup.bin")
+    writer = DuplicateIndex(path)
+    records = [report(VIN="", Make=f"Make{i % 3}", Date_Complaint=f"2024-05-{i % 28 + 1:02d}",
+                      Description=DESCRIPTION + f" and then it happened again on trip {i % 5}")
+               for i in range(60)]
+    for record in records:
+        writer.add(record)
+    loaded = DuplicateIndex(path)
+    assert len(loaded) == 60
+    assert (loaded.chain[:60] == writer.chain[:60]).all()
+    for record in records[:10]:
+        probe = dict(record, Date_Complaint="2023-01-01")
+        assert loaded.check(probe) == writer.check(probe)
+
+def test_table_grows_in_bulk():
+    table = dedup_index._IntTable(8)
+    keys = np.arange(1, 5001, dtype=np.uint64) * np.uint64(0x9E3779B1)
+    table.put_many(keys, np.arange(5000, dtype=np.int32))
+    assert table.count == 5000
+    assert table.get(int(keys[1234])) == 1234
+    assert (table.get_many(keys) == np.arange(5000)).all()
+    assert table.get_many(np.array([7], dtype=np.uint64))[0] == -1
+
+def test_banding_recall_at_threshold():
+    # A pair at the threshold is a candidate at least 90% of the time
+    assert dedup_index.recall(dedup_index.NEAR_DUP_THRESHOLD) >= 0.9
+    assert dedup_index.recall(0.2) < 0.1
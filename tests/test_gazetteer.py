@@ -0,0 +1,163 @@
+import pytest
+
+import gazetteer
+import question_planner
+import shared_utils as utils
+
+REAL_PAIRS = [("Springfield", "OR"), ("Kent", "OH"), ("Salem", "MA"), ("Bloomington", "IL"),
+              ("Washington", "PA"), ("Lakewood", "NJ"), ("Columbia", "MD"), ("Portland", "TX"),
+              ("Richmond", "CA")]
+
+CENSUS_ROWS = [("Austin", "TX", 960000), ("Los Angeles", "CA", 3820000), ("Richmond", "VA", 228000),
+               ("Richmond", "CA", 115000), ("Kent", "WA", 135000), ("Kent", "OH", 28000),
+               ("Tustin", "CA", 80000)]
+
+
+@pytest.fixture
+def bundled(monkeypatch):
+    gaz = gazetteer.Gazetteer(*gazetteer.compile_places(gazetteer.bundled_rows()))
+    monkeypatch.setattr(gazetteer, "_gazetteer", gaz)
+    return gaz
+
+
+@pytest.fixture
+def census(monkeypatch, tmp_path):
+    gazetteer.build(CENSUS_ROWS, str(tmp_path), complete=True)
+    gaz = gazetteer.Gazetteer.load(str(tmp_path))
+    monkeypatch.setattr(gazetteer, "_gazetteer", gaz)
+    return gaz
+
+
+def test_state_code():
+    assert gazetteer.state_code("california") == "CA"
+    assert gazetteer.state_code("tx") == "TX"
+    assert gazetteer.state_code("Calif.") == "CA"
+    assert gazetteer.state_code("Narnia") is None
+
+
+def test_lookup_and_fuzzy(bundled):
+    assert bundled.find("los angelas")["city"] == "Los Angeles"
+    assert bundled.find("St Louis")["state"] == "MO"
+    assert [p["state"] for p in bundled.lookup("Springfield")] == ["MO", "MA", "IL"]
+
+
+@pytest.mark.parametrize("city,state", REAL_PAIRS)
+def test_bundled_list_accepts_real_pairs(bundled, city, state):
+    assert bundled.check_pair(city, state) == (True, None)
+    assert utils.validate_location("State", state, {"City": city}) == (True, state, None)
+    ok, value, _ = utils.validate_location("City", city, {"State": state}) or (True, city, None)
+    assert ok and value == city
+
+
+@pytest.mark.parametrize("city", ["Richmond", "Kent", "Salem", "Lakewood", "Austin", "Los Angelas"])
+def test_bundled_list_infers_no_state(bundled, city):
+    assert bundled.infer_state(city) is None
+    assert question_planner.derive({"City": city}) == {}
+
+
+@pytest.mark.parametrize("city,state", [("Los Angeles", "CA"), ("Chicago", "IL"), ("New York", "NY")])
+def test_bundled_list_infers_state_of_very_large_cities(bundled, city, state):
+    assert bundled.infer_state(city) == state
+
+
+def test_bundled_list_does_not_respell_small_towns(bundled):
+    # Tustin, CA isn't bundled; it must not become Austin
+    assert utils.validate_location("City", "Tustin", {}) is None
+
+
+def test_bundled_list_does_not_hold_back_state(bundled):
+    assert question_planner._askable("State", ["City", "State"])
+
+
+def test_census_data_checks_pairs(census):
+    assert census.complete
+    assert census.check_pair("Austin", "TX") == (True, None)
+    ok, place = census.check_pair("Austin", "CA")
+    assert not ok and place["state"] == "TX"
+    assert census.check_pair("Kent", "OH") == (True, None)
+
+
+def test_census_data_infers_only_unambiguous_states(census):
+    assert census.infer_state("Los Angeles") == "CA"
+    assert census.infer_state("Richmond") is None
+    assert census.infer_state("Kent") is None
+    assert question_planner.derive({"City": "Los Angeles"}) == {"State": "CA"}
+    assert not question_planner._askable("State", ["City", "State"])
+
+
+ESTIMATES_CSV = """SUMLEV,STATE,PLACE,FUNCSTAT,NAME,STNAME,POPESTIMATE2022,POPESTIMATE2023
+040,51,00000,A,Virginia,Virginia,8680000,8715698
+162,48,04000,A,Arlington city,Texas,394000,398112
+162,48,05000,A,Austin city,Texas,960000,979882
+162,06,44000,A,Los Angeles city,California,3830000,3820914
+162,51,67000,A,Richmond city,Virginia,228000,229395
+061,09,33620,A,Greenwich town,Connecticut,63000,63518
+"""
+
+GAZ_HEADER = "USPS\tGEOID\tGEOIDFQ\tANSICODE\tNAME\tLSAD\tFUNCSTAT\tALAND\tAWATER\tINTPTLAT\tINTPTLONG   "
+PLACES_TXT = "\n".join([
+    GAZ_HEADER,
+    "MD\t2419125\t1600000US2419125\t02389339\tColumbia CDP\t57\tS\t82000000\t1000000\t39.2\t-76.8",
+    "MD\t2407125\t1600000US2407125\t02389212\tBethesda CDP\t57\tS\t34000000\t100000\t38.9\t-77.1",
+    "VA\t5103000\t1600000US5103000\t02389154\tArlington CDP\t57\tS\t67000000\t100000\t38.8\t-77.1",
+    "TX\t4805000\t1600000US4805000\t02409761\tAustin city\t25\tA\t830000000\t1000000\t30.3\t-97.7",
+]) + "\n"
+COUSUBS_TXT = "\n".join([
+    GAZ_HEADER,
+    "CT\t0900133620\t0600000US0900133620\t00213434\tGreenwich town\t43\tA\t120000000\t10000000\t41.0\t-73.6",
+    "TX\t4845391745\t0600000US4845391745\t01939155\tAustin CCD\t22\tS\t600000000\t1000000\t30.3\t-97.7",
+]) + "\n"
+
+
+@pytest.fixture
+def census_files(monkeypatch, tmp_path):
+    paths = {}
+    for name, text in [("sub-est2023_all.csv", ESTIMATES_CSV), ("2023_Gaz_place_national.txt", PLACES_TXT),
+                       ("2023_Gaz_cousubs_national.txt", COUSUBS_TXT)]:
+        paths[name] = tmp_path / name
+        paths[name].write_text(text)
+    monkeypatch.setattr(utils, "DATA_DIR", str(tmp_path / "data"))
+    return paths
+
+
+def _build(monkeypatch, paths):
+    assert gazetteer.main(["build", *map(str, paths)]) == 0
+    gaz = gazetteer.Gazetteer.load()
+    monkeypatch.setattr(gazetteer, "_gazetteer", gaz)
+    return gaz
+
+
+def test_census_rows_read_places_cdps_and_mcds(census_files):
+    kinds = set()
+    rows = [row for path in census_files.values() for row in gazetteer.census_rows(str(path), kinds)]
+    assert kinds == gazetteer.PLACE_KINDS
+    assert ("Greenwich", "CT", 63518) in rows and ("Columbia", "MD", 0) in rows
+    # The Austin CCD (a statistical county division) isn't a place
+    assert sum(1 for name, state, _ in rows if (name, state) == ("Austin", "TX")) == 2
+
+
+@pytest.mark.parametrize("city,state", [("Columbia", "MD"), ("Arlington", "VA"), ("Bethesda", "MD"),
+                                        ("Greenwich", "CT"), ("Arlington", "TX")])
+def test_census_build_accepts_cdp_and_mcd_pairs(monkeypatch, census_files, city, state):
+    gaz = _build(monkeypatch, census_files.values())
+    assert gaz.complete
+    assert gaz.check_pair(city, state) == (True, None)
+    assert utils.validate_location("State", state, {"City": city}) == (True, state, None)
+
+
+def test_census_build_infers_states(monkeypatch, census_files):
+    gaz = _build(monkeypatch, census_files.values())
+    # The Arlington CDP's population is unknown: it could be as big as Arlington, TX
+    assert gaz.infer_state("Arlington") is None
+    assert gaz.infer_state("Bethesda") == "MD"
+    assert gaz.infer_state("Los Angeles") == "CA"
+    assert gaz.find("Austin", "TX")["population"] == 979882
+    ok, place = gaz.check_pair("Bethesda", "CA")
+    assert not ok and place["state"] == "MD"
+
+
+def test_census_build_without_cdps_is_incomplete(monkeypatch, census_files):
+    gaz = _build(monkeypatch, [census_files["sub-est2023_all.csv"]])
+    assert not gaz.complete
+    assert gaz.check_pair("Arlington", "VA") == (True, None)
+    assert gaz.infer_state("Arlington") is None
@@ -0,0 +1,43 @@
+import llm_json
+
+
+def test_strict_json_is_ok():
+    assert llm_json.parse('{"Make": "Toyota"}') == ({"Make": "Toyota"}, "ok")
+
+
+def test_fenced_single_quoted_object_is_repaired():
+    data, outcome = llm_json.parse("Sure:\n```json\n{'Make': 'Toyota', 'Crash': True,}\n```")
+    assert outcome == "repaired"
+    assert data == {"Make": "Toyota", "Crash": True}
+
+
+def test_truncated_after_complete_pair_keeps_it():
+    data, outcome = llm_json.parse('{"Make": "Toyota", "Model": "Camry"')
+    assert outcome == "partial"
+    assert data == {"Make": "Toyota", "Model": "Camry"}
+
+
+def test_truncated_inside_value_drops_only_that_pair():
+    assert llm_json.parse('{"Make": "Toyota", "Model": "Cam') == ({"Make": "Toyota"}, "partial")
+    assert llm_json.parse('{"Make": "Toyota", "Speed": 6') == ({"Make": "Toyota"}, "partial")
+
+
+def test_apostrophe_inside_single_quoted_value():
+    data, outcome = llm_json.parse("{'Component': 'driver's door', 'Make': 'Ford'}")
+    assert outcome == "repaired"
+    assert data == {"Component": "driver's door", "Make": "Ford"}
+
+
+def test_nothing_usable_fails():
+    assert llm_json.parse("no json here") == (None, "failed")
+    assert llm_json.parse('{"Make": "Toy') == (None, "failed")
+    assert llm_json.parse(None) == (None, "failed")
+
+
+def test_decode_counts_outcomes_per_site():
+    llm_json.reset_stats()
+    llm_json.decode('{"a": 1}', "extract")
+    llm_json.decode("nope", "extract")
+    row = llm_json.stats()["extract"]
+    assert row["ok"] == 1 and row["failed"] == 1
+    assert row["failure_rate"] == 0.5
@@ -0,0 +1,40 @@
+import time
+
+import pyarrow as pa
+
+import question_planner
+
+
+def test_learn_fill_rates_counts_nulls_and_placeholders():
+    table = pa.table({"VIN": ["1HGCM82633A004352", " N/A ", None, ""], "Make": ["Honda"] * 4})
+    rates = question_planner.learn_fill_rates(table, ["VIN", "Make"])
+    assert rates["VIN"] == 0.25
+    assert rates["Make"] == 1.0
+    # Fields the table doesn't have keep their priors
+    assert rates["Speed"] == question_planner.DEFAULT_FILL_RATES["Speed"]
+
+
+def test_empty_table_uses_priors():
+    table = pa.table({"VIN": pa.array([], pa.string())})
+    assert question_planner.learn_fill_rates(table) == question_planner.DEFAULT_FILL_RATES
+
+
+def test_fill_rates_refreshes_in_background(monkeypatch):
+    import analytics_store
+    calls = []
+
+    def slow_load(months=None, columns=None):
+        calls.append(columns)
+        time.sleep(0.2)
+        return pa.table({"VIN": ["", ""]})
+
+    monkeypatch.setattr(analytics_store, "load_table", slow_load)
+    monkeypatch.setattr(question_planner, "_rates", None)
+    started = time.perf_counter()
+    assert question_planner.fill_rates() == question_planner.DEFAULT_FILL_RATES
+    assert time.perf_counter() - started < 0.1
+    deadline = time.time() + 5
+    while question_planner.fill_rates()["VIN"] != 0.0 and time.time() < deadline:
+        time.sleep(0.02)
+    assert question_planner.fill_rates()["VIN"] == 0.0
+    assert len(calls) == 1
@@ -0,0 +1,97 @@
+import analytics_store
+import report_ids
+import shared_utils as utils
+
+LEGACY_HEADER = [f for f in utils.COMPLAINT_FIELDS if f != "Report_ID"] + utils.FEEDBACK_FIELDS
+
+
+class LegacySheet:
+    """Worksheet stand-in with the calls migrate_header and sync_from_sheet make."""
+
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+
+    def row_values(self, n):
+        return list(self.rows[n - 1]) if len(self.rows) >= n else []
+
+    def insert_cols(self, values, col=1):
+        for i, row in enumerate(self.rows):
+            row.insert(col - 1, values[0][i] if i < len(values[0]) else "")
+
+    def get_values(self, rng):
+        first, last = (int("".join(c for c in part if c.isdigit())) for part in rng.split(":"))
+        width = 0
+        for ch in rng.split(":")[1].rstrip("0123456789"):
+            width = width * 26 + ord(ch) - 64
+        return [row[:width] for row in self.rows[first - 1:last]]
+
+
+def _legacy_rows():
+    complaint = {f: "" for f in LEGACY_HEADER}
+    complaint.update(Timestamp="2024-05-02 10:00:00", Make="Honda", Model="Civic", Description="Brakes failed")
+    feedback = {f: "" for f in LEGACY_HEADER}
+    feedback.update(Feedback_Timestamp="2024-05-03 09:00:00", Feedback_Topic="UI")
+    return [LEGACY_HEADER, [complaint[f] for f in LEGACY_HEADER], [feedback[f] for f in LEGACY_HEADER]]
+
+
+def test_ids_are_unique_sortable_and_valid(monkeypatch):
+    # IDs made earlier in the process (at the real clock) would push these forward
+    monkeypatch.setattr(report_ids, "_last", [0, 0])
+    ids = [report_ids.new_id(now=1715000000.0) for _ in range(1000)]
+    assert len(set(ids)) == 1000
+    assert ids == sorted(ids)
+    assert all(report_ids.normalize_id(i) == i for i in ids)
+    assert report_ids.id_time(ids[0]).timestamp() == 1715000000.0
+
+
+def test_normalize_id():
+    report_id = report_ids.new_id()
+    messy = " " + report_id.lower().replace("1", "l").replace("0", "o") + " "
+    assert report_ids.normalize_id(messy) == report_id
+    assert report_ids.normalize_id("2024-05-03 09:00:00") is None
+    assert report_ids.normalize_id(None) is None
+
+
+def test_index_stores_normalized_ids_and_skips_bad_ones(tmp_path):
+    index = report_ids.ReportIndex(str(tmp_path / "index.sqlite3"))
+    report_id = report_ids.new_id()
+    added = index.add([{"Report_ID": report_id.lower()}, {"Report_ID": "2024-05-03 09:00:00"}, {}], [2, 3, 4])
+    assert added == 1 and len(index) == 1
+    assert index.get(report_id)["sheet_row"] == 2
+    assert index.set_status(report_id.lower(), "CLOSED")
+    assert index.get(report_id)["status"] == "CLOSED"
+
+
+def test_migrate_header_moves_feedback_columns():
+    sheet = LegacySheet(_legacy_rows())
+    assert utils.migrate_header(sheet) == ["Report_ID"]
+    assert sheet.rows[0] == utils.SHEET_HEADER
+    feedback = dict(zip(utils.SHEET_HEADER, sheet.rows[2]))
+    assert feedback["Report_ID"] == "" and feedback["Feedback_Topic"] == "UI"
+    assert utils.migrate_header(sheet) == []
+
+
+def test_sync_reads_legacy_sheet_by_header(monkeypatch):
+    stored = []
+    monkeypatch.setattr(analytics_store, "append_records", lambda records: stored.extend(records) or len(records))
+    monkeypatch.setattr(analytics_store, "_read_json", lambda name, default: default)
+    monkeypatch.setattr(analytics_store, "_write_json", lambda name, data: None)
+    indexed = []
+    monkeypatch.setattr(report_ids, "get_index", lambda: type("I", (), {"add": lambda self, r, rows: indexed.extend(r)})())
+
+    analytics_store.sync_from_sheet(LegacySheet(_legacy_rows()))
+    complaint, feedback = stored
+    assert complaint["Make"] == "Honda" and "Report_ID" not in complaint
+    # The legacy Feedback_Timestamp column isn't read as a Report_ID
+    assert "Report_ID" not in feedback
+
+
+def test_input_length_counts_user_fields_only():
+    record = {"Make": "Honda", "Description": "abc"}
+    utils.finalize_complaint_record(record)
+    first = record["Input_Length"]
+    assert first == len("Honda") + len("abc")
+    # Finalizing again (a retried submit) sees its own ID and scores but doesn't count them
+    record["Timestamp"] = "2024-05-02 10:00:00"
+    utils.finalize_complaint_record(record)
+    assert record["Input_Length"] == first
@@ -0,0 +1,81 @@
+import io
+import re
+import zipfile
+
+import pytest
+
+import report_render
+
+
+def record(description="Brake pedal went soft (twice) on the highway"):
+    return {"Timestamp": "2024-05-02 10:00:00", "Make": "Honda", "Model": "Civic", "Model_Year": "2019",
+            "City": "Austin", "State": "TX", "Crash": "NO", "Description": description}
+
+
+def parse_pdf(data):
+    """Check a PDF's file structure; returns {object number: body}."""
+    assert data.startswith(b"%PDF-1.4\n")
+    assert data.rstrip().endswith(b"%%EOF")
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\s*$", data).group(1))
+    assert data[startxref:].startswith(b"xref\n")
+    size = int(re.match(rb"xref\n0 (\d+)\n", data[startxref:]).group(1))
+    entries = re.findall(rb"(\d{10}) (\d{5}) ([nf]) \n", data[startxref:])
+    assert len(entries) == size
+    trailer = data[data.index(b"trailer", startxref):]
+    assert b"/Size %d" % size in trailer and b"/Root 1 0 R" in trailer
+
+    objects = {}
+    for num, (offset, _, kind) in enumerate(entries):
+        if kind == b"f":
+            continue
+        match = re.match(rb"%d 0 obj\n(.*?)\nendobj\n" % num, data[int(offset):], re.S)
+        assert match, f"xref offset of object {num} is wrong"
+        objects[num] = match.group(1)
+    for body in objects.values():
+        stream = re.match(rb"<< /Length (\d+) >>\nstream\n(.*)\nendstream$", body, re.S)
+        if stream:
+            assert int(stream.group(1)) == len(stream.group(2))
+    return objects
+
+
+def page_text(objects):
+    pages = re.search(rb"/Kids \[([^\]]*)\]", objects[2]).group(1)
+    text = []
+    for page in re.findall(rb"(\d+) 0 R", pages):
+        content = int(re.search(rb"/Contents (\d+) 0 R", objects[int(page)]).group(1))
+        text += [re.sub(rb"\\(.)", rb"\1", s).decode("cp1252")
+                 for s in re.findall(rb"\(((?:\\.|[^\\)])*)\) Tj", objects[content])]
+    return text
+
+
+def test_pdf_structure_and_text():
+    objects = parse_pdf(report_render.render_pdf(record(), "01HXAMPLE"))
+    assert b"/Count 1" in objects[2]
+    text = page_text(objects)
+    assert text[0] == report_render.TITLE
+    assert "Report ID: 01HXAMPLE" in text
+    assert "Brake pedal went soft (twice) on the highway" in text
+
+
+def test_long_report_spans_pages():
+    objects = parse_pdf(report_render.render_pdf(record("word " * 3000)))
+    count = int(re.search(rb"/Count (\d+)", objects[2]).group(1))
+    assert count > 1
+    assert page_text(objects)[-1] == "End of Report"
+
+
+def test_pdf_opens_with_pypdf():
+    pypdf = pytest.importorskip("pypdf")
+    reader = pypdf.PdfReader(io.BytesIO(report_render.render_pdf(record(), "01HXAMPLE")))
+    assert "Report ID: 01HXAMPLE" in reader.pages[0].extract_text()
+
+
+def test_text_report_skips_empty_fields():
+    text = report_render.render_text({**record(), "VIN": None, "Mileage": ""}, "01HXAMPLE")
+    assert "Make: Honda" in text and "VIN" not in text and "Mileage" not in text
+
+
+def test_batch_zip():
+    data = report_render.render_batch([("A", record()), ("B", record())], fmt="txt")
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.namelist() == ["safety_report_A.txt", "safety_report_B.txt"]
@@ -0,0 +1,75 @@
+import pytest
+
+import review_editor
+import shared_utils as utils
+
+GROUPS = review_editor.COMPLAINT_GROUPS
+
+
+@pytest.fixture
+def session(monkeypatch):
+    state = {}
+    monkeypatch.setattr(review_editor.st, "session_state", state)
+    return state
+
+
+def record(**fields):
+    base = {"Make": "Honda", "Model": "Civic", "Model_Year": "2019", "VIN": None,
+            "City": "Austin", "State": "TX", "Date_Complaint": "2024-05-02", "Description": "Brakes failed"}
+    base.update(fields)
+    return base
+
+
+def test_views_are_cached_per_record_version(session):
+    views = review_editor.grouped_views(record(), GROUPS, "views")
+    assert views["vehicle_editor"][0] == ["Make", "Model", "Model_Year"]
+    assert review_editor.grouped_views(record(), GROUPS, "views") is views
+    assert review_editor.grouped_views(record(Make="Ford"), GROUPS, "views") is not views
+
+
+def test_dirty_fields_returns_only_changed_values(session):
+    session["vehicle_editor"] = {"edited_rows": {0: {"Value": "Honda"}, "1": {"Value": "Accord"}}}
+    session["location_editor"] = {"edited_rows": {1: {"Other": "x"}}}
+    assert review_editor.dirty_fields(record(), GROUPS) == {"Model": "Accord"}
+
+
+def test_dirty_fields_without_edits(session):
+    assert review_editor.dirty_fields(record(), GROUPS) == {}
+
+
+def test_revalidate_without_validator_rejects_blanks():
+    clean, errors = review_editor.revalidate({"Make": "Ford", "Model": "  "})
+    assert clean == {"Make": "Ford"}
+    assert set(errors) == {"Model"}
+
+
+def test_revalidate_rechecks_dependent_fields():
+    seen = []
+
+    def validator(field, value, locked, merged, anchor):
+        seen.append((field, value, merged["City"]))
+        return True, str(value).upper(), None
+
+    clean, errors = review_editor.revalidate({"City": "Dallas"}, validator, record())
+    assert errors == {}
+    assert clean == {"City": "DALLAS", "State": "TX"}
+    # State was checked against the edited City
+    assert seen == [("City", "Dallas", "Dallas"), ("State", "TX", "DALLAS")]
+
+
+def test_revalidate_skips_dependents_of_a_rejected_edit():
+    def validator(field, value, locked, merged, anchor):
+        return field != "City", value, "Unknown city"
+
+    clean, errors = review_editor.revalidate({"City": "Nowhere"}, validator, record())
+    assert clean == {} and errors == {"City": "Unknown city"}
+
+
+def test_revalidate_with_real_validator():
+    # The edited year is checked against the unedited complaint date
+    clean, errors = review_editor.revalidate({"Model_Year": "2030"}, utils.validate_field,
+                                             record(), anchor="2024-06-01")
+    assert set(errors) == {"Date_Complaint"} and "2030" in errors["Date_Complaint"]
+    clean, errors = review_editor.revalidate({"Model_Year": "2018"}, utils.validate_field,
+                                             record(), anchor="2024-06-01")
+    assert errors == {} and clean["Model_Year"] == "2018"
@@ -0,0 +1,77 @@
+import pytest
+
+import risk_scoring
+
+VALID_VIN = "1HGCM82633A004352"     # Honda, check digit 3
+FOREIGN_VIN = "WBA3A5C51CF256551"   # BMW; position 9 is not a check digit
+
+
+def record(**fields):
+    base = {"Make": "Honda", "Model": "Accord", "Model_Year": "2003", "VIN": VALID_VIN,
+            "Crash": "NO", "Fire": "NO", "Injured": "0", "Deaths": "0", "Speed": "30",
+            "Component": "ELECTRICAL SYSTEM",
+            "Description": "The radio display flickers on and off while driving at night on the highway"}
+    base.update(fields)
+    return base
+
+
+def test_vin_check_digit():
+    assert risk_scoring.vin_is_valid(VALID_VIN)
+    assert not risk_scoring.vin_is_valid(VALID_VIN[:8] + "4" + VALID_VIN[9:])
+    assert not risk_scoring.vin_is_valid("1HGCM82633A00435")       # 16 chars
+    assert not risk_scoring.vin_is_valid("1HGCM82633A00435I")      # I isn't allowed
+
+
+def test_check_digit_only_for_north_american_vins():
+    assert not risk_scoring.north_american_vin(FOREIGN_VIN)
+    assert risk_scoring.vin_is_valid(FOREIGN_VIN)
+    assert risk_scoring.vin_is_valid(FOREIGN_VIN[:8] + "9" + FOREIGN_VIN[9:])
+    assert risk_scoring.vin_model_years(FOREIGN_VIN) == []
+    level, suspicion = risk_scoring.score_record(record(VIN=FOREIGN_VIN, Make="BMW", Model="328i"))
+    assert int(suspicion) < 20
+
+
+def test_vin_model_years():
+    assert risk_scoring.vin_model_years(VALID_VIN) == [2033, 2003]
+
+
+@pytest.mark.parametrize("fields,level", [
+    ({}, "LOW"),
+    ({"Crash": "YES", "Speed": "45", "Component": "SERVICE BRAKES"}, "MEDIUM"),
+    ({"Crash": "YES", "Fire": "YES", "Speed": "60", "Component": "SERVICE BRAKES"}, "HIGH"),
+    ({"Crash": "YES", "Fire": "YES", "Injured": "3", "Deaths": "1", "Speed": "70",
+      "Component": "AIR BAGS"}, "CRITICAL"),
+])
+def test_risk_levels(fields, level):
+    assert risk_scoring.score_record(record(**fields))[0] == level
+
+
+def test_risk_levels_are_ordered():
+    assert risk_scoring.risk_level(0.9) == "CRITICAL"
+    assert risk_scoring.risk_level(0.6) == "HIGH"
+    assert risk_scoring.risk_level(0.3) == "MEDIUM"
+    assert risk_scoring.risk_level(0.1) == "LOW"
+
+
+@pytest.mark.parametrize("fields", [
+    {"VIN": VALID_VIN[:8] + "4" + VALID_VIN[9:]},                  # bad check digit
+    {"Model_Year": "2015"},                                          # VIN says 2003
+    {"Injured": "2"},                                                # casualties, no crash or fire
+    {"Speed": "190"},                                                # implausible speed
+])
+def test_suspicion_signals(fields):
+    clean = int(risk_scoring.score_record(record())[1])
+    flagged = int(risk_scoring.score_record(record(**fields))[1])
+    assert clean < 20
+    assert flagged >= clean + 10
+
+
+def test_missing_core_fields_raise_suspicion():
+    clean = int(risk_scoring.score_record(record())[1])
+    assert int(risk_scoring.score_record(record(Make="", Model="", Description=""))[1]) > clean
+
+
+def test_batch_matches_single():
+    records = [record(), record(Crash="YES", Injured="1"), record(Speed="190")]
+    assert risk_scoring.score_records(records) == [risk_scoring.score_record(r) for r in records]
+    assert risk_scoring.score_records([]) == []
@@ -0,0 +1,74 @@
+import time
+
+import session_store
+from conversation_memory import ConversationMemory
+from session_store import SessionStore
+
+STATE = {"page": "CHAT", "record": {"Make": "Honda"}, "locked_fields": {"VIN"},
+         "messages": ConversationMemory([{"role": "user", "content": "hi"}])}
+
+def test_round_trip_keeps_types():
+    store = SessionStore()
+    store.put("a", STATE)
+    data = store.get("a")
+    assert data["locked_fields"] == {"VIN"}
+    assert isinstance(data["messages"], ConversationMemory)
+    assert list(data["messages"]) == list(STATE["messages"])
+
+def test_sessions_survive_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    SessionStore(path).put("a", STATE)
+    assert SessionStore(path).get("a")["record"] == {"Make": "Honda"}
+
+def test_lru_victims_stay_readable(tmp_path):
+    store = SessionStore(str(tmp_path / "s.sqlite3"), max_sessions=1)
+    store.put("a", {"n": 1})
+    store.put("b", {"n": 2})
+    assert store.stats()["hot_sessions"] == 1
+    assert store.get("a") == {"n": 1}
+
+def test_expired_sessions_are_purged(tmp_path):
+    path = str(tmp_path / "s.sqlite3")
+    SessionStore(path, ttl=-1).put("old", {"n": 1})
+    store = SessionStore(path)
+    assert store.get("old") is None
+    assert store._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+
+def test_no_hot_tier_reads_without_writing(tmp_path):
+    store = SessionStore(str(tmp_path / "s.sqlite3"), max_sessions=0)
+    store.put("a", {"n": 1})
+    changes = store._db.total_changes
+    assert store.get("a") == {"n": 1}
+    assert store._db.total_changes == changes
+    assert store.stats()["hot_sessions"] == 0
+
+def test_ttl(tmp_path):
+    store = SessionStore(ttl=0.01)
+    store.put("a", {"n": 1})
+    time.sleep(0.02)
+    assert store.get("a") is None
+
+def test_feedback_sessions_stored_with_the_shared_record_key():
+    data = session_store.upgrade("FEEDBACK", {"fb_page": "CHAT", "record": {"Feedback_Topic": "App"}})
+    assert data == {"fb_page": "CHAT", "fb_record": {"Feedback_Topic": "App"}}
+    assert session_store.upgrade("COMPLAINT", {"record": {}}) == {"record": {}}
+
+def test_versioned_write_detects_a_concurrent_update(tmp_path):
+    store = SessionStore(str(tmp_path / "s.sqlite3"), max_sessions=0)
+    assert store.put_versioned("a", {"n": 0}, None)
+    assert not store.put_versioned("a", {"n": 0}, None)
+    data, version = store.get_versioned("a")
+    assert store.put_versioned("a", {"n": 1}, version)
+    # A second writer that read the same version loses
+    assert not store.put_versioned("a", {"n": 2}, version)
+    assert store.get_versioned("a") == ({"n": 1}, version + 1)
+
+def test_version_column_added_to_existing_tables(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "s.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE sessions (key TEXT PRIMARY KEY, expires REAL NOT NULL, data BLOB NOT NULL)")
+    db.execute("INSERT INTO sessions VALUES (?, ?, ?)", ("a", time.time() + 60, session_store.dumps({"n": 1})))
+    db.commit()
+    db.close()
+    assert SessionStore(path, max_sessions=0).get_versioned("a") == ({"n": 1}, 0)
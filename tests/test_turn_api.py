@@ -0,0 +1,75 @@
+import threading
+from http.server import HTTPServer
+
+import pytest
+
+import session_store
+import turn_api
+import turn_engine
+
+
+def fake_turn(state, prompt):
+    """Fills City from the message; counts a VIN attempt and locks City."""
+    state["messages"].append({"role": "user", "content": prompt})
+    state["record"]["City"] = prompt
+    state["locked_fields"].add("City")
+    state["attempt_counts"]["VIN"] = state["attempt_counts"].get("VIN", 0) + 1
+    state["messages"].append({"role": "assistant", "content": f"seen {sorted(k for k, v in state['record'].items() if v)}"})
+    return {"reply": state["messages"][-1]["content"], "validated": {"City": prompt}, "derived": {},
+            "errors": {}, "complete": False}
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    monkeypatch.setitem(turn_engine.FLOWS, "COMPLAINT", (fake_turn, *turn_engine.FLOWS["COMPLAINT"][1:]))
+    monkeypatch.setattr(turn_api.TurnHandler, "store", turn_api.open_store(str(tmp_path / "api.sqlite3")))
+    server = HTTPServer(("127.0.0.1", 0), turn_api.TurnHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def local_state():
+    state = turn_engine.new_state("COMPLAINT")
+    state["record"].update(Make="Honda", Model="Civic")
+    state["locked_fields"] = {"Make"}
+    state["attempt_counts"] = {"VIN": 2}
+    return state
+
+
+def test_new_api_session_starts_from_local_state(api):
+    state = local_state()
+    result = turn_api.remote_turn(state, "COMPLAINT", "Austin", base_url=api)
+    assert state["api_session_COMPLAINT"]
+    # The API saw the local record, and its changes were merged into it
+    assert result["reply"] == "seen ['City', 'Make', 'Model']"
+    assert state["record"]["Make"] == "Honda" and state["record"]["City"] == "Austin"
+    assert state["locked_fields"] == {"Make", "City"}
+    assert state["attempt_counts"] == {"VIN": 3}
+    assert [m["content"] for m in state["messages"]][-2:] == ["Austin", result["reply"]]
+
+
+def test_expired_api_session_is_reseeded(api):
+    state = local_state()
+    turn_api.remote_turn(state, "COMPLAINT", "Austin", base_url=api)
+    old = state["api_session_COMPLAINT"]
+    turn_api.TurnHandler.store.delete(old)
+
+    result = turn_api.remote_turn(state, "COMPLAINT", "Dallas", base_url=api)
+    assert state["api_session_COMPLAINT"] != old
+    assert result["reply"] == "seen ['City', 'Make', 'Model']"
+    assert state["attempt_counts"] == {"VIN": 4}
+
+
+def test_unreachable_api_leaves_state_alone():
+    state = local_state()
+    result = turn_api.remote_turn(state, "COMPLAINT", "Austin", base_url="http://127.0.0.1:9")
+    assert result["reply"] == turn_api.UNAVAILABLE_REPLY
+    assert state["record"]["City"] is None and len(state["messages"]) == 1
+
+
+def test_api_session_id_is_persisted():
+    assert "api_session_COMPLAINT" in session_store.FLOW_KEYS["COMPLAINT"]
+    assert "api_session_FEEDBACK" in session_store.FLOW_KEYS["FEEDBACK"]
+    assert "api_session_COMPLAINT" not in turn_api.synced_keys("COMPLAINT")
@@ -0,0 +1,284 @@
+"""
+Stateless HTTP/JSON API for conversation turns.
+
+    POST /sessions               {"mode": "COMPLAINT" | "FEEDBACK", "state": {...}?}
+        -> 201 {"session_id", "reply", "page"}
+    POST /sessions/{id}/turn     {"message": "..."}
+        -> 200 {"session_id", "reply", "page", "record", "remaining", "state",
+                "validated", "derived", "errors", "complete", "worker"}
+    GET  /health                 -> 200 {"ok": true, "worker"}
+    GET  /metrics                -> 200 {"worker", "llm_json": per-call-site parse outcomes}
+    GET  /reports/{report_id}    -> 200 {"report_id", "status", "submitted", "sheet_row", "updated"}
+
+Errors are JSON too: {"error": "..."} with 400/404, 409 when a session kept
+changing under a turn, and 500 when a turn raised.
+
+Workers keep no conversation state: every turn loads the session from the
+shared SQLite session store, runs turn_engine and writes it back, so any
+worker can serve any turn and workers can sit behind a load balancer. The
+write is conditional on the version that was read; if another turn on the
+same session committed in between, the turn is rerun on the newer state, so
+concurrent messages are applied one after the other instead of one being lost.
+A rerun repeats the turn's LLM calls (its prompts depend on the newer state);
+that only happens when one session sends two messages at once.
+
+"state" carries the flow's other session keys (locked fields, attempt
+counts, ...) encoded with session_store.encode. A client can seed a new
+session with them, e.g. to carry a conversation over to a new API session
+after the old one expired.
+Several workers can share one port (SO_REUSEPORT):
+
+    python turn_api.py --port 8600 --workers 4
+
+Set COMPLAINT_BOT_TURN_API=http://host:8600 to make the Streamlit pages
+send their chat turns here instead of running them in-process.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import secrets
+import sys
+import time
+import traceback
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import llm_json
+import report_ids
+import session_store
+import shared_utils as utils
+import turn_engine
+
+DB_FILE = "turn_api_sessions.sqlite3"
+REQUEST_TIMEOUT_S = 30
+TURN_ATTEMPTS = 3   # reruns of a turn whose session changed underneath it
+UNAVAILABLE_REPLY = "Sorry, I couldn't process that just now. Could you send it again?"
+
+def synced_keys(flow):
+    """Session keys besides page, record and messages that a client mirrors."""
+    _, page_key, messages_key, _, record_key = turn_engine.FLOWS[flow]
+    return [k for k in session_store.FLOW_KEYS[flow]
+            if k not in (page_key, messages_key, record_key) and not k.startswith("api_session_")]
+
+def open_store(path=None):
+    # max_sessions=0 bypasses the per-process hot tier: reads and writes go
+    # straight to SQLite, so every worker sees every other worker's writes.
+    return session_store.SessionStore(path or os.path.join(utils.DATA_DIR, DB_FILE), max_sessions=0)
+
+# --- SERVER ---
+class TurnHandler(BaseHTTPRequestHandler):
+    store = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._guarded(self._get)
+
+    def do_POST(self):
+        self._guarded(self._post)
+
+    def _guarded(self, handler):
+        """Run a handler; an exception becomes a JSON 500 instead of a dropped connection."""
+        try:
+            handler()
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            self._send(500, {"error": "internal error"})
+
+    def _get(self):
+        path = self.path.rstrip("/")
+        if path == "/health":
+            self._send(200, {"ok": True, "worker": os.getpid()})
+        elif path == "/metrics":
+            self._send(200, {"worker": os.getpid(), "cpu_s": time.process_time(), "llm_json": llm_json.stats()})
+        elif path.startswith("/reports/"):
+            entry = report_ids.lookup(path.split("/", 2)[2])
+            if entry:
+                self._send(200, entry)
+            else:
+                self._send(404, {"error": "unknown report ID"})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def _post(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "invalid JSON body"})
+
+        parts = self.path.strip("/").split("/")
+        if parts == ["sessions"]:
+            return self._create_session(body)
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "turn":
+            return self._turn(parts[1], body)
+        self._send(404, {"error": "not found"})
+
+    def _create_session(self, body):
+        flow = str(body.get("mode", "COMPLAINT")).upper()
+        if flow not in turn_engine.FLOWS:
+            return self._send(400, {"error": f"unknown mode {flow!r}"})
+        session_id = secrets.token_urlsafe(16)
+        state = turn_engine.new_state(flow)
+        seed = session_store.decode(body.get("state") or {})
+        state.update({k: v for k, v in seed.items()
+                      if k in session_store.FLOW_KEYS[flow] and not k.startswith("api_session_")})
+        state["flow"] = flow
+        self.store.put_versioned(session_id, state, None)
+
+        _, page_key, messages_key, _, _ = turn_engine.FLOWS[flow]
+        messages = list(state[messages_key])
+        self._send(201, {
+            "session_id": session_id,
+            "reply": messages[-1]["content"] if messages else "",
+            "page": state[page_key],
+        })
+
+    def _turn(self, session_id, body):
+        message = str(body.get("message") or "").strip()
+        if not message:
+            return self._send(400, {"error": "message is required"})
+        for _ in range(TURN_ATTEMPTS):
+            state, version = self.store.get_versioned(session_id)
+            if state is None:
+                return self._send(404, {"error": "unknown or expired session"})
+
+            flow = state["flow"]
+            session_store.upgrade(flow, state)
+            _, page_key, _, remaining_fn, record_key = turn_engine.FLOWS[flow]
+            result = turn_engine.run_turn(flow, state, message)
+            if self.store.put_versioned(session_id, state, version):
+                break
+        else:
+            return self._send(409, {"error": "session is busy, please retry"})
+
+        self._send(200, {
+            "session_id": session_id,
+            "page": state[page_key],
+            "record": state[record_key],
+            "remaining": remaining_fn(state[record_key]),
+            "state": session_store.encode({k: state[k] for k in synced_keys(flow) if k in state}),
+            "worker": os.getpid(),
+            **result,
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+class ReusePortHTTPServer(HTTPServer):
+    allow_reuse_port = True
+
+def serve(host="127.0.0.1", port=8600, store_path=None, ready=None,
+          initializer=None, initargs=()):
+    """Run one single-threaded worker (blocks). initializer runs first, in the worker."""
+    if initializer is not None:
+        initializer(*initargs)
+    TurnHandler.store = open_store(store_path)
+    server = ReusePortHTTPServer((host, port), TurnHandler)
+    if ready is not None:
+        ready.set()
+    server.serve_forever()
+
+def serve_workers(host="127.0.0.1", port=8600, workers=1, store_path=None,
+                  initializer=None, initargs=()):
+    """Start `workers` processes sharing one port. Returns the Process list."""
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    for _ in range(workers):
+        ready = ctx.Event()
+        proc = ctx.Process(target=serve, args=(host, port, store_path, ready, initializer, initargs),
+                           daemon=True)
+        proc.start()
+        ready.wait(30)
+        procs.append(proc)
+    return procs
+
+# --- CLIENT ---
+def _post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT_S) as response:
+        return json.loads(response.read())
+
+def create_session(base_url, flow, state=None):
+    payload = {"mode": flow}
+    if state:
+        payload["state"] = session_store.encode(state)
+    return _post(f"{base_url.rstrip('/')}/sessions", payload)
+
+def send_turn(base_url, session_id, message):
+    return _post(f"{base_url.rstrip('/')}/sessions/{session_id}/turn", {"message": message})
+
+def _seed(state, flow):
+    """The local conversation, to start an API session from."""
+    return {k: state[k] for k in session_store.FLOW_KEYS[flow]
+            if k in state and not k.startswith("api_session_")}
+
+def remote_turn(state, flow, prompt, base_url=None):
+    """
+    Run a turn on the API and mirror the result into a local state mapping
+    (used by the Streamlit pages). Returns the same dict as turn_engine; if
+    the API can't be reached or fails, the state is left as it was and the
+    reply asks the user to send the message again.
+
+    The API session id is kept in state (and so in the session store). A new
+    or expired API session is started from the local record, locks, attempt
+    counts and messages, so a resumed conversation carries on where it was.
+    """
+    base_url = base_url or utils.TURN_API_URL
+    _, page_key, messages_key, _, record_key = turn_engine.FLOWS[flow]
+    key = f"api_session_{flow}"
+    try:
+        if not state.get(key):
+            state[key] = create_session(base_url, flow, _seed(state, flow))["session_id"]
+        try:
+            result = send_turn(base_url, state[key], prompt)
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                raise
+            # Expired on the API side: start over from the local copy
+            state[key] = create_session(base_url, flow, _seed(state, flow))["session_id"]
+            result = send_turn(base_url, state[key], prompt)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        print(f"Turn API Error: {e}", file=sys.stderr)
+        return {"reply": UNAVAILABLE_REPLY, "validated": {}, "derived": {}, "errors": {}, "complete": False}
+
+    # Merge what the turn filled in; the rest of the local record stays as it is
+    state[record_key].update({**result["validated"], **result["derived"]})
+    state.update(session_store.decode(result.get("state") or {}))
+    if result["complete"]:
+        state[page_key] = result["page"]
+    state[messages_key].append({"role": "user", "content": prompt})
+    if result.get("reply"):
+        state[messages_key].append({"role": "assistant", "content": result["reply"]})
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the conversation turn API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    procs = serve_workers(args.host, args.port, max(1, args.workers))
+    print(f"Turn API on http://{args.host}:{args.port} with {len(procs)} worker(s)")
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
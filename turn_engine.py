@@ -0,0 +1,197 @@
+"""
+UI-independent conversation turns for the complaint and feedback flows.
+
+A turn takes a state mapping (st.session_state, or a plain dict loaded from
+the session store by turn_api) and the user's message, runs extraction,
+validation and reply generation through shared_utils, mutates the state and
+returns what the caller needs to render. Nothing here touches Streamlit
+widgets, so the same logic serves the Streamlit pages and the HTTP API.
+"""
+import time
+
+import question_planner
+import shared_utils as utils
+from conversation_memory import ConversationMemory
+
+COMPLAINT_GREETING = """Hi! I'm here to help you file a safety report.
+
+You can tell me everything at once or step by step - whatever works for you! For example:
+
+*"My 2019 Honda Civic's brakes failed while driving 60mph in Los Angeles, CA. No crash or injuries, but it was scary. VIN is 1HGBH41JXMN109186"*
+
+Or just start with the basics and I'll guide you through! 😊"""
+
+FEEDBACK_GREETING = "Hey there! We'd love to hear your feedback. What's on your mind today? Feel free to share everything - your experience, suggestions, or any concerns you have! 💭"
+
+FEEDBACK_TOPICS = {
+    "service": ["service", "support", "help", "assistance"],
+    "product": ["product", "quality", "feature", "functionality"],
+    "website": ["website", "app", "interface", "navigation", "ui"],
+    "billing": ["billing", "payment", "charge", "invoice", "price"],
+    "suggestion": ["suggest", "recommend", "improve", "enhancement", "idea"],
+    "complaint": ["complaint", "issue", "problem", "concern", "dissatisfied"]
+}
+
+# --- STATE ---
+def new_state(flow):
+    """Fresh state for a flow ("COMPLAINT" or "FEEDBACK")."""
+    if flow == "COMPLAINT":
+        return {
+            "page": "CHAT",
+            "record": {field: None for field in utils.COMPLAINT_FIELDS},
+            "locked_fields": set(),
+            "attempt_counts": {},
+            "no_extraction_count": 0,  # Track consecutive failed extractions
+            "started_at": time.time(),  # Anchor for relative dates ("last Tuesday")
+            "messages": ConversationMemory([{"role": "assistant", "content": COMPLAINT_GREETING}]),
+        }
+    return {
+        "fb_page": "CHAT",
+        "fb_record": {field: None for field in utils.FEEDBACK_FIELDS},
+        "fb_messages": ConversationMemory([{"role": "assistant", "content": FEEDBACK_GREETING}]),
+    }
+
+def complaint_remaining(record):
+    return [f for f in utils.COMPLAINT_FIELDS
+            if f not in utils.AUTO_FIELDS and record.get(f) is None]
+
+def feedback_remaining(record):
+    return [f for f in utils.FEEDBACK_FIELDS
+            if f != "Feedback_Timestamp" and record.get(f) is None]
+
+# --- COMPLAINT FLOW ---
+def complaint_turn(state, prompt):
+    """
+    Process one user message in the complaint flow.
+    Returns {"reply", "validated", "derived", "errors", "complete"}.
+    """
+    messages = state["messages"]
+    record = state["record"]
+    attempt_counts = state["attempt_counts"]
+    messages.append({"role": "user", "content": prompt})
+
+    # --- SMART EXTRACTION + VALIDATION ---
+    remaining = complaint_remaining(record)
+    anchor = state.get("started_at")
+    extracted = utils.extract_all_fields_from_text(prompt, remaining, record, anchor)
+
+    validated_data = {}
+    validation_errors = {}
+    for field, value in extracted.items():
+        is_valid, validated_value, error_msg = utils.validate_field(
+            field, value, state["locked_fields"], {**record, **validated_data}, anchor)
+
+        if is_valid:
+            validated_data[field] = validated_value
+            attempt_counts[field] = 0
+        else:
+            validation_errors[field] = error_msg
+            attempt_counts[field] = attempt_counts.get(field, 0) + 1
+
+    # --- SAVE VALID DATA ---
+    derived = {}
+    if validated_data:
+        record.update(validated_data)
+        state["no_extraction_count"] = 0
+        # Fill in whatever the new answers imply (e.g. Model_Year from the VIN)
+        derived = question_planner.derive(record)
+        record.update(derived)
+
+    # Planned order: the next question's fields come first
+    remaining = question_planner.plan(record, complaint_remaining(record))
+
+    # --- GENERATE AI RESPONSE ---
+    if validation_errors:
+        ai_reply = utils.generate_validation_error_response(messages, validation_errors, attempt_counts)
+        state["no_extraction_count"] = 0
+
+    elif validated_data and remaining:
+        ai_reply = utils.generate_ai_response(messages, record, remaining, "COMPLAINT", attempt_counts)
+        state["no_extraction_count"] = 0
+
+    elif not remaining:
+        ai_reply = "Perfect! I have all the information I need. Let me show you a summary to review! 🎉"
+        state["page"] = "REVIEW"
+
+    elif not extracted:
+        # Nothing was extracted - could be small talk or unclear input
+        state["no_extraction_count"] = state.get("no_extraction_count", 0) + 1
+
+        if state["no_extraction_count"] >= 3:
+            # User seems stuck - offer more help
+            ai_reply = f"""I'm having trouble understanding. Let me help!
+
+I still need the following information:
+{chr(10).join(f'• **{field}**: {utils.FIELD_DESCRIPTIONS.get(field, field)}' for field in remaining[:3])}
+
+Could you provide any of these? For example, just say "Toyota Camry 2019" or "My VIN is 1HGBH41JXMN109186" """
+            state["no_extraction_count"] = 0
+        else:
+            ai_reply = utils.generate_small_talk_response(messages, remaining)
+    else:
+        # Some edge case
+        ai_reply = "Thanks! Let me know if you have any other details to share."
+        state["no_extraction_count"] = 0
+
+    messages.append({"role": "assistant", "content": ai_reply})
+    return {
+        "reply": ai_reply,
+        "validated": validated_data,
+        "derived": derived,
+        "errors": validation_errors,
+        "complete": not remaining and not validation_errors,
+    }
+
+# --- FEEDBACK FLOW ---
+def extract_feedback(prompt, remaining):
+    """Keyword-based extraction for the two feedback fields."""
+    extracted = {}
+    if "Feedback_Topic" in remaining:
+        text_lower = prompt.lower()
+        for topic, keywords in FEEDBACK_TOPICS.items():
+            if any(kw in text_lower for kw in keywords):
+                extracted["Feedback_Topic"] = topic.title()
+                break
+
+        # If no keyword match but text is substantial, use first few words
+        if "Feedback_Topic" not in extracted and len(prompt.split()) > 3:
+            extracted["Feedback_Topic"] = " ".join(prompt.split()[:4])
+
+    # If message is detailed, capture as the main feedback
+    if "Feedback_Cause_Help" in remaining and len(prompt) > 20:
+        extracted["Feedback_Cause_Help"] = prompt
+    return extracted
+
+def feedback_turn(state, prompt):
+    """
+    Process one user message in the feedback flow.
+    Returns the same keys as complaint_turn; reply is None when
+    the flow moved straight to review.
+    """
+    messages = state["fb_messages"]
+    record = state["fb_record"]
+    messages.append({"role": "user", "content": prompt})
+
+    extracted = extract_feedback(prompt, feedback_remaining(record))
+    if extracted:
+        record.update(extracted)
+        remaining = feedback_remaining(record)
+        if not remaining:
+            state["fb_page"] = "REVIEW"
+            return {"reply": None, "validated": extracted, "derived": {}, "errors": {}, "complete": True}
+        ai_reply = utils.generate_ai_response(messages, record, remaining, "FEEDBACK", {})
+    else:
+        # Small talk or unclear input
+        ai_reply = utils.generate_small_talk_response(messages, ["your feedback"])
+
+    messages.append({"role": "assistant", "content": ai_reply})
+    return {"reply": ai_reply, "validated": extracted, "derived": {}, "errors": {}, "complete": False}
+
+# flow: (turn, page key, messages key, remaining fields, record key)
+FLOWS = {
+    "COMPLAINT": (complaint_turn, "page", "messages", complaint_remaining, "record"),
+    "FEEDBACK": (feedback_turn, "fb_page", "fb_messages", feedback_remaining, "fb_record"),
+}
+
+def run_turn(flow, state, prompt):
+    return FLOWS[flow][0](state, prompt)